@@ -0,0 +1,34 @@
+# backend/app/api/admin.py
+"""
+運用者向けの API（PROFILING_ENABLED のときだけ main.py が登録する）
+認可は PROFILING_ADMIN_TOKEN と同じ値を X-Profile-Token ヘッダに付けるだけ
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from app.core.profiling import is_admin_token, list_profiles, profile_path
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def require_admin(x_profile_token: str | None = Header(None)) -> None:
+    if not is_admin_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="admin token required")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+def get_profiles() -> list[dict]:
+    """保存済みプロファイルの一覧（新しい順）"""
+    return list_profiles()
+
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_admin)])
+def download_profile(name: str):
+    """
+    .folded は flamegraph.pl / speedscope、.pstats は python -m pstats / snakeviz で開く
+    """
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/octet-stream" if name.endswith(".pstats") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
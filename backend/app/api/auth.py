@@ -1,5 +1,5 @@
 # backend/app/api/auth.py
-from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
 from starlette.responses import JSONResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -7,6 +7,9 @@ from sqlalchemy.orm import Session
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
+from app.core.blocking import run_blocking
+from app.core.etag import get_data_version, make_etag, not_modified, set_etag
+from app.core.identity import login_session, session_user_id
 from app.core.settings import GOOGLE_CLIENT_ID
 from app.creds import has_valid_token
 from app.database import get_db
@@ -22,6 +25,11 @@ class GoogleAuthRequest(BaseModel):
 @router.post("/auth/google")
 async def google_auth(body: GoogleAuthRequest, request: Request, db: Session = Depends(get_db)):
     """Googleログイン (IDトークン検証)"""
+    # 証明書の取得・DB・トークン確認はどれも同期なので、専用枠のスレッドで
+    return await run_blocking(_google_auth, body, request, db)
+
+
+def _google_auth(body: GoogleAuthRequest, request: Request, db: Session) -> JSONResponse:
     try:
         if not GOOGLE_CLIENT_ID:
             raise RuntimeError("GOOGLE_CLIENT_ID が設定されていません")
@@ -46,10 +54,8 @@ async def google_auth(body: GoogleAuthRequest, request: Request, db: Session = D
             db.commit()
             db.refresh(user)
 
-        # セッションに保存
-        request.session["google_id"] = google_sub
-        request.session["email"] = user.email
-        request.session["name"] = user.name
+        # セッションに保存（user_id も入れておき、以降のリクエストで DB を引かない）
+        login_session(request, user)
 
         gmail_authorized = has_valid_token(user.id)
 
@@ -88,6 +94,7 @@ async def logout(request: Request):
 @router.get("/user")
 async def get_user(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),  # ✅ 追加
 ):
     """現在ログイン中のユーザー情報を取得"""
@@ -95,20 +102,35 @@ async def get_user(
     if "google_id" not in session:
         raise HTTPException(status_code=401, detail="未ログイン")
 
-    google_sub = session["google_id"]
-
-    # ✅ google_sub から user を取得
-    user = db.query(User).filter(User.google_sub == google_sub).first()
-    if not user:
+    # ✅ ログイン時にセッションへ入れた user_id / email / name を使う
+    # （has_valid_token はトークン更新で Google に行くことがあるので、まとめて専用枠のスレッドで）
+    user_id, gmail_authorized, data_version = await run_blocking(_user_state, request, db)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # ✅ user.id を渡す
-    gmail_authorized = has_valid_token(user.id)
+    # ✅ 変わっていなければ 304（data_version を 1 回引くだけ）
+    etag = make_etag(
+        "user", user_id, data_version,
+        gmail_authorized, session.get("email"), session.get("name"),
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    set_etag(response, etag)
 
     return {
-        "id": user.id,
-        "google_sub": user.google_sub,
-        "email": user.email,
-        "name": user.name,
+        "id": user_id,
+        "google_sub": session["google_id"],
+        "email": session.get("email"),
+        "name": session.get("name"),
         "gmail_authorized": gmail_authorized,
-    }
\ No newline at end of file
+    }
+
+
+def _user_state(request: Request, db: Session) -> tuple[int | None, bool, int]:
+    """(user_id, Gmail 連携済みか, data_version)"""
+    user_id = session_user_id(request, db)
+    if user_id is None:
+        return None, False, 0
+    # ✅ user.id を渡す
+    return user_id, has_valid_token(user_id), get_data_version(db, user_id)
@@ -0,0 +1,27 @@
+# backend/app/api/emails.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user_id
+from app.database import get_db
+from app.schemas.email import EmailSearchPage
+from app.services.email_search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_emails
+
+router = APIRouter(prefix="/emails", tags=["emails"])
+
+
+@router.get("/search", response_model=EmailSearchPage)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0, le=10_000),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    保存済みメールを全文検索する（Gmail には問い合わせない）。
+    関連度順（件名の一致を重く数える）。続きは next_offset を offset に渡す。
+    """
+    hits = search_emails(db, user_id, q, limit=limit + 1, offset=offset)
+    next_offset = offset + limit if len(hits) > limit else None
+    return {"items": hits[:limit], "next_offset": next_offset}
@@ -3,49 +3,104 @@ from __future__ import annotations
 
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_user_id
+from app.core.etag import bump_data_version, get_data_version, make_etag, not_modified, set_etag
 from app.database import get_db
-from app.schemas.event import EventRead, EventUpdate  # ★ EventUpdate を追加で用意してね
+from app.schemas.event import EventPage, EventRead, EventUpdate  # ★ EventUpdate を追加で用意してね
+from app.schemas.sync_job import SyncJobRead, SyncJobStatus
 from app.models.event import Event
-from app.services.gmail_sync import sync_gmail_messages
+from app.services.event_pages import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    list_events_page,
+)
+from app.services.sync_jobs import changed_event_ids, enqueue_sync_job, get_sync_job
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 JST = ZoneInfo("Asia/Tokyo")
 
 
-@router.post("/sync", response_model=List[EventRead])
+@router.post("/sync", response_model=SyncJobRead, status_code=202)
 def sync_events(
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ):
     """
-    Gmail からメールを同期して events を更新し、その一覧を返す
+    Gmail 同期ジョブを積んでジョブ情報を返す（実行はバックグラウンド）。
+    同じユーザーの同期が実行中ならそのジョブを返す。
     """
-    events = sync_gmail_messages(db, user_id)
-    return events
+    return enqueue_sync_job(db, user_id)
 
 
-@router.get("/", response_model=List[EventRead])
+@router.get("/sync/{job_id}", response_model=SyncJobStatus)
+def get_sync_status(
+    job_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    同期ジョブの状態と進捗（fetched / parsed / events_created）を返す。
+    終わったジョブは、この同期で作成/更新した events だけを (start_at, id) 順に返す
+    （多ければ next_cursor を cursor に渡して続きを取る）。
+    """
+    job = get_sync_job(db, user_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+
+    try:
+        events, next_cursor = list_events_page(
+            db, user_id, limit=limit, cursor=cursor, event_ids=changed_event_ids(job)
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        **SyncJobRead.model_validate(job).model_dump(),
+        "changed_events": events,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/", response_model=EventPage)
 def list_events(
+    request: Request,
+    response: Response,
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ):
     """
-    現在登録されている予定一覧を返す
+    予定一覧を start_at 順に 1 ページ分返す
+    - from / to: start_at の範囲（from 以上 to 未満）
+    - cursor: 前ページの next_cursor（続きが無ければ next_cursor は null）
+
+    ETag はユーザーの data_version + クエリ文字列。If-None-Match が一致すれば
+    events を読まずに 304 を返す。
     """
-    events = (
-        db.query(Event)
-        .filter(Event.user_id == user_id)
-        .order_by(Event.start_at)
-        .all()
-    )
-    return events
+    etag = make_etag("events", user_id, get_data_version(db, user_id), request.url.query)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    try:
+        events, next_cursor = list_events_page(
+            db, user_id, date_from=date_from, date_to=date_to, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, etag)
+    return {"items": events, "next_cursor": next_cursor}
 
 
 @router.get("/{event_id}", response_model=EventRead)
@@ -98,6 +153,7 @@ def update_event(
     # updated_at 更新
     ev.updated_at = datetime.now(JST)
 
+    bump_data_version(db, user_id)
     db.commit()
     db.refresh(ev)
     return ev
@@ -121,6 +177,7 @@ def delete_event(
         raise HTTPException(status_code=404, detail="Event not found")
 
     db.delete(ev)
+    bump_data_version(db, user_id)
     db.commit()
     return {"ok": True}
 
@@ -1,16 +1,19 @@
 # backend/app/api/gmail.py
 
 from datetime import datetime, timezone
-from email.utils import parsedate_to_datetime
+import hmac
 import re
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from starlette.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
-from app.core.settings import FRONTEND_BASE_URL
+from app.core.blocking import run_blocking
+from app.core.settings import FRONTEND_BASE_URL, GMAIL_PUSH_TOKEN
 from app.core.deps import get_current_user_id
+from app.core.etag import bump_data_version
+from app.core.identity import session_user_id
 from app.creds import get_authorization_url, fetch_token, has_valid_token
 from app.gmail_service import get_emails
 from app.database import get_db
@@ -18,9 +21,23 @@ from app.models.user import User
 from app.models.email import Email
 from app.models.event import Event
 from app.schemas.event import EventRead
+from app.schemas.gmail_push import PubSubPushEnvelope
+from app.schemas.gmail_sync import GmailSyncSettingsRead, GmailSyncSettingsUpdate
+from app.services.gmail_push import handle_push
+from app.services.gmail_sync import _upsert_emails, get_sync_state
+from app.services.recruiting import (
+    dump_list,
+    label_ids_for,
+    query_for,
+    sender_allowlist_for,
+)
+from app.services.sync_leases import acquire_lease, keeper, release_lease
 
 router = APIRouter(tags=["gmail"])
 
+# GET /api/gmail（ダッシュボード表示）で返す本文の長さ
+DASHBOARD_BODY_CHARS = 1000
+
 
 # ============================
 # Gmail 認証フロー
@@ -49,19 +66,19 @@ async def gmail_callback(
             url=f"{FRONTEND_BASE_URL}/?error=not_logged_in"
         )
 
-    google_sub = session["google_id"]
-
-    user = db.query(User).filter(User.google_sub == google_sub).first()
-    if not user:
+    # トークン交換は Google への HTTP なので、イベントループを止めないよう専用枠のスレッドで
+    user_id = await run_blocking(session_user_id, request, db)
+    if user_id is None:
         return RedirectResponse(
             url=f"{FRONTEND_BASE_URL}/dashboard?gmail_auth=user_not_found"
         )
 
     authorization_response = str(request.url)
 
-    fetch_token(
+    await run_blocking(
+        fetch_token,
         authorization_response=authorization_response,
-        user_id=user.id,
+        user_id=user_id,
         db=db
     )
 
@@ -70,6 +87,79 @@ async def gmail_callback(
     )
 
 
+# ============================
+# プッシュ通知（users.watch → Pub/Sub の push サブスクリプション）
+# ============================
+
+@router.post("/gmail/push", status_code=204)
+def gmail_push(
+    envelope: PubSubPushEnvelope,
+    token: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Pub/Sub から届く Gmail の変更通知。そのユーザーの差分同期を（まとめてから）積む。
+    認可はサブスクリプションのエンドポイントに付けた ?token=（GMAIL_PUSH_TOKEN）。
+    中身が読めない・知らないアドレスの通知も 204 で受け取る（エラーを返すと Pub/Sub が送り直し続ける）
+    """
+    if not GMAIL_PUSH_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token.encode(), GMAIL_PUSH_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="invalid push token")
+
+    handle_push(db, envelope.message.data)
+    return Response(status_code=204)
+
+
+# ============================
+# 同期の絞り込み設定（messages.list の q / labelIds）
+# ============================
+
+def _sync_settings(state) -> GmailSyncSettingsRead:
+    return GmailSyncSettingsRead(
+        gmail_query=state.gmail_query,
+        label_ids=label_ids_for(state),
+        sender_allowlist=sender_allowlist_for(state),
+        effective_query=query_for(state),
+        fetched_total=state.fetched_total or 0,
+        matched_total=state.matched_total or 0,
+        match_ratio=(state.matched_total / state.fetched_total) if state.fetched_total else None,
+    )
+
+
+@router.get("/gmail/sync-settings", response_model=GmailSyncSettingsRead)
+def get_sync_settings(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """同期で使う Gmail の検索条件と、取得数に対する event 化できた割合を返す"""
+    return _sync_settings(get_sync_state(db, user_id))
+
+
+@router.put("/gmail/sync-settings", response_model=GmailSyncSettingsRead)
+def update_sync_settings(
+    payload: GmailSyncSettingsUpdate,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """
+    同期で使う Gmail の検索条件を変更する。
+    条件が変わったら、次回の同期は新しい条件でフル同期し直す。
+    """
+    state = get_sync_state(db, user_id)
+    before = (state.gmail_query, state.label_ids, state.sender_allowlist)
+
+    state.gmail_query = (payload.gmail_query or "").strip() or None
+    state.label_ids = dump_list(payload.label_ids)
+    state.sender_allowlist = dump_list(payload.sender_allowlist)
+
+    if (state.gmail_query, state.label_ids, state.sender_allowlist) != before:
+        # 差分同期（history）は前の条件で取った続きなので捨てる
+        state.history_id = None
+    db.commit()
+    return _sync_settings(state)
+
+
 # ============================
 # 生の Gmail メール取得（ダッシュボード表示用）
 # ============================
@@ -77,14 +167,18 @@ async def gmail_callback(
 @router.get("/gmail")
 async def get_gmail_data(user_id: int = Depends(get_current_user_id)):
     """ログインユーザーのGmailを直接取得して返す（DBには保存しない）"""
-    if not has_valid_token(user_id):
+    if not await run_blocking(has_valid_token, user_id):
         raise HTTPException(
             status_code=401,
             detail={"error": "Gmail認証が必要です", "needs_auth": True},
         )
 
     try:
-        emails = get_emails(user_id, max_results=10)
+        emails = await run_blocking(get_emails, user_id, max_results=10)
+        # 保存用には全文を取るが、画面に送るのは先頭だけ
+        for email in emails:
+            if email["body"]:
+                email["body"] = email["body"][:DASHBOARD_BODY_CHARS]
         return {"emails": emails}
     except Exception as e:
         import traceback
@@ -99,16 +193,6 @@ async def get_gmail_data(user_id: int = Depends(get_current_user_id)):
 # ヘルパ（DB 保存／Event 自動生成 用）
 # ============================
 
-def _parse_received_at(header_date: str | None) -> datetime | None:
-    if not header_date:
-        return None
-    try:
-        dt = parsedate_to_datetime(header_date)
-        return dt
-    except Exception:
-        return None
-
-
 def _infer_event_type(subject: str | None) -> str:
     """件名からイベントタイプを推測"""
     if not subject:
@@ -180,7 +264,12 @@ async def import_gmail(
     """
     Gmail からメールを取得して DB（emails/events）に保存し、
     自動生成された Event の一覧を返す。
+    （Gmail API も DB も同期なので、丸ごと専用枠のスレッドで動かす）
     """
+    return await run_blocking(_import_gmail, db, user_id)
+
+
+def _import_gmail(db: Session, user_id: int) -> dict:
     print("=== /api/gmail/import called ===")
     print(f"  user_id: {user_id}")
 
@@ -191,43 +280,54 @@ async def import_gmail(
     
     print(f"  DB user.id = {user.id}, email = {user.email}")
 
-    # Gmail API から実際のメールを取得
-    messages = get_emails(user_id, max_results=20)
+    # 同期ジョブ（定期・プッシュ）と同じユーザーのメールを同時に書かないよう、同期のリースを取ってから取り込む
+    if not acquire_lease(db, user.id, None):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="同期中です。終わってからもう一度お試しください")
+    db.commit()
+    lease = keeper.hold(user.id, None)
+    try:
+        result = _import_messages(db, user)
+        lease.check()
+        release_lease(db, user.id, None)
+        db.commit()
+    except Exception:
+        db.rollback()
+        release_lease(db, user.id, None)
+        db.commit()
+        raise
+    finally:
+        keeper.drop(lease)
+
+    print(f"=== DONE: imported_emails={result['imported_emails']}, new_events={len(result['new_events'])} ===")
+    return result
+
+
+def _import_messages(db: Session, user: User) -> dict:
+    """リースを持った状態で Gmail から取得して保存する（commit は呼び出し側）"""
+    # Gmail API から実際のメールを取得（就活メールの検索条件で絞る）
+    state = get_sync_state(db, user.id)
+    messages = get_emails(
+        user.id,
+        max_results=20,
+        query=query_for(state),
+        label_ids=label_ids_for(state),
+    )
     print(f"  Gmail messages fetched: {len(messages)}")
 
-    imported_emails = 0
-    new_events: List[Event] = []
-
-    for idx, m in enumerate(messages):
-        gmail_id = m["id"]
-        subject = m.get("subject", "(no subject)")
-        print(f"--- message #{idx}: {subject[:50]}... ---")
-
-        # すでに取り込み済みならスキップ
-        exists = (
-            db.query(Email)
-            .filter(Email.user_id == user.id, Email.gmail_message_id == gmail_id)
-            .first()
-        )
-        if exists:
-            print(f"  -> already exists (email.id={exists.id}), skip")
-            continue
-
-        email_obj = Email(
-            user_id=user.id,
-            gmail_message_id=gmail_id,
-            from_address=m.get("from"),
-            subject=m.get("subject"),
-            snippet=m.get("snippet"),
-            body_plain=m.get("body"),
-            received_at=_parse_received_at(m.get("date")),
-            processing_status="queued",
-        )
-        db.add(email_obj)
-        db.flush()
-        print(f"  -> inserted Email.id={email_obj.id}")
+    # 取り込み済みのメール（新しく入ったものだけイベントを作る）
+    existing = {
+        gmail_id
+        for (gmail_id,) in db.query(Email.gmail_message_id)
+        .filter(Email.user_id == user.id, Email.gmail_message_id.in_([m["id"] for m in messages]))
+        .all()
+    }
 
-        imported_emails += 1
+    # 保存は同期と同じ _upsert_emails（ON CONFLICT で重複を無視し、新しいメールは全文検索の索引にも足す）
+    new_emails = [e for e in _upsert_emails(db, user.id, messages) if e.gmail_message_id not in existing]
+    new_events: List[Event] = []
+    for email_obj in new_emails:
+        print(f"  -> inserted Email.id={email_obj.id}: {(email_obj.subject or '')[:50]}")
 
         # イベント自動生成（面接・説明会のみ）
         ev = _make_event_from_email(email_obj)
@@ -236,10 +336,12 @@ async def import_gmail(
             new_events.append(ev)
             print(f"  -> created Event: {ev.event_type} - {ev.company_name}")
 
-    db.commit()
-    print(f"=== DONE: imported_emails={imported_emails}, new_events={len(new_events)} ===")
+    # ETag（/api/events・/api/user）は events が増えたときだけ変える
+    if new_events:
+        bump_data_version(db, user.id)
+    db.flush()
 
     return {
-        "imported_emails": imported_emails,
-        "new_events": [EventRead.from_orm(ev) for ev in new_events],
-    }
\ No newline at end of file
+        "imported_emails": len(new_emails),
+        "new_events": [EventRead.model_validate(ev) for ev in new_events],
+    }
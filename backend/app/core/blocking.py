@@ -0,0 +1,49 @@
+# backend/app/core/blocking.py
+"""
+async ルートから同期の処理（httplib2 の Gmail API・google-auth のトークン検証/更新・同期 SQLAlchemy）を
+呼ぶときは run_blocking() を通す。イベントループで直接呼ぶと、1 本の遅い Gmail 呼び出しで
+同じワーカーの全リクエストが止まる。
+
+- 専用の CapacityLimiter（BLOCKING_IO_THREADS 本）で同時実行数を抑える
+  （def ルートが使う既定のスレッドプール 40 本とは別枠なので、取り込みが溜まっても /api/events は動く）
+- 枠が空くまでの待ちはイベントループ上で await するだけ（スレッドは増えない）
+"""
+from functools import partial
+from typing import Callable, TypeVar
+
+import anyio
+from anyio import to_thread
+
+from app.core.metrics import CallbackMetric
+from app.core.settings import BLOCKING_IO_THREADS
+
+T = TypeVar("T")
+
+_limiter: anyio.CapacityLimiter | None = None
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(BLOCKING_IO_THREADS)
+    return _limiter
+
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """fn(*args, **kwargs) を専用枠のスレッドで実行して結果を返す（例外もそのまま上がる）"""
+    return await to_thread.run_sync(partial(fn, *args, **kwargs), limiter=_get_limiter())
+
+
+def blocking_stats() -> dict:
+    limiter = _get_limiter()
+    return {
+        "busy": limiter.borrowed_tokens,
+        "waiting": limiter.statistics().tasks_waiting,
+        "limit": limiter.total_tokens,
+    }
+
+
+CallbackMetric(
+    "blocking_io_threads", "run_blocking の専用枠（busy: 実行中 / waiting: 空き待ち / limit: 上限）",
+    blocking_stats, ["state"],
+)
@@ -0,0 +1,54 @@
+# backend/app/core/db_timing.py
+"""
+SQL の実行時間を「このスレッドで今やっている処理」単位で合計する
+
+    with track_db_time() as db_time:
+        ...  # この間にこのスレッドで実行した SQL の時間と回数が db_time に入る
+
+計測中でないスレッドでは、イベントは thread-local を 1 回見るだけで何もしない。
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+
+@dataclass
+class DbTime:
+    seconds: float = 0.0
+    queries: int = 0
+
+
+@contextmanager
+def track_db_time():
+    outer = getattr(_local, "current", None)
+    current = _local.current = DbTime()
+    try:
+        yield current
+    finally:
+        _local.current = outer
+        if outer is not None:
+            # 入れ子なら外側にも足す
+            outer.seconds += current.seconds
+            outer.queries += current.queries
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "current", None) is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = getattr(_local, "current", None)
+    starts = conn.info.get("query_start")
+    if current is None or not starts:
+        return
+    current.seconds += time.perf_counter() - starts.pop()
+    current.queries += 1
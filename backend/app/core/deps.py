@@ -1,21 +1,23 @@
 from fastapi import HTTPException, Request, Depends
 from sqlalchemy.orm import Session
 
+from app.core.identity import session_user_id
 from app.database import get_db
-from app.models.user import User
 
 
 def get_current_user_id(
     request: Request,
     db: Session = Depends(get_db),
 ) -> int:
-    """セッションから現在のユーザーの DB user.id を返す"""
-    google_sub = request.session.get("google_id")
-    if not google_sub:
+    """
+    セッションから現在のユーザーの DB user.id を返す
+    （ログイン時にセッションへ入れた user_id を使うので、DB を引くのは USER_ID_CACHE_TTL_SECONDS ごとの存在確認だけ）
+    """
+    if not request.session.get("google_id"):
         raise HTTPException(status_code=401, detail="未ログイン")
 
-    user = db.query(User).filter(User.google_sub == google_sub).first()
-    if not user:
+    user_id = session_user_id(request, db)
+    if user_id is None:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user.id   # ✅ Integer
+    return user_id   # ✅ Integer
@@ -0,0 +1,72 @@
+# backend/app/core/etag.py
+"""
+ユーザー単位の変更バージョン（users.data_version）と ETag / 条件付き GET
+
+- events を変える処理（編集・削除・Gmail 取込・同期）は bump_data_version() で +1 する
+  （呼び出し側の commit と同じトランザクションで書く）
+- GET 側は data_version だけを引いて ETag を作り、If-None-Match が一致すれば
+  一覧を読まずに 304 を返す
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+# ブラウザにはキャッシュさせるが、使う前に毎回 ETag で確認させる
+CACHE_CONTROL = "private, no-cache"
+
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    """ユーザーのデータが変わったことを記録する（commit は呼び出し側）"""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+    )
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    return db.query(User.data_version).filter(User.id == user_id).scalar() or 0
+
+
+def make_etag(kind: str, user_id: int, version: int, *variant) -> str:
+    """
+    kind: どのリソースか（"events" など）
+    variant: 同じバージョンでも中身が変わるもの（クエリ文字列など）
+    """
+    tag = f"{kind}-{user_id}-{version}"
+    if variant:
+        digest = hashlib.sha1(repr(variant).encode("utf-8")).hexdigest()[:12]
+        tag = f"{tag}-{digest}"
+    return f'W/"{tag}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 弱い比較（W/ の有無は無視）
+    wanted = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == wanted
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """If-None-Match が etag と一致すれば 304 のレスポンスを返す（違えば None）"""
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+    return None
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,175 @@
+# backend/app/core/identity.py
+"""
+セッション → users.id の解決
+
+- ログイン時に users.id を署名付きセッションに入れておく（以降のリクエストは DB を引かない）
+- user_id を持っていない古いセッションは google_sub → users.id の LRU キャッシュで解決し、
+  解決できたらセッションに書き戻す
+- User が削除されたら（commit 時に）キャッシュから外し、そのユーザーのセッションも通さない
+- 削除の通知はプロセス内だけなので、ほかのプロセス（別ワーカー・run_scheduler）で削除された分のために
+  キャッシュには TTL（USER_ID_CACHE_TTL_SECONDS）を付け、セッションの user_id も TTL ごとに 1 回 DB で存在を確かめる
+"""
+from collections import OrderedDict
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.settings import USER_ID_CACHE_SIZE, USER_ID_CACHE_TTL_SECONDS
+from app.models.user import User
+
+
+class LruCache:
+    """スレッドセーフな上限つき LRU（ヒット率などの統計つき）。ttl（秒）を渡すと古い値は無いものとして扱う"""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _live(self, key):
+        """期限内の値（無い・期限切れなら None。期限切れはここで捨てる）。ロックを持って呼ぶ"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            value = self._live(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._live(key) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# google_sub → users.id
+_user_ids = LruCache(USER_ID_CACHE_SIZE, ttl=USER_ID_CACHE_TTL_SECONDS)
+# DB にあることを確かめた users.id（TTL の間はセッションの user_id をそのまま通す）
+_live_user_ids = LruCache(USER_ID_CACHE_SIZE, ttl=USER_ID_CACHE_TTL_SECONDS)
+# このプロセスで削除された users.id（セッションに残っていても通さない）
+_deleted_user_ids = LruCache(USER_ID_CACHE_SIZE)
+
+
+def identity_cache_stats() -> dict:
+    return _user_ids.stats()
+
+
+def resolve_user_id(db: Session, google_sub: str) -> int | None:
+    """google_sub から users.id を引く（キャッシュ優先）"""
+    user_id = _user_ids.get(google_sub)
+    if user_id is not None:
+        return user_id
+
+    user_id = db.query(User.id).filter(User.google_sub == google_sub).scalar()
+    if user_id is not None:
+        _user_ids.put(google_sub, user_id)
+    return user_id
+
+
+def login_session(request: Request, user: User) -> None:
+    """ログイン成功時にセッションへユーザー情報を保存する"""
+    request.session["google_id"] = user.google_sub
+    request.session["user_id"] = user.id
+    request.session["email"] = user.email
+    request.session["name"] = user.name
+    _user_ids.put(user.google_sub, user.id)
+    _live_user_ids.put(user.id, True)
+    _deleted_user_ids.discard(user.id)
+
+
+def session_user_id(request: Request, db: Session) -> int | None:
+    """
+    セッションのユーザーの users.id を返す。
+    未ログイン、またはユーザーが存在しなければ None。
+    """
+    session = request.session
+    google_sub = session.get("google_id")
+    if not google_sub:
+        return None
+
+    user_id = session.get("user_id")
+    if isinstance(user_id, int):
+        if user_id in _deleted_user_ids:
+            return None
+        if _live_user_ids.get(user_id) is None:
+            # TTL が切れたら DB で確かめ直す（ほかのプロセスで削除されていたら通さない）
+            if db.query(User.id).filter(User.id == user_id).scalar() is None:
+                _deleted_user_ids.put(user_id, True)
+                return None
+            _live_user_ids.put(user_id, True)
+        return user_id
+
+    # user_id を持たない古いセッション → 解決してセッションに書き戻す
+    user_id = resolve_user_id(db, google_sub)
+    if user_id is not None:
+        session["user_id"] = user_id
+    return user_id
+
+
+# ============================
+# User 削除時のキャッシュ破棄
+# ============================
+
+@event.listens_for(User, "after_delete")
+def _stash_deleted_user(mapper, connection, target: User) -> None:
+    # rollback されるかもしれないので、ここでは Session に積むだけ
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("deleted_users", []).append((target.google_sub, target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_deleted_users(session: Session) -> None:
+    for google_sub, user_id in session.info.pop("deleted_users", ()):
+        _user_ids.discard(google_sub)
+        _live_user_ids.discard(user_id)
+        _deleted_user_ids.put(user_id, True)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_deleted_users(session: Session, previous_transaction) -> None:
+    session.info.pop("deleted_users", None)
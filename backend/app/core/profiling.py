@@ -0,0 +1,250 @@
+# backend/app/core/profiling.py
+"""
+本番で遅いリクエスト・同期ジョブの中身を見るためのプロファイラ
+
+- リクエスト: SamplingProfiler でプロセス内の全スレッドのスタックを一定間隔で取り、
+  flamegraph.pl / speedscope で読める folded 形式（.folded）で保存する
+  （同期の def エンドポイントはスレッドプールで動くので、ミドルウェアのスレッドだけ見る cProfile では取れない）
+- 同期ジョブ: プロファイル対象のリクエストが積んだジョブ（と PROFILING_SAMPLE_RATE で当たったジョブ）を
+  ワーカースレッド内で cProfile し、pstats 形式（.pstats）で保存する
+  （POST /api/events/sync は 202 ですぐ返るので、時間がかかっているのはジョブ側）
+
+PROFILING_ENABLED=0 のときは main.py がミドルウェアを登録しないので、何もしない。
+ジョブの印はプロセス内のメモリに置くので、別プロセスのワーカーが拾ったジョブはサンプリング分しか取れない。
+"""
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from app.core.settings import (
+    PROFILE_DIR,
+    PROFILE_KEEP,
+    PROFILING_ADMIN_TOKEN,
+    PROFILING_ENABLED,
+    PROFILING_SAMPLE_RATE,
+)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# サンプリング間隔（秒）
+SAMPLE_INTERVAL = 0.005
+
+PROFILE_SUFFIXES = (".folded", ".pstats")
+_NAME_RE = re.compile(r"^[0-9A-Za-z_.\-]+$")
+
+# この葉で止まっているスタックは待ち状態なので数えない
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+}
+
+# 今のリクエストがプロファイル中か（スレッドプールにもコンテキストごと引き継がれる）
+_profiling_request: ContextVar[bool] = ContextVar("profiling_request", default=False)
+_profiled_jobs: set[int] = set()
+_profiled_jobs_lock = threading.Lock()
+
+
+# ============================
+# 判定
+# ============================
+
+def is_admin_token(token: str | None) -> bool:
+    if not PROFILING_ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILING_ADMIN_TOKEN.encode())
+
+
+def should_profile(token: str | None) -> bool:
+    """管理用トークン付き、またはサンプリングに当たったリクエストをプロファイルする"""
+    if is_admin_token(token):
+        return True
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+
+# ============================
+# サンプリングプロファイラ
+# ============================
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    別スレッドから sys._current_frames() を一定間隔で覗いてスタックを数える
+    （対象スレッドには何も仕掛けないので、止めている間のコストは 0、動いている間もほぼ一定）
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: _Counter[str] = _Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._sample(me)
+            if self._stop.wait(self.interval):
+                break
+
+    def _sample(self, me: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """flamegraph.pl / speedscope にそのまま渡せる "a;b;c 回数" の行"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ============================
+# 保存
+# ============================
+
+def _profile_name(label: str, seconds: float, suffix: str) -> str:
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S-%f")
+    slug = re.sub(r"[^0-9A-Za-z]+", "-", label).strip("-")[:60] or "root"
+    return f"{stamp}_{slug}_{seconds:.3f}s{suffix}"
+
+
+def _prune() -> None:
+    paths = sorted(
+        (os.path.join(PROFILE_DIR, n) for n in os.listdir(PROFILE_DIR) if n.endswith(PROFILE_SUFFIXES)),
+        key=os.path.getmtime,
+    )
+    for path in paths[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _save(name: str, write) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    write(os.path.join(PROFILE_DIR, name))
+    _prune()
+    return name
+
+
+def list_profiles() -> list[dict]:
+    """保存済みのプロファイル（新しい順）"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith(PROFILE_SUFFIXES):
+            continue
+        st = os.stat(os.path.join(PROFILE_DIR, name))
+        profiles.append({
+            "name": name,
+            "format": "pstats" if name.endswith(".pstats") else "folded",
+            "size": st.st_size,
+            "created_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
+        })
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(name: str) -> str | None:
+    """ダウンロード用のパス（名前が不正・存在しなければ None）"""
+    if not _NAME_RE.match(name) or not name.endswith(PROFILE_SUFFIXES):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+# ============================
+# リクエスト・ジョブ
+# ============================
+
+@contextmanager
+def profile_request(label: str):
+    """
+    with の間をサンプリングして .folded で保存する。
+    yield した dict の "name" に保存したファイル名が入る（レスポンスヘッダ用）
+    """
+    result: dict = {"name": None}
+    profiler = SamplingProfiler()
+    token = _profiling_request.set(True)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield result
+    finally:
+        profiler.stop()
+        _profiling_request.reset(token)
+        seconds = time.perf_counter() - started
+        folded = profiler.folded()
+
+        def _write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(folded)
+
+        result["name"] = _save(_profile_name(label, seconds, ".folded"), _write)
+
+
+def mark_job_for_profiling(job_id: int) -> None:
+    """プロファイル中のリクエストが積んだジョブなら、実行時に cProfile する印を付ける"""
+    if PROFILING_ENABLED and _profiling_request.get():
+        with _profiled_jobs_lock:
+            _profiled_jobs.add(job_id)
+
+
+@contextmanager
+def maybe_profile_job(job_id: int):
+    """印の付いた（またはサンプリングに当たった）ジョブを cProfile して .pstats で保存する"""
+    if not PROFILING_ENABLED:
+        yield
+        return
+    with _profiled_jobs_lock:
+        marked = job_id in _profiled_jobs
+        _profiled_jobs.discard(job_id)
+    if not marked and not (PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - started
+        name = _save(_profile_name(f"sync-job-{job_id}", seconds, ".pstats"), profiler.dump_stats)
+        print(f"sync job {job_id}: profile saved to {name}")
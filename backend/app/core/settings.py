@@ -8,3 +8,80 @@ GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "dev-secret-key")
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
+
+# Gmail API の向き先（空なら本物の https://gmail.googleapis.com/）
+# ローカルの偽サーバーで同期を試すとき: GMAIL_API_ROOT=http://127.0.0.1:8765/（benchmarks/fake_gmail.py）
+GMAIL_API_ROOT = os.getenv("GMAIL_API_ROOT", "")
+
+# Gmail API: messages.get をまとめて送るバッチ 1 回あたりの件数（Gmail 推奨は 50 以下）
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+
+# 同期のメール取得を 2 段階にする（全件 format=metadata → 就活メールっぽいものだけ本文まで取る）
+GMAIL_TWO_PHASE_FETCH = os.getenv("GMAIL_TWO_PHASE_FETCH", "1") not in ("0", "false", "False")
+
+# 同期ジョブを処理するワーカースレッド数（プロセスごと）
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "2"))
+# running のまま これ以上経ったジョブは死んだものとみなす（秒）
+SYNC_JOB_STALE_SECONDS = int(os.getenv("SYNC_JOB_STALE_SECONDS", "900"))
+
+# Gmail の Credentials キャッシュ: アクセストークン期限のこの秒数前から裏で refresh する
+CREDENTIALS_REFRESH_AHEAD_SECONDS = int(os.getenv("CREDENTIALS_REFRESH_AHEAD_SECONDS", "300"))
+
+# google_sub → users.id の LRU キャッシュの最大件数（プロセスごと）
+USER_ID_CACHE_SIZE = int(os.getenv("USER_ID_CACHE_SIZE", "10000"))
+# そのキャッシュと「存在を確かめた users.id」を信じる秒数。ほかのプロセスで削除されたユーザーは、遅くともこの秒数で弾かれる
+USER_ID_CACHE_TTL_SECONDS = float(os.getenv("USER_ID_CACHE_TTL_SECONDS", "60"))
+
+# リクエストのプロファイリング（app/core/profiling.py）。0 ならミドルウェア自体を登録しない
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") in ("1", "true", "True")
+# X-Profile-Token ヘッダにこの値を付けたリクエストをプロファイルする（/api/admin/profiles もこれで認可）
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+# ヘッダ無しのリクエスト・同期ジョブもこの割合でプロファイルする（0.0〜1.0）
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+# プロファイルの保存先と、残しておく件数
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+# /metrics（Prometheus）の認可。Authorization: Bearer <この値> を付けたときだけ返す
+# 空なら /metrics 自体を登録しない（Prometheus 側は authorization.credentials に同じ値を書く）
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# async ルートから Gmail / Google への同期処理（httplib2・トークン更新・同期 DB）を流すスレッド数の上限
+# （FastAPI の def ルート用スレッドプールとは別枠。取り込みが詰まっても他の API を巻き込まない）
+BLOCKING_IO_THREADS = int(os.getenv("BLOCKING_IO_THREADS", "8"))
+
+# Gmail API のクォータ（app/gmail_quota.py）。単位は Gmail の quota unit / 秒
+# ユーザーごと（Gmail の上限は 250）と、このプロセス全体（プロジェクト上限 ÷ プロセス数くらいにする）
+GMAIL_USER_QUOTA_PER_SEC = float(os.getenv("GMAIL_USER_QUOTA_PER_SEC", "250"))
+GMAIL_PROJECT_QUOTA_PER_SEC = float(os.getenv("GMAIL_PROJECT_QUOTA_PER_SEC", "20000"))
+# 裏の同期（background）はバケットのこの割合を残して待つ（画面からの呼び出し用の空き）
+GMAIL_BACKGROUND_HEADROOM = float(os.getenv("GMAIL_BACKGROUND_HEADROOM", "0.2"))
+# 429 / rateLimitExceeded / 5xx をやり直す回数と、待ち時間（指数バックオフ + ジッター）の底・上限（秒）
+GMAIL_MAX_RETRIES = int(os.getenv("GMAIL_MAX_RETRIES", "5"))
+GMAIL_BACKOFF_BASE = float(os.getenv("GMAIL_BACKOFF_BASE", "0.5"))
+GMAIL_BACKOFF_MAX = float(os.getenv("GMAIL_BACKOFF_MAX", "32"))
+
+# 定期同期のスケジューラ（app/services/sync_scheduler.py）。1 なら lifespan で起動する
+# （python -m app.run_scheduler で Web とは別プロセスにもできる。そのときは Web 側は 0 にしておく）
+SYNC_SCHEDULER_ENABLED = os.getenv("SYNC_SCHEDULER_ENABLED", "0") in ("1", "true", "True")
+# due なユーザーを探す間隔（秒）
+SYNC_SCHEDULER_TICK_SECONDS = float(os.getenv("SYNC_SCHEDULER_TICK_SECONDS", "5"))
+# 同期間隔の下限・上限（秒）。就活メールが来たばかりのユーザーは下限、来ないほど上限に近づく
+SYNC_INTERVAL_MIN_SECONDS = int(os.getenv("SYNC_INTERVAL_MIN_SECONDS", "300"))
+SYNC_INTERVAL_MAX_SECONDS = int(os.getenv("SYNC_INTERVAL_MAX_SECONDS", "21600"))
+# スケジューラが同時に積んでおく同期ジョブの上限（ボタンからの同期が後ろで待たされすぎないように）
+SYNC_SCHEDULER_MAX_INFLIGHT = int(os.getenv("SYNC_SCHEDULER_MAX_INFLIGHT", str(SYNC_WORKERS * 2)))
+
+# 同期のリース（app/services/sync_leases.py）の有効期間（秒）。持ち主はこの 1/3 ごとに延ばす
+# ワーカーが落ちたら、最長この時間でほかのプロセスがそのユーザーを同期できるようになる
+SYNC_LEASE_TTL_SECONDS = float(os.getenv("SYNC_LEASE_TTL_SECONDS", "60"))
+
+# Gmail のプッシュ通知（users.watch → Cloud Pub/Sub の push → POST /api/gmail/push。app/services/gmail_push.py）
+# watch の通知先トピック（projects/<project>/topics/<topic>）。空なら watch を張らない（定期同期だけ）
+GMAIL_PUSH_TOPIC = os.getenv("GMAIL_PUSH_TOPIC", "")
+# push サブスクリプションのエンドポイントに付ける ?token= の値。空なら /api/gmail/push は 404
+GMAIL_PUSH_TOKEN = os.getenv("GMAIL_PUSH_TOKEN", "")
+# 同じユーザーへの通知をまとめる時間（秒）。最初の通知からこの時間のあいだに来た通知は 1 回の同期にする
+GMAIL_PUSH_DEBOUNCE_SECONDS = float(os.getenv("GMAIL_PUSH_DEBOUNCE_SECONDS", "10"))
+# watch は 7 日で切れるので、期限のこの秒数前になったら張り直す
+GMAIL_WATCH_RENEW_BEFORE_SECONDS = int(os.getenv("GMAIL_WATCH_RENEW_BEFORE_SECONDS", "86400"))
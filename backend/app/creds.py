@@ -1,6 +1,9 @@
 # backend/app/creds.py
 import os
 import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from google_auth_oauthlib.flow import Flow
@@ -8,7 +11,10 @@ from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.core.etag import bump_data_version
+from app.core.settings import CREDENTIALS_REFRESH_AHEAD_SECONDS
 from app.models.gmail_token import GmailToken
 from app.database import SessionLocal
 
@@ -19,6 +25,9 @@ CLIENT_SECRET_FILE = BASE_DIR / "client_secret.json"
 
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
 
+# token refresh に使う HTTP トランスポート（テストでは偽のトークンエンドポイントに差し替える）
+token_request_factory = Request
+
 
 def get_flow(redirect_uri: str | None = None) -> Flow:
     """OAuth Flowを作成"""
@@ -59,12 +68,189 @@ def get_authorization_url():
     )
     return authorization_url, state
 
+# ============================
+# Credentials キャッシュ（プロセス内）
+# ============================
+#
+# user_id -> Credentials。アクセストークンの有効期限まで使い回すので、
+# 温まったリクエストでは DB も Google のトークンエンドポイントも触らない。
+# 期限の CREDENTIALS_REFRESH_AHEAD_SECONDS 秒前になったら裏で先に refresh しておく。
+# fetch_token / save_token_to_db で書き換えたら捨てる。
+
+_creds_cache: dict[int, Credentials] = {}
+_creds_cache_lock = threading.Lock()
+_refreshing: set[int] = set()
+# user_id -> [ロック, 使っている（待っている）スレッド数]。0 になったら消す（ユーザー数だけ溜まらないように）
+_refresh_locks: dict[int, list] = {}
+_cache_stats = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_ahead": 0, "invalidations": 0}
+
+
+def credentials_cache_stats() -> dict:
+    """キャッシュのヒット/ミス数など（監視用）"""
+    with _creds_cache_lock:
+        return {**_cache_stats, "size": len(_creds_cache)}
+
+
+def invalidate_credentials(user_id: int) -> None:
+    """user_id の Credentials をキャッシュから捨てる"""
+    with _creds_cache_lock:
+        if _creds_cache.pop(user_id, None) is not None:
+            _cache_stats["invalidations"] += 1
+
+
+def _cache_get(user_id: int) -> Credentials | None:
+    with _creds_cache_lock:
+        creds = _creds_cache.get(user_id)
+        if creds is not None and creds.valid:
+            _cache_stats["hits"] += 1
+            return creds
+        _cache_stats["misses"] += 1
+        return None
+
+
+def _cache_put(user_id: int, creds: Credentials) -> None:
+    with _creds_cache_lock:
+        _creds_cache[user_id] = creds
+
+
+def _needs_refresh_ahead(creds: Credentials) -> bool:
+    if creds.expiry is None or not creds.refresh_token:
+        return False
+    # Credentials.expiry は naive UTC
+    return creds.expiry - datetime.utcnow() < timedelta(seconds=CREDENTIALS_REFRESH_AHEAD_SECONDS)
+
+
+@contextmanager
+def _refresh_lock(user_id: int):
+    """user_id の refresh を 1 本にするロックを持つ（誰も使っていなければ抜けるときに消す）"""
+    with _creds_cache_lock:
+        entry = _refresh_locks.get(user_id)
+        if entry is None:
+            entry = _refresh_locks[user_id] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _creds_cache_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _refresh_locks[user_id]
+
+
+def _refresh_single_flight(user_id: int, stale: Credentials) -> Credentials:
+    """
+    stale を refresh した Credentials を返す（ユーザーごとに同時に 1 回だけ）
+
+    - プロセス内: ユーザーごとのロック。後から来た呼び出しは先行の refresh を待ち、
+      その結果（キャッシュ）をそのまま使う
+    - プロセス間: gmail_tokens の行を SELECT ... FOR UPDATE（Postgres）でロックし、
+      DB 側がもう新しい token になっていれば refresh しない。
+      行ロックの無い SQLite でも version 列で後勝ちの上書きを防ぎ、負けたら勝った方の token を使う
+    """
+    with _refresh_lock(user_id):
+        with _creds_cache_lock:
+            cached = _creds_cache.get(user_id)
+        if cached is not None and cached.token != stale.token and cached.valid:
+            # 待っている間に別スレッドが refresh 済み
+            return cached
+
+        db: Session = SessionLocal()
+        try:
+            token = (
+                db.query(GmailToken)
+                .filter(GmailToken.user_id == user_id)
+                .with_for_update()
+                .first()
+            )
+            if token is None:
+                raise RuntimeError("Gmail token not found")
+
+            current = Credentials.from_authorized_user_info(json.loads(token.token_json))
+            if current.token != stale.token and current.valid:
+                # 別プロセスが refresh 済み
+                db.rollback()
+                _cache_put(user_id, current)
+                return current
+
+            current.refresh(token_request_factory())
+            token.token_json = current.to_json()
+            try:
+                db.commit()
+            except StaleDataError:
+                # 行ロックが無い DB で別プロセスと競合 → 先に書いた方の token を使う
+                db.rollback()
+                winner = _load_from_db(user_id)
+                if winner is None or not winner.valid:
+                    raise
+                current = winner
+        finally:
+            db.close()
+
+        _cache_put(user_id, current)
+        with _creds_cache_lock:
+            _cache_stats["refreshes"] += 1
+        return current
+
+
+def _refresh_in_background(user_id: int, creds: Credentials) -> None:
+    """期限が近い Credentials を裏で refresh する（同じユーザーは 1 本だけ）"""
+    with _creds_cache_lock:
+        if user_id in _refreshing:
+            return
+        _refreshing.add(user_id)
+        _cache_stats["refresh_ahead"] += 1
+
+    def _run():
+        try:
+            _refresh_single_flight(user_id, creds)
+        except Exception as e:
+            # 失敗しても期限切れ時に同期で refresh されるので、ここでは記録だけ
+            print(f"refresh-ahead failed for user {user_id}: {e!r}")
+        finally:
+            with _creds_cache_lock:
+                _refreshing.discard(user_id)
+
+    threading.Thread(target=_run, name=f"creds-refresh-{user_id}", daemon=True).start()
+
+
+def _get_credentials(user_id: int) -> Credentials | None:
+    """
+    キャッシュ → DB の順で Credentials を返す
+    - 有効 → そのまま（期限が近ければ裏で refresh を始める）
+    - 期限切れ + refresh_token あり → その場で refresh
+    - token 無し → None
+    - それ以外（期限切れで refresh できない）→ 期限切れの Credentials
+    """
+    creds = _cache_get(user_id)
+    if creds is None:
+        creds = _load_from_db(user_id)
+        if creds is None:
+            return None
+
+        if creds.valid:
+            _cache_put(user_id, creds)
+        elif creds.expired and creds.refresh_token:
+            return _refresh_single_flight(user_id, creds)
+        else:
+            return creds
+
+    if _needs_refresh_ahead(creds):
+        _refresh_in_background(user_id, creds)
+    return creds
+
+
 # ============================
 # Token 保存・取得（DB）
 # ============================
 
 def save_token_to_db(user_id: int, token_json: str):
     """Gmail token を DB に保存（upsert）"""
+    _write_token_json(user_id, token_json)
+    invalidate_credentials(user_id)
+
+
+def _write_token_json(user_id: int, token_json: str):
     db: Session = SessionLocal()
     try:
         token = db.query(GmailToken).filter_by(user_id=user_id).first()
@@ -107,53 +293,43 @@ def fetch_token(
         )
         db.add(token)
 
+    # /api/user の gmail_authorized が変わる
+    bump_data_version(db, user_id)
     db.commit()
+    invalidate_credentials(user_id)
     return credentials
 
-def has_valid_token(user_id: int) -> bool:
-    """
-    DB に有効な Gmail token があるか確認
-    - 有効 → True
-    - 期限切れ + refresh_token あり → refresh して True
-    - それ以外 → False
-    """
+def _load_from_db(user_id: int) -> Credentials | None:
     db: Session = SessionLocal()
     try:
         token = db.query(GmailToken).filter_by(user_id=user_id).first()
         if not token:
-            return False
+            return None
 
-        creds = Credentials.from_authorized_user_info(
+        return Credentials.from_authorized_user_info(
             json.loads(token.token_json)
         )
-
-        if creds.valid:
-            return True
-
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            token.token_json = creds.to_json()
-            db.commit()
-            return True
-
-        return False
     finally:
         db.close()
 
 
+def has_valid_token(user_id: int) -> bool:
+    """
+    有効な Gmail token があるか確認（キャッシュ優先）
+    - 有効 → True
+    - 期限切れ + refresh_token あり → refresh して True
+    - それ以外 → False
+    """
+    creds = _get_credentials(user_id)
+    return creds is not None and creds.valid
+
+
 def load_credentials(user_id: int) -> Credentials:
     """
-    Gmail API 用の Credentials を DB から取得
+    Gmail API 用の Credentials を取得（キャッシュ優先）
     （gmail_service.py から利用）
     """
-    db: Session = SessionLocal()
-    try:
-        token = db.query(GmailToken).filter_by(user_id=user_id).first()
-        if not token:
-            raise RuntimeError("Gmail token not found")
-
-        return Credentials.from_authorized_user_info(
-            json.loads(token.token_json)
-        )
-    finally:
-        db.close()
\ No newline at end of file
+    creds = _get_credentials(user_id)
+    if creds is None:
+        raise RuntimeError("Gmail token not found")
+    return creds
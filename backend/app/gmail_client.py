@@ -0,0 +1,219 @@
+# backend/app/gmail_client.py
+"""
+使い回せる Gmail API クライアント
+
+- Gmail API の Resource は同梱の静的 discovery doc からプロセスで 1 回だけ組み立てる
+  （build() は呼ぶたびに doc を読み直してパースし、users().messages() も毎回作り直していた）
+- ユーザーごとの Credentials は AuthorizedHttp で包んで execute(http=...) で渡すだけ
+- 下回りの httplib2.Http はスレッドごとに 1 つ持ち回り、keep-alive で接続を再利用する
+  （httplib2.Http はスレッドセーフではないので、GmailClient は作ったスレッドで使うこと）
+- execute() / バッチの各リクエストはメソッド・ステータス別に件数と所要時間を /metrics に出す
+- 送る前にクォータ（app/gmail_quota.py）を取り、429 / 5xx はバックオフしてやり直す
+"""
+import itertools
+import json
+import threading
+import time
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+
+from app import gmail_quota as quota
+from app.core.metrics import Counter, Histogram
+from app.core.settings import GMAIL_API_ROOT, GMAIL_MAX_RETRIES
+from app.creds import load_credentials
+
+# 1 リクエストのタイムアウト（秒）
+HTTP_TIMEOUT = 60
+
+API_REQUESTS = Counter(
+    "gmail_api_requests_total", "Gmail API リクエスト数（バッチ内の各リクエストも 1 件）", ["method", "status"]
+)
+API_SECONDS = Histogram(
+    "gmail_api_request_seconds", "Gmail API の HTTP 往復時間（バッチは method=batch で 1 回）", ["method"]
+)
+
+
+def _status_of(exception: Exception | None) -> str:
+    if exception is None:
+        return "200"
+    if isinstance(exception, HttpError):
+        return str(exception.resp.status)
+    return "error"
+
+
+class _UnboundHttp:
+    """共有 Resource のデフォルト http。execute(http=...) を渡し忘れたら気付けるようにする"""
+
+    def request(self, *args, **kwargs):
+        raise RuntimeError("Gmail API request executed without a bound http; use GmailClient.execute()")
+
+
+class _GmailApi:
+    """プロセスで共有する Gmail API の Resource 群（Credentials は持たない）"""
+
+    def __init__(self, root_url: str = ""):
+        doc = json.loads(get_static_doc("gmail", "v1"))
+        if root_url:
+            # baseUrl も batch の URL も rootUrl から組み立てられる
+            doc["rootUrl"] = root_url if root_url.endswith("/") else root_url + "/"
+        self.service = build_from_document(doc, http=_UnboundHttp())
+        self.users = self.service.users()
+        self.messages = self.users.messages()
+        self.history = self.users.history()
+
+
+_api: _GmailApi | None = None
+_api_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_api() -> _GmailApi:
+    global _api
+    if _api is None:
+        with _api_lock:
+            if _api is None:
+                _api = _GmailApi(GMAIL_API_ROOT)
+    return _api
+
+
+def use_api_root(root_url: str) -> None:
+    """Gmail API の向き先を差し替える（偽サーバー相手のベンチ用。以降に作る GmailClient から有効）"""
+    global _api
+    with _api_lock:
+        _api = _GmailApi(root_url)
+
+
+def _pooled_http() -> httplib2.Http:
+    """このスレッド用の httplib2.Http（接続を使い回す）"""
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = httplib2.Http(timeout=HTTP_TIMEOUT)
+    return http
+
+
+class GmailClient:
+    """1 ユーザー分の Gmail API クライアント（共有 Resource + そのユーザーの http）"""
+
+    def __init__(self, http, user_id: int | None = None):
+        api = _get_api()
+        self.http = http
+        # クォータのバケットのキー（None ならプロジェクト全体の枠だけ見る）
+        self.user_id = user_id
+        self.users = api.users
+        self.messages = api.messages
+        self.history = api.history
+        self._service = api.service
+
+    def execute(self, request):
+        """
+        messages.get(...) などで作ったリクエストをこのユーザーとして実行する。
+        クォータが空くまで待ってから送り、429 / 5xx などはバックオフしてやり直す
+        """
+        method = _method_of(request)
+        for attempt in itertools.count():
+            quota.scheduler.acquire(self.user_id, quota.quota_units(method))
+            started = time.perf_counter()
+            exception = None
+            try:
+                return request.execute(http=self.http)
+            except Exception as e:
+                exception = e
+                reason = quota.retry_reason(e)
+                if reason is None or attempt >= GMAIL_MAX_RETRIES:
+                    raise
+            finally:
+                API_SECONDS.labels(method).observe(time.perf_counter() - started)
+                API_REQUESTS.labels(method, _status_of(exception)).inc()
+            quota.RETRIES.labels(method, reason).inc()
+            self._backoff(method, attempt, reason, exception)
+
+    def new_batch_http_request(self, callback=None) -> "_PendingBatch":
+        return _PendingBatch(callback)
+
+    def execute_batch(self, batch: "_PendingBatch") -> None:
+        """
+        batch を送る。中身の合計 unit 分のクォータを待ってから送り、
+        429 などで失敗した中身だけを集めて、バックオフのあと batch にし直して送る
+        （コールバックはやり直しが尽きたか、成功・やり直さないエラーのときに 1 回だけ呼ぶ）
+        """
+        items = batch.items
+        for attempt in itertools.count():
+            if not items:
+                return
+            retry: list[tuple] = []
+            real = self._service.new_batch_http_request()
+            for item in items:
+                real.add(item[0], callback=self._item_callback(item, attempt, retry), request_id=item[2])
+
+            quota.scheduler.acquire(self.user_id, sum(quota.quota_units(_method_of(r)) for r, _, _ in items))
+            try:
+                with API_SECONDS.labels("batch").time():
+                    real.execute(http=self.http)
+            except Exception as e:
+                # batch の HTTP 自体が 429 / 5xx（中身は 1 件も返っていない）
+                reason = quota.retry_reason(e)
+                if reason is None or attempt >= GMAIL_MAX_RETRIES:
+                    raise
+                quota.RETRIES.labels("batch", reason).inc()
+                retry = [(item, reason, e) for item in items]
+            if not retry:
+                return
+            # レート制限が混じっていればそちらに合わせて待つ
+            _, reason, exception = next((r for r in retry if quota.is_rate_limit(r[1])), retry[0])
+            self._backoff(f"batch ({len(retry)}/{len(items)} items)", attempt, reason, exception)
+            items = [item for item, _, _ in retry]
+
+    def _item_callback(self, item: tuple, attempt: int, retry: list):
+        request, callback, _ = item
+        method = _method_of(request)
+
+        def _callback(rid, response, exception):
+            API_REQUESTS.labels(method, _status_of(exception)).inc()
+            if exception is not None and attempt < GMAIL_MAX_RETRIES:
+                reason = quota.retry_reason(exception)
+                if reason is not None:
+                    quota.RETRIES.labels(method, reason).inc()
+                    retry.append((item, reason, exception))
+                    return
+            if callback is not None:
+                callback(rid, response, exception)
+
+        return _callback
+
+    def _backoff(self, label: str, attempt: int, reason: str, exception: Exception) -> None:
+        if quota.is_rate_limit(reason):
+            quota.scheduler.rate_limited(self.user_id)
+        delay = quota.backoff_delay(attempt, exception)
+        print(f"gmail {label}: {reason}, retry {attempt + 1}/{GMAIL_MAX_RETRIES} in {delay:.2f}s")
+        time.sleep(delay)
+
+
+def _method_of(request) -> str:
+    return getattr(request, "methodId", None) or "unknown"
+
+
+class _PendingBatch:
+    """
+    execute_batch() に渡す batch の中身（BatchHttpRequest と同じ add() で積む）
+    送るたびに BatchHttpRequest を組み直すので、失敗した中身だけを送り直せる
+    """
+
+    def __init__(self, callback=None):
+        self._callback = callback
+        self.items: list[tuple] = []
+
+    def add(self, request, callback=None, request_id=None) -> None:
+        self.items.append((request, callback or self._callback, request_id))
+
+
+def client_for_credentials(creds, user_id: int | None = None) -> GmailClient:
+    return GmailClient(AuthorizedHttp(creds, http=_pooled_http()), user_id=user_id)
+
+
+def client_for_user(user_id: int) -> GmailClient:
+    """DB（キャッシュ）の Gmail token で GmailClient を作る"""
+    return client_for_credentials(load_credentials(user_id), user_id=user_id)
@@ -0,0 +1,252 @@
+# backend/app/gmail_quota.py
+"""
+Gmail API のクォータを見ながらリクエストを出すためのスケジューラ
+
+- Gmail の quota unit（messages.get=5, history.list=2, ... batch は中身の合計）を
+  ユーザーごと・プロセス全体のトークンバケットで数え、足りなければ送る前に待つ
+- レーンは 2 つ。画面からの呼び出し（interactive、既定）と裏の同期（background）
+  background はバケットに GMAIL_BACKGROUND_HEADROOM 分を残して待ち、interactive が待っている間は取らない
+  （同じユーザーの重い同期が走っていても /api/gmail がすぐ通る）
+- 429 / 403 rateLimitExceeded・userRateLimitExceeded / 5xx / 通信エラーは
+  指数バックオフ + ジッター（Retry-After があればそれ以上）でやり直す。
+  レート制限を食らったら、そのユーザーのバケットを空にして同時に走っている呼び出しも一緒に待たせる
+
+GmailClient.execute() / execute_batch() から呼ぶ（app/gmail_client.py）。
+バケットはプロセスごとなので、複数プロセスで動かすときは GMAIL_PROJECT_QUOTA_PER_SEC を割っておく。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import random
+import socket
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from app.core.metrics import CallbackMetric, Counter, Histogram
+from app.core.settings import (
+    GMAIL_BACKGROUND_HEADROOM,
+    GMAIL_BACKOFF_BASE,
+    GMAIL_BACKOFF_MAX,
+    GMAIL_PROJECT_QUOTA_PER_SEC,
+    GMAIL_USER_QUOTA_PER_SEC,
+)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# methodId → quota unit（https://developers.google.com/gmail/api/reference/quota）
+QUOTA_UNITS = {
+    "gmail.users.getProfile": 1,
+    "gmail.users.labels.list": 1,
+    "gmail.users.history.list": 2,
+    "gmail.users.messages.list": 5,
+    "gmail.users.messages.get": 5,
+    "gmail.users.messages.attachments.get": 5,
+    "gmail.users.threads.get": 10,
+    "gmail.users.stop": 50,
+    "gmail.users.watch": 100,
+}
+DEFAULT_QUOTA_UNITS = 5
+
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+QUOTA_WAIT_SECONDS = Histogram(
+    "gmail_quota_wait_seconds", "Gmail API を送る前にクォータ待ちした時間", ["lane"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+QUOTA_THROTTLED = Counter(
+    "gmail_quota_throttled_total", "クォータが足りずに待たされた回数", ["lane", "scope"]
+)
+QUOTA_UNITS_USED = Counter("gmail_quota_units_total", "使った Gmail quota unit", ["lane"])
+RETRIES = Counter(
+    "gmail_api_retries_total", "Gmail API のやり直し回数（reason は 429 / rateLimitExceeded / 503 / network など）",
+    ["method", "reason"],
+)
+
+# 今の処理がどちらのレーンか（スレッドプールにもコンテキストごと引き継がれる）
+_lane: ContextVar[str] = ContextVar("gmail_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def gmail_lane(lane: str):
+    """with の中の Gmail 呼び出しを lane（INTERACTIVE / BACKGROUND）で出す"""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+def quota_units(method: str) -> int:
+    return QUOTA_UNITS.get(method, DEFAULT_QUOTA_UNITS)
+
+
+# ============================
+# トークンバケット
+# ============================
+
+class TokenBucket:
+    """
+    rate 単位/秒で貯まり、capacity まで貯められるバケット（スレッドセーフ）
+
+    capacity を超えるコスト（大きい batch）は満タンになるまで待ってから取り、残高をマイナスにする
+    （後続がその分待つので、平均すると rate を超えない）。
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, headroom: float = GMAIL_BACKGROUND_HEADROOM):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.headroom = self.capacity * headroom
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost: float, lane: str = INTERACTIVE) -> float:
+        """cost 分を取る。待った秒数を返す"""
+        interactive = lane == INTERACTIVE
+        need = min(cost, self.capacity)
+        if not interactive:
+            need = min(need + self.headroom, self.capacity)
+
+        started = time.monotonic()
+        with self._cond:
+            if interactive:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.tokens >= need and (interactive or self._interactive_waiting == 0):
+                        self.tokens -= cost
+                        return now - started
+                    if self.tokens < need:
+                        self._cond.wait((need - self.tokens) / self.rate)
+                    else:
+                        # interactive が取り終わったら notify される
+                        self._cond.wait(0.05)
+            finally:
+                if interactive:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+    def drain(self) -> None:
+        """レート制限を食らったとき用: 残高を 0 にして、貯まり直すまで全員待たせる"""
+        with self._cond:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+
+class QuotaScheduler:
+    """ユーザーごとのバケット + プロセス全体（プロジェクト）のバケット"""
+
+    def __init__(
+        self,
+        user_rate: float = GMAIL_USER_QUOTA_PER_SEC,
+        project_rate: float = GMAIL_PROJECT_QUOTA_PER_SEC,
+        headroom: float = GMAIL_BACKGROUND_HEADROOM,
+    ):
+        self.user_rate = user_rate
+        self.headroom = headroom
+        self.project = TokenBucket(project_rate, headroom=headroom)
+        self._users: dict[int, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def user_bucket(self, user_id: int) -> TokenBucket:
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            with self._lock:
+                bucket = self._users.setdefault(user_id, TokenBucket(self.user_rate, headroom=self.headroom))
+        return bucket
+
+    def acquire(self, user_id: int | None, cost: float) -> float:
+        """
+        user_id（None なら プロジェクトだけ）の分として cost 単位を取る。待った秒数を返す。
+        ユーザー → プロジェクトの順に取る（ユーザー上限で止まる呼び出しがプロジェクト枠を抱えないように）
+        """
+        lane = current_lane()
+        waited = 0.0
+        if user_id is not None:
+            w = self.user_bucket(user_id).acquire(cost, lane)
+            if w > 0.001:
+                QUOTA_THROTTLED.labels(lane, "user").inc()
+            waited += w
+        w = self.project.acquire(cost, lane)
+        if w > 0.001:
+            QUOTA_THROTTLED.labels(lane, "project").inc()
+        waited += w
+
+        QUOTA_WAIT_SECONDS.labels(lane).observe(waited)
+        QUOTA_UNITS_USED.labels(lane).inc(cost)
+        return waited
+
+    def rate_limited(self, user_id: int | None) -> None:
+        if user_id is not None:
+            self.user_bucket(user_id).drain()
+
+    def user_count(self) -> int:
+        return len(self._users)
+
+
+scheduler = QuotaScheduler()
+
+CallbackMetric(
+    "gmail_quota_users", "クォータのバケットを持っているユーザー数（プロセスごと）",
+    scheduler.user_count,
+)
+
+
+# ============================
+# リトライ
+# ============================
+
+def _error_reason(exc: HttpError) -> str | None:
+    """{"error": {"errors": [{"reason": ...}]}} の reason（無ければ None）"""
+    try:
+        error = json.loads(exc.content.decode("utf-8"))["error"]
+        return (error.get("errors") or [{}])[0].get("reason") or error.get("status")
+    except (ValueError, KeyError, TypeError, AttributeError, IndexError):
+        return None
+
+
+def retry_reason(exc: BaseException) -> str | None:
+    """やり直すべきエラーなら理由（メトリクスのラベル）、そうでなければ None"""
+    if isinstance(exc, HttpError):
+        status = exc.resp.status
+        if status == 403:
+            reason = _error_reason(exc)
+            return reason if reason in RATE_LIMIT_REASONS else None
+        if status in RETRYABLE_STATUSES:
+            return str(status)
+        return None
+    if isinstance(exc, (TimeoutError, ConnectionError, socket.timeout)):
+        return "network"
+    return None
+
+
+def is_rate_limit(reason: str | None) -> bool:
+    return reason == "429" or reason in RATE_LIMIT_REASONS
+
+
+def backoff_delay(attempt: int, exc: BaseException | None = None) -> float:
+    """attempt 回目（0 始まり）の失敗のあとに待つ秒数（full jitter。Retry-After があればそれ以上）"""
+    delay = random.uniform(0, min(GMAIL_BACKOFF_MAX, GMAIL_BACKOFF_BASE * (2 ** attempt)))
+    if isinstance(exc, HttpError):
+        retry_after = exc.resp.get("retry-after")
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), GMAIL_BACKOFF_MAX))
+            except ValueError:
+                pass
+    return delay
@@ -1,11 +1,25 @@
 # backend/app/gmail_service.py
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from typing import Callable
 import base64
 
-from app.creds import load_credentials
+from app.core.metrics import FAST_BUCKETS, Histogram
+from app.core.settings import GMAIL_BATCH_SIZE
+from app.gmail_client import GmailClient, client_for_user
 
 SCOPES = ["https://mail.google.com/"]
 
+# format=metadata で取るヘッダー（一覧・候補判定に使う分だけ）
+METADATA_HEADERS = ["Subject", "From", "To", "Date"]
+
+BODY_DECODE_SECONDS = Histogram(
+    "gmail_body_decode_seconds", "get_email_body（MIME パートの base64 デコード）にかかった時間", buckets=FAST_BUCKETS
+)
+
+
+class HistoryExpiredError(Exception):
+    """startHistoryId が古すぎて history API で差分を取れない（Gmail が 404 を返す）"""
+
 
 # ============================
 # ヘルパ関数
@@ -83,51 +97,282 @@ def get_email_body(payload: dict):
 # Gmail API
 # ============================
 
-def get_emails(user_id: int, max_results: int = 10):
+def _to_email_dict(message_id: str, m_data: dict, with_body: bool = True) -> dict:
+    """
+    messages.get のレスポンスを API 共通のメール dict に変換
+    with_body=False（format=metadata で取ったもの）は body が None になる
+    """
+    headers = m_data["payload"]["headers"]
+    if with_body:
+        with BODY_DECODE_SECONDS.time():
+            body_text = get_email_body(m_data["payload"])
+        # 全文を返す（日程が本文の後ろの方に書かれたメールもあるので切らない。画面に出すときは呼び出し側で切る）
+        body = body_text or ""
+    else:
+        body = None
+
+    return {
+        "id": message_id,
+        "date": get_header(headers, "date"),
+        "from": get_header(headers, "from"),
+        "to": get_header(headers, "to"),
+        "subject": get_header(headers, "subject"),
+        "snippet": m_data.get("snippet", ""),
+        "body": body,
+    }
+
+
+def _fetch_messages_sequential(client: GmailClient, message_ids: list[str], **get_kwargs) -> list[dict]:
+    """messages.get を 1 通ずつ呼ぶ（batch_size <= 1 のとき用）"""
+    return [
+        client.execute(client.messages.get(userId="me", id=message_id, **get_kwargs))
+        for message_id in message_ids
+    ]
+
+
+def _fetch_messages_batched(
+    client: GmailClient,
+    message_ids: list[str],
+    batch_size: int,
+    **get_kwargs,
+) -> list[dict]:
+    """
+    messages.get を Gmail の batch リクエストにまとめて取得する。
+    batch_size 件ごとに 1 往復。戻り値は message_ids と同じ順序。
+    get_kwargs は messages.get にそのまま渡す（format など）。
+    """
+    results: dict[str, dict] = {}
+
+    def _callback(request_id, response, exception):
+        if exception is not None:
+            # list / history の後に削除されたメールは飛ばす
+            if isinstance(exception, HttpError) and exception.resp.status == 404:
+                results[request_id] = None
+                return
+            raise exception
+        results[request_id] = response
+
+    for start in range(0, len(message_ids), batch_size):
+        chunk = message_ids[start:start + batch_size]
+        batch = client.new_batch_http_request(callback=_callback)
+        for message_id in chunk:
+            batch.add(
+                client.messages.get(userId="me", id=message_id, **get_kwargs),
+                request_id=message_id,
+            )
+        client.execute_batch(batch)
+
+    return [results[message_id] for message_id in message_ids]
+
+
+def get_emails_by_ids(
+    user_id: int,
+    message_ids: list[str],
+    batch_size: int | None = None,
+    client: GmailClient | None = None,
+    metadata_only: bool = False,
+):
+    """
+    メッセージ ID を指定してメールを取得（get_emails と同じ dict 形式）
+
+    取得までに削除されていたメールは結果に含まれない。
+    metadata_only=True なら format=metadata で取る（本文なし・body は None）。
+    """
+    if client is None:
+        # ✅ DB（キャッシュ）のトークンで Gmail クライアントを用意
+        client = client_for_user(user_id)
+
+    if batch_size is None:
+        batch_size = GMAIL_BATCH_SIZE
+
+    get_kwargs = {}
+    if metadata_only:
+        get_kwargs = {"format": "metadata", "metadataHeaders": METADATA_HEADERS}
+
+    if batch_size > 1:
+        m_datas = _fetch_messages_batched(client, message_ids, batch_size, **get_kwargs)
+    else:
+        m_datas = _fetch_messages_sequential(client, message_ids, **get_kwargs)
+
+    return [
+        _to_email_dict(message_id, m_data, with_body=not metadata_only)
+        for message_id, m_data in zip(message_ids, m_datas)
+        if m_data is not None
+    ]
+
+
+def get_emails_metadata_first(
+    user_id: int,
+    message_ids: list[str],
+    is_candidate: Callable[[dict], bool],
+    batch_size: int | None = None,
+    client: GmailClient | None = None,
+) -> list[dict]:
+    """
+    2 段階でメールを取得する
+    1. 全件を format=metadata（Subject / From / Date / snippet）で取る
+    2. is_candidate(メール dict) が True のものだけ format=full で本文まで取る
+
+    候補にならなかったメールも結果に含める（body は None）。順序は message_ids のまま。
+    """
+    if client is None:
+        # ✅ DB（キャッシュ）のトークンで Gmail クライアントを用意
+        client = client_for_user(user_id)
+
+    messages = get_emails_by_ids(
+        user_id, message_ids, batch_size=batch_size, client=client, metadata_only=True
+    )
+    candidate_ids = [m["id"] for m in messages if is_candidate(m)]
+    if not candidate_ids:
+        return messages
+
+    full = {
+        m["id"]: m
+        for m in get_emails_by_ids(user_id, candidate_ids, batch_size=batch_size, client=client)
+    }
+    # 2 段目までの間に削除されたメールは metadata のまま残す
+    return [full.get(m["id"], m) for m in messages]
+
+
+def get_emails(
+    user_id: int,
+    max_results: int = 10,
+    batch_size: int | None = None,
+    client: GmailClient | None = None,
+    query: str | None = None,
+    label_ids: list[str] | None = None,
+):
     """
     DBに保存された Gmail token を使ってメールを取得
     
     Args:
         user_id: users.id（Integer）
         max_results: 取得するメール数
+        batch_size: messages.get をまとめる件数（None なら GMAIL_BATCH_SIZE、1 以下なら 1 通ずつ）
+        query: messages.list の q（Gmail の検索式。services/recruiting.py で作る）
+        label_ids: messages.list の labelIds（すべてのラベルを持つメールだけになる）
+        client: GmailClient（テスト時は HttpMockSequence などの偽 http で作ったものを渡せる）
     
     Returns:
         メールのリスト
     """
-    # ✅ DBからトークンを読み込む
-    creds = load_credentials(user_id)
+    if client is None:
+        # ✅ DB（キャッシュ）のトークンで Gmail クライアントを用意
+        client = client_for_user(user_id)
 
-    service = build("gmail", "v1", credentials=creds)
-
-    messages = (
-        service.users()
-        .messages()
-        .list(userId="me", maxResults=max_results)
-        .execute()
-        .get("messages", [])
+    message_ids = list_message_ids(
+        user_id, max_results=max_results, client=client, query=query, label_ids=label_ids
     )
+    return get_emails_by_ids(user_id, message_ids, batch_size=batch_size, client=client)
+
+
+def list_message_ids(
+    user_id: int,
+    max_results: int = 10,
+    client: GmailClient | None = None,
+    query: str | None = None,
+    label_ids: list[str] | None = None,
+) -> list[str]:
+    """messages.list で新しい順にメッセージ ID を取得（q / labelIds は get_emails と同じ）"""
+    if client is None:
+        # ✅ DB（キャッシュ）のトークンで Gmail クライアントを用意
+        client = client_for_user(user_id)
+
+    list_kwargs = {"userId": "me", "maxResults": max_results}
+    if query:
+        list_kwargs["q"] = query
+    if label_ids:
+        list_kwargs["labelIds"] = label_ids
+    messages = client.execute(client.messages.list(**list_kwargs)).get("messages", [])
+    return [message["id"] for message in messages]
+
+
+def get_current_history_id(user_id: int, client: GmailClient | None = None) -> str:
+    """メールボックスの現在の historyId を取得（get_profile の historyId。チェックポイントと同じく文字列で返す）"""
+    return str(get_profile(user_id, client=client)["historyId"])
+
+
+def get_profile(user_id: int, client: GmailClient | None = None) -> dict:
+    """users.getProfile（emailAddress / historyId など）"""
+    if client is None:
+        client = client_for_user(user_id)
+
+    return client.execute(client.users.getProfile(userId="me"))
+
+
+def watch_mailbox(
+    user_id: int,
+    topic_name: str,
+    label_ids: list[str] | None = None,
+    client: GmailClient | None = None,
+) -> dict:
+    """
+    users.watch でメールボックスの変更を Pub/Sub の topic_name に通知させる（張り直しも同じ呼び出し）
+
+    Returns:
+        {"historyId": 現在の historyId, "expiration": 期限（epoch ミリ秒の文字列）}
+    """
+    if client is None:
+        client = client_for_user(user_id)
+
+    body = {"topicName": topic_name}
+    if label_ids:
+        body["labelIds"] = label_ids
+        body["labelFilterBehavior"] = "include"
+    return client.execute(client.users.watch(userId="me", body=body))
+
+
+def get_history_message_ids(
+    user_id: int,
+    start_history_id: str,
+    client: GmailClient | None = None,
+    label_id: str | None = None,
+) -> tuple[list[str], str]:
+    """
+    start_history_id 以降に追加されたメッセージ ID を history API で取得
+    （history.list は q を受け付けないので、絞れるのは label_id 1 つだけ）
+
+    Returns:
+        (追加されたメッセージ ID のリスト（古い順・重複なし）, 最新の historyId)
+
+    Raises:
+        HistoryExpiredError: start_history_id が期限切れ（フル同期が必要）
+    """
+    if client is None:
+        # ✅ DB（キャッシュ）のトークンで Gmail クライアントを用意
+        client = client_for_user(user_id)
+
+    message_ids: list[str] = []
+    seen: set[str] = set()
+    history_id = start_history_id
+    page_token = None
+
+    while True:
+        try:
+            resp = client.execute(
+                client.history.list(
+                    userId="me",
+                    startHistoryId=start_history_id,
+                    historyTypes="messageAdded",
+                    labelId=label_id,
+                    pageToken=page_token,
+                )
+            )
+        except HttpError as e:
+            if e.resp.status == 404:
+                raise HistoryExpiredError(start_history_id) from e
+            raise
+
+        for h in resp.get("history", []):
+            for added in h.get("messagesAdded", []):
+                message_id = added["message"]["id"]
+                if message_id not in seen:
+                    seen.add(message_id)
+                    message_ids.append(message_id)
+
+        history_id = str(resp.get("historyId", history_id))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
 
-    email_list = []
-
-    for message in messages:
-        m_data = (
-            service.users()
-            .messages()
-            .get(userId="me", id=message["id"])
-            .execute()
-        )
-
-        headers = m_data["payload"]["headers"]
-        body_text = get_email_body(m_data["payload"])
-
-        email_list.append({
-            "id": message["id"],
-            "date": get_header(headers, "date"),
-            "from": get_header(headers, "from"),
-            "to": get_header(headers, "to"),
-            "subject": get_header(headers, "subject"),
-            "snippet": m_data.get("snippet", ""),
-            "body": body_text[:1000] if body_text else "",
-        })
-
-    return email_list
\ No newline at end of file
+    return message_ids, history_id
@@ -1,16 +1,58 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import hmac
+import time
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.core.settings import SESSION_SECRET_KEY, FRONTEND_BASE_URL
+from app.core.identity import identity_cache_stats
+from app.core.metrics import CONTENT_TYPE, CallbackMetric, Counter, Histogram, render_metrics
+from app.core.settings import (
+    SESSION_SECRET_KEY,
+    FRONTEND_BASE_URL,
+    GMAIL_PUSH_TOPIC,
+    METRICS_TOKEN,
+    PROFILING_ENABLED,
+    SYNC_SCHEDULER_ENABLED,
+)
+from app.creds import credentials_cache_stats
 from app.api.auth import router as auth_router
 from app.api.gmail import router as gmail_router
 from app.api.events import router as events_router  # events_router を使う
+from app.api.emails import router as emails_router
+from app.services.gmail_push import WatchRenewer
+from app.services.sync_jobs import SyncWorkerPool
+from app.services.sync_scheduler import SyncScheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Gmail 同期ジョブのワーカーを起動（sync_jobs テーブルをキューとして使う）
+    workers = SyncWorkerPool()
+    workers.start()
+    # 定期同期（SYNC_SCHEDULER_ENABLED=1 のときだけ。別プロセスなら python -m app.run_scheduler）
+    scheduler = SyncScheduler() if SYNC_SCHEDULER_ENABLED else None
+    if scheduler is not None:
+        scheduler.start()
+    # プッシュ通知の watch の張り直し（スケジューラと同じプロセスで、GMAIL_PUSH_TOPIC があるときだけ）
+    renewer = WatchRenewer() if SYNC_SCHEDULER_ENABLED and GMAIL_PUSH_TOPIC else None
+    if renewer is not None:
+        renewer.start()
+    try:
+        yield
+    finally:
+        if renewer is not None:
+            renewer.stop()
+        if scheduler is not None:
+            scheduler.stop()
+        workers.stop()
 
 
 app = FastAPI(
     title="JobSync API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # ★ ここで app.include_router(events.router) は不要なので削除
@@ -39,9 +81,60 @@ app.add_middleware(
     https_only=True,
 )
 
+# --- メトリクス（/metrics で Prometheus のテキスト形式） ---
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP リクエストの処理時間（ルート別）", ["method", "route"]
+)
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP リクエスト数", ["method", "route", "status"])
+CallbackMetric(
+    "credentials_cache", "Credentials キャッシュの統計（hits / misses / refreshes / size など）",
+    credentials_cache_stats, ["stat"],
+)
+CallbackMetric(
+    "identity_cache", "google_sub → users.id キャッシュの統計", identity_cache_stats, ["stat"],
+)
+
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        # パスそのものではなくルートのテンプレート（/api/events/{event_id}）で集計する
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.labels(request.method, route_path).observe(time.perf_counter() - started)
+        HTTP_REQUESTS.labels(request.method, route_path, status).inc()
+
+
+# --- プロファイリング（PROFILING_ENABLED のときだけ。無効ならミドルウェアもルートも登録しない） ---
+if PROFILING_ENABLED:
+    from app.api.admin import router as admin_router
+    from app.core.profiling import PROFILE_ID_HEADER, PROFILE_TOKEN_HEADER, profile_request, should_profile
+
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        if request.url.path.startswith("/api/admin/") or not should_profile(
+            request.headers.get(PROFILE_TOKEN_HEADER)
+        ):
+            return await call_next(request)
+
+        with profile_request(f"{request.method} {request.url.path}") as profile:
+            response = await call_next(request)
+        response.headers[PROFILE_ID_HEADER] = profile["name"]
+        return response
+
+    app.include_router(admin_router, prefix="/api")
+
+
 app.include_router(auth_router, prefix="/api")
 app.include_router(gmail_router, prefix="/api")
 app.include_router(events_router, prefix="/api")  # ここで /api/events が生える
+app.include_router(emails_router, prefix="/api")
 
 
 @app.get("/health")
@@ -49,6 +142,16 @@ async def health():
     return {"status": "ok"}
 
 
+# --- /metrics（METRICS_TOKEN があるときだけ。Authorization: Bearer <METRICS_TOKEN> で認可） ---
+if METRICS_TOKEN:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(authorization: str | None = Header(None)):
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="metrics token required")
+        return Response(render_metrics(), headers={"Content-Type": CONTENT_TYPE})
+
+
 if __name__ == "__main__":
     import uvicorn
 
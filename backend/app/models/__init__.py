@@ -3,5 +3,9 @@ from .user import User
 from .email import Email
 from .event import Event
 from .gmail_token import GmailToken
+from .gmail_sync_state import GmailSyncState
+from .sync_job import SyncJob
+from .sync_schedule import SyncSchedule
+from .sync_lease import SyncLease
 
-__all__ = ["User", "Email", "Event", "GmailToken"]
\ No newline at end of file
+__all__ = ["User", "Email", "Event", "GmailToken", "GmailSyncState", "SyncJob", "SyncSchedule", "SyncLease"]
\ No newline at end of file
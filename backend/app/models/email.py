@@ -1,11 +1,35 @@
+import zlib
+
 from sqlalchemy import (
-    Column, Integer, Text, String, DateTime, ForeignKey
+    Column, Integer, LargeBinary, Text, String, DateTime, ForeignKey, Index, event, text
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base  # Base = declarative_base()
 
+# 本文の zlib 圧縮レベル（6 = zlib の既定。9 にしても日本語のメールではほとんど縮まない）
+BODY_COMPRESS_LEVEL = 6
+
+
+def compress_body(value: str | None) -> bytes | None:
+    """本文を UTF-8 + zlib で圧縮（None は None のまま）"""
+    if value is None:
+        return None
+    return zlib.compress(value.encode("utf-8"), BODY_COMPRESS_LEVEL)
+
+
+def decompress_body(data: bytes | None) -> str | None:
+    """compress_body の逆"""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
 class Email(Base):
     __tablename__ = "emails"
+    __table_args__ = (
+        # 取り込み時の既存チェック（_upsert_emails / import_gmail）と ON CONFLICT の対象
+        Index("uq_emails_user_id_gmail_message_id", "user_id", "gmail_message_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)  # autoincrement は省略でOK
 
@@ -16,8 +40,61 @@ class Email(Base):
     subject = Column(Text)
     snippet = Column(Text)
     processing_status = Column(String(16), nullable=False, default="queued")
-    body_plain = Column(Text)
+    # 本文（全文）は zlib で圧縮して持つ。deferred なので Email を引いても本文は読まず、
+    # body_plain に触ったときに 1 行ずつ SELECT して展開する（まとめて要るときは undefer(Email.body_zlib)）
+    body_zlib = deferred(Column(LargeBinary))
 
     user = relationship("User", back_populates="emails")
     events = relationship("Event", back_populates="email")
 
+    @property
+    def body_plain(self) -> str | None:
+        # 展開した本文はインスタンスに持っておく（body_zlib が入れ替わったら展開し直す）
+        data = self.body_zlib
+        cached = self.__dict__.get("_body_plain_cache")
+        if cached is None or cached[0] is not data:
+            cached = (data, decompress_body(data))
+            self.__dict__["_body_plain_cache"] = cached
+        return cached[1]
+
+    @body_plain.setter
+    def body_plain(self, value: str | None) -> None:
+        data = compress_body(value)
+        self.body_zlib = data
+        self.__dict__["_body_plain_cache"] = (data, value)
+
+
+# ============================
+# 全文検索インデックス（app/services/email_search.py）
+# ============================
+# ORM の外で持つので、create_all / drop_all のときにここで作る・消す（本番は 0007 マイグレーション）
+# - SQLite: FTS5 仮想テーブル emails_fts（rowid = emails.id、owner 列は "u<user_id>"）
+# - Postgres: emails.search_tsv（tsvector）+ GIN インデックス
+
+SEARCH_FTS_TABLE = "emails_fts"
+
+
+@event.listens_for(Email.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} USING fts5(subject, body, owner)"
+        ))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE emails ADD COLUMN IF NOT EXISTS search_tsv tsvector"))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_emails_search_tsv ON emails USING gin (search_tsv)"
+        ))
+
+
+@event.listens_for(Email.__table__, "after_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}"))
+
+
+@event.listens_for(Email, "after_delete")
+def _delete_from_search_index(mapper, connection, target):
+    # FTS5 は emails と別テーブルなので一緒に消す（Postgres は search_tsv が行ごと消える）
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
@@ -1,12 +1,18 @@
 # app/models/event.py
 from sqlalchemy import (
-    Column, Integer, Text, String, DateTime, ForeignKey
+    Column, Integer, Text, String, DateTime, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # 自動生成 event の重複チェック（手動 event は dedup_hash = NULL なので対象外）
+        Index("uq_events_user_id_dedup_hash", "user_id", "dedup_hash", unique=True),
+        # list_events の絞り込み + (start_at, id) の keyset ページング
+        Index("ix_events_user_id_start_at_id", "user_id", "start_at", "id"),
+    )
 
     # 🔁 ここを BigInteger → Integer に統一
     id = Column(Integer, primary_key=True, index=True)
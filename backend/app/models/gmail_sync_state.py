@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.database import Base
+
+
+class GmailSyncState(Base):
+    """ユーザーごとの Gmail 同期チェックポイント（最後に同期した historyId）"""
+    __tablename__ = "gmail_sync_states"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+
+    # Gmail の historyId（uint64 なので文字列で持つ）。None なら未同期
+    history_id = Column(Text, nullable=True)
+    last_full_sync_at = Column(DateTime(timezone=True), nullable=True)
+
+    # messages.list の絞り込み（app/services/recruiting.py）。None なら既定の就活キーワード
+    gmail_query = Column(Text, nullable=True)
+    label_ids = Column(Text, nullable=True)          # JSON 配列
+    sender_allowlist = Column(Text, nullable=True)   # JSON 配列
+
+    # 取得したメール数と、そのうち event 情報が取れた数（累計。絞り込みの効き具合を見る）
+    fetched_total = Column(Integer, nullable=False, default=0, server_default="0")
+    matched_total = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # プッシュ通知（users.watch。app/services/gmail_push.py）
+    # watch_email は通知の emailAddress からユーザーを引くためのもの（getProfile の値を小文字で）
+    watch_email = Column(String(320), nullable=True, index=True)
+    watch_expires_at = Column(DateTime(timezone=True), nullable=True)   # None なら watch していない
+    watch_attempted_at = Column(DateTime(timezone=True), nullable=True)  # 最後に張ろうとした時刻
+    watch_error = Column(Text, nullable=True)                            # 最後の失敗（成功したら None）
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    user = relationship("User", backref="gmail_sync_state")
@@ -13,6 +13,9 @@ class GmailToken(Base):
 
     token_json = Column(Text, nullable=False)
 
+    # 楽観ロック用。更新のたびに +1 され、別プロセスと同時に書いたら StaleDataError
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(
         DateTime,
@@ -22,4 +25,6 @@ class GmailToken(Base):
 
     user = relationship("User", backref="gmail_token")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
@@ -0,0 +1,35 @@
+# app/models/sync_job.py
+from sqlalchemy import Column, Integer, Text, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class SyncJob(Base):
+    """Gmail 同期ジョブ（DB をキューとして使う）"""
+    __tablename__ = "sync_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    status = Column(String(16), nullable=False, default="queued")  # queued / running / succeeded / failed
+
+    # queued / running の間だけ user_id を入れる。unique なので 1 ユーザー 1 ジョブしか走らない
+    active_user_id = Column(Integer, unique=True, nullable=True)
+
+    # 進捗
+    fetched_count = Column(Integer, nullable=False, default=0)
+    parsed_count = Column(Integer, nullable=False, default=0)
+    matched_count = Column(Integer, nullable=False, default=0)  # event 情報が取れたメール数
+    events_created = Column(Integer, nullable=False, default=0)
+
+    error = Column(Text)
+
+    # この同期で作成/更新した event の id（JSON 配列）。ステータス API で差分だけ返すのに使う
+    changed_event_ids = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    user = relationship("User", backref="sync_jobs")
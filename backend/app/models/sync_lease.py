@@ -0,0 +1,22 @@
+# app/models/sync_lease.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+
+from app.database import Base
+
+
+class SyncLease(Base):
+    """
+    ユーザーごとの同期の排他（app/services/sync_leases.py）
+    expires_at までは owner だけがそのユーザーを同期できる。owner は heartbeat で延ばし続ける
+    """
+    __tablename__ = "sync_leases"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # "<host>:<pid>"（どのプロセスが持っているか）と、実行中のジョブ
+    owner = Column(String(255), nullable=False)
+    job_id = Column(Integer, nullable=True)
+
+    acquired_at = Column(DateTime(timezone=True), nullable=False)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
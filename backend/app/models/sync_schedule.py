@@ -0,0 +1,33 @@
+# app/models/sync_schedule.py
+from sqlalchemy import Column, Integer, Float, Text, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class SyncSchedule(Base):
+    """ユーザーごとの定期同期の状態（app/services/sync_scheduler.py が読み書きする）"""
+    __tablename__ = "sync_schedules"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+
+    # 次に同期する時刻。これが過ぎたものを古い順に積む（= ユーザー間の round-robin）
+    next_due_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # 今の同期間隔（秒）。就活メールが最近来たユーザーほど短い
+    interval_seconds = Column(Integer, nullable=False)
+
+    # 積んだジョブ（終わるまでは due にならない）
+    running_job_id = Column(Integer, nullable=True)
+
+    # 前回の結果
+    last_run_at = Column(DateTime(timezone=True))
+    last_duration_seconds = Column(Float)
+    last_status = Column(String(16))  # succeeded / failed
+    last_error = Column(Text)
+    consecutive_failures = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # 最後に event 情報の取れるメール（就活メール）が届いた同期の時刻
+    last_recruiting_at = Column(DateTime(timezone=True))
+
+    user = relationship("User", backref="sync_schedule")
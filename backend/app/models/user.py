@@ -14,6 +14,9 @@ class User(Base):
     email = Column(String, index=True, nullable=True)
     name = Column(String, nullable=True)
 
+    # events などが変わるたびに +1（ETag に使う。app/core/etag.py）
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # ★ ここを追加：Email / Event とのリレーション
     emails = relationship(
         "Email",
@@ -0,0 +1,53 @@
+# backend/app/run_scheduler.py
+"""
+定期同期のスケジューラと同期ワーカーを Web サーバーとは別プロセスで動かす
+
+    cd backend
+    python -m app.run_scheduler
+    python -m app.run_scheduler --workers 8
+
+このプロセスで同期するなら、uvicorn 側は SYNC_SCHEDULER_ENABLED=0 のままにする
+（uvicorn 側のワーカーもボタンからの同期と一緒に sync_jobs を拾うので、両方動いていても構わない）。
+GMAIL_PUSH_TOPIC を設定していれば、プッシュ通知の watch の張り直しもこのプロセスで行う。
+"""
+import argparse
+import signal
+import threading
+
+from app.core.settings import GMAIL_PUSH_TOPIC, SYNC_SCHEDULER_TICK_SECONDS, SYNC_WORKERS
+from app.services.gmail_push import WatchRenewer
+from app.services.sync_jobs import SyncWorkerPool
+from app.services.sync_scheduler import SyncScheduler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=SYNC_WORKERS, help="同期ワーカーのスレッド数（0 なら積むだけ）")
+    parser.add_argument("--tick", type=float, default=SYNC_SCHEDULER_TICK_SECONDS)
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    workers = SyncWorkerPool(num_workers=args.workers)
+    scheduler = SyncScheduler(tick_seconds=args.tick)
+    # GMAIL_PUSH_TOPIC があればプッシュ通知の watch もここで張り直す
+    renewer = WatchRenewer() if GMAIL_PUSH_TOPIC else None
+    workers.start()
+    scheduler.start()
+    if renewer is not None:
+        renewer.start()
+    print(f"sync scheduler started (workers={args.workers}, tick={args.tick}s, watch renewal={'on' if renewer else 'off'})")
+    try:
+        stop.wait()
+    finally:
+        if renewer is not None:
+            renewer.stop()
+        scheduler.stop()
+        workers.stop()
+        print("sync scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
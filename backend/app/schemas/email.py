@@ -0,0 +1,18 @@
+# app/schemas/email.py
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class EmailSearchHit(BaseModel):
+    id: int
+    gmail_message_id: str
+    received_at: datetime
+    from_address: str | None = None
+    subject: str | None = None
+    snippet: str | None = None
+    rank: float
+
+
+class EmailSearchPage(BaseModel):
+    items: list[EmailSearchHit]
+    next_offset: int | None = None
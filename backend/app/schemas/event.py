@@ -1,6 +1,6 @@
 # app/schemas/event.py
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class EventBase(BaseModel):
@@ -20,8 +20,11 @@ class EventRead(EventBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class EventPage(BaseModel):
+    items: list[EventRead]
+    next_cursor: str | None = None
 
 class EventUpdate(BaseModel):
     company_name: Optional[str] = None
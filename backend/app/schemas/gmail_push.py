@@ -0,0 +1,14 @@
+# app/schemas/gmail_push.py
+from pydantic import BaseModel
+
+
+class PubSubMessage(BaseModel):
+    data: str = ""                        # base64 の JSON {"emailAddress", "historyId"}
+    messageId: str | None = None
+    publishTime: str | None = None
+
+
+class PubSubPushEnvelope(BaseModel):
+    """Cloud Pub/Sub の push サブスクリプションが POST してくる形"""
+    message: PubSubMessage
+    subscription: str | None = None
@@ -0,0 +1,15 @@
+# app/schemas/gmail_sync.py
+from pydantic import BaseModel
+
+
+class GmailSyncSettingsUpdate(BaseModel):
+    gmail_query: str | None = None        # None / "" なら既定の就活キーワード
+    label_ids: list[str] = []
+    sender_allowlist: list[str] = []
+
+
+class GmailSyncSettingsRead(GmailSyncSettingsUpdate):
+    effective_query: str                  # 実際に messages.list に渡す q
+    fetched_total: int
+    matched_total: int
+    match_ratio: float | None = None      # matched_total / fetched_total
@@ -0,0 +1,26 @@
+# app/schemas/sync_job.py
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+
+from app.schemas.event import EventRead
+
+
+class SyncJobRead(BaseModel):
+    id: int
+    status: str
+    fetched_count: int
+    parsed_count: int
+    matched_count: int = 0
+    events_created: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SyncJobStatus(SyncJobRead):
+    """ジョブの状態 + この同期で作成/更新した events（1 ページ分）"""
+    changed_events: list[EventRead] = []
+    next_cursor: str | None = None
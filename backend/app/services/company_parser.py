@@ -19,108 +19,156 @@ LEGAL_SUFFIX = [
     "株式会社", "合同会社", "有限会社", "合資会社", "合名会社",
 ]
 
-def _clean(s: str) -> str:
-    s = (s or "").replace("\u3000", " ").strip()
-    # 余計な引用符
-    s = s.strip('"\'')
 
-    # 前後の装飾を落とす（よくある）
-    s = re.sub(r"^[【\[\(（]+", "", s)
-    s = re.sub(r"[】\]\)）]+$", "", s)
-    return s.strip()
+# 前後の装飾（【 [ ( （ … 】 ] ) ））
+_LEAD_DECO = "【[(（"
+_TRAIL_DECO = "】])）"
 
-def _looks_like_company(s: str) -> bool:
-    s = _clean(s)
-    if not s:
-        return False
 
-    # イベント語そのものは会社名ではない
-    if any(w in s for w in EVENT_WORDS):
-        return False
+def _alternation(words: list[str]) -> str:
+    # 長い語を先に並べる（どれか 1 つでも含めば良いので結果は変わらない）
+    return "|".join(map(re.escape, sorted(words, key=len, reverse=True)))
 
-    # 明らかに会社名じゃないワード
-    if any(w in s for w in NG_WORDS):
-        return False
 
-    # 長すぎ・短すぎ除外（雑だけど効く）
-    if len(s) < 2 or len(s) > 40:
-        return False
-
-    return True
-
-def _extract_from_from_address(from_address: str) -> str | None:
+class CompanyNameMatcher:
     """
-    例: '"星歩夢" <ayusyuukatu.2025@gmail.com>' -> '星歩夢'
-        'Sky株式会社 <recruit@skygroup.jp>' -> 'Sky株式会社'
+    会社名抽出で使うパターンをまとめて前もってコンパイルしておくマッチャー。
+    キーワードリストは 1 本の正規表現（選択）にまとめ、1 回の search で判定する。
     """
-    f = (from_address or "").strip()
-
-    # 表示名 "xxx" <...>
-    m = re.search(r'^"([^"]+)"\s*<', f)
-    if m:
-        cand = _clean(m.group(1))
-    else:
-        # xxx <...>
-        m = re.search(r'^([^<]+)\s*<', f)
-        cand = _clean(m.group(1)) if m else ""
-
-    # 自分の名前っぽい/個人名っぽい/空は除外（完全ではないが被害軽減）
-    # ここは必要なら後で強化（ユーザ名がDBにあるなら比較するのがベスト）
-    if not cand:
-        return None
-    if re.search(r"[ぁ-んァ-ン一-龥]{2,4}", cand) and "株式会社" not in cand and "合同会社" not in cand:
-        # 日本語2〜4文字の短い個人名っぽいものは弾く（例: 星歩夢）
-        return None
-
-    return cand if _looks_like_company(cand) else None
+
+    def __init__(
+        self,
+        event_words: list[str],
+        ng_words: list[str],
+        legal_suffix: list[str],
+    ):
+        # イベント語 / NG ワードのどれかを含むか（any(w in s ...) 2 回分を 1 回で）
+        self._reject = re.compile(_alternation(event_words + ng_words))
+
+        # 1) 「株式会社◯◯ / ◯◯株式会社 / …」
+        legal_pat = r"(?:%s)" % "|".join(map(re.escape, legal_suffix))
+        # NOTE: rf 文字列なので {1,30} は量指定子ではなくタプル "(1, 30)" に展開される
+        #       （= 今の挙動では「株式会社X1, 30」のような文字列にしかマッチしない）。
+        #       ここを直すと抽出結果が変わるので、結果を変えない今回はそのままにしている。
+        self._legal = re.compile(rf"({legal_pat}[^\s　]{1,30}|[^\s　]{1,30}{legal_pat})")
+        # 3) 件名末尾の（会社名）
+        self._trailing_paren = re.compile(r"[（(]([^）)]+)[）)]\s*$")
+        # 4) 「— 会社名」「- 会社名」「ー 会社名」末尾
+        self._trailing_dash = re.compile(r"[—\-ー]\s*([^\s　]{2,40})\s*$")
+        # 5) 本文の「◯◯ 採用担当です」（長い本文で正規表現を回さないよう先に部分文字列で絞る）
+        self._signature = re.compile(r"([^\n]{2,40}?)(?:採用担当|採用チーム)です")
+        self._signature_words = ("採用担当です", "採用チームです")
+
+        # from_address 用
+        self._quoted_display = re.compile(r'^"([^"]+)"\s*<')
+        self._display = re.compile(r'^([^<]+)\s*<')
+        self._short_jp_name = re.compile(r"[ぁ-んァ-ン一-龥]{2,4}")
+
+    def clean(self, s: str) -> str:
+        s = (s or "").replace("\u3000", " ").strip()
+        # 余計な引用符
+        s = s.strip('"\'')
+
+        # 前後の装飾を落とす（よくある）
+        s = s.lstrip(_LEAD_DECO)
+        if s.endswith("\n"):
+            # 正規表現の $ と同じく、末尾の改行の直前の装飾も落とす
+            s = s[:-1].rstrip(_TRAIL_DECO) + "\n"
+        else:
+            s = s.rstrip(_TRAIL_DECO)
+        return s.strip()
+
+    def looks_like_company(self, s: str) -> bool:
+        s = self.clean(s)
+        if not s:
+            return False
+
+        # イベント語そのもの / 明らかに会社名じゃないワードは会社名ではない
+        if self._reject.search(s):
+            return False
+
+        # 長すぎ・短すぎ除外（雑だけど効く）
+        if len(s) < 2 or len(s) > 40:
+            return False
+
+        return True
+
+    def from_address_candidate(self, from_address: str) -> str | None:
+        """
+        例: '"星歩夢" <ayusyuukatu.2025@gmail.com>' -> '星歩夢'
+            'Sky株式会社 <recruit@skygroup.jp>' -> 'Sky株式会社'
+        """
+        f = (from_address or "").strip()
+
+        # 表示名 "xxx" <...>
+        m = self._quoted_display.search(f)
+        if m:
+            cand = self.clean(m.group(1))
+        else:
+            # xxx <...>
+            m = self._display.search(f)
+            cand = self.clean(m.group(1)) if m else ""
+
+        # 自分の名前っぽい/個人名っぽい/空は除外（完全ではないが被害軽減）
+        # ここは必要なら後で強化（ユーザ名がDBにあるなら比較するのがベスト）
+        if not cand:
+            return None
+        if self._short_jp_name.search(cand) and "株式会社" not in cand and "合同会社" not in cand:
+            # 日本語2〜4文字の短い個人名っぽいものは弾く（例: 星歩夢）
+            return None
+
+        return cand if self.looks_like_company(cand) else None
+
+    def extract(self, *, subject: str, body: str, from_address: str) -> str | None:
+        subject = self.clean(subject)
+        body = self.clean(body)
+        text = subject + "\n" + body
+
+        # 1) 「株式会社◯◯ / ◯◯株式会社 / 合同会社◯◯ / ◯◯合同会社」などを最優先
+        m = self._legal.search(text)
+        if m:
+            return self.clean(m.group(1))
+
+        # 2) 件名が「【…】会社名」 → 最後の 】 の “後ろ” を会社候補にする
+        #    例: 【会社説明会のご案内】サイバーエージェント
+        if "】" in subject:
+            after = self.clean(subject.split("】")[-1])
+            if self.looks_like_company(after):
+                return after
+
+        # 3) 件名末尾の（会社名）
+        #    例: 【選考案内】...（ライトハウスコンサルティング）
+        m = self._trailing_paren.search(subject)
+        if m:
+            cand = self.clean(m.group(1))
+            if self.looks_like_company(cand):
+                return cand
+
+        # 4) 「— 会社名」「- 会社名」「ー 会社名」末尾パターン
+        #    例: 【選考通過】面接のご案内 — 楽天株式会社
+        m = self._trailing_dash.search(subject)
+        if m:
+            cand = self.clean(m.group(1))
+            if self.looks_like_company(cand):
+                return cand
+
+        # 5) 本文の「◯◯ 採用担当です」「◯◯ 採用チームです」などから拾う
+        m = None
+        if any(w in body for w in self._signature_words):
+            m = self._signature.search(body)
+        if m:
+            cand = self.clean(m.group(1))
+            if self.looks_like_company(cand):
+                return cand
+
+        # 6) from_address（会社ドメインのメールだと強いが、個人名も混ざるので）最後の保険で使う
+        #    ここまで来たときだけ評価する
+        return self.from_address_candidate(from_address)
+
+
+# import 時に 1 回だけ組み立てる
+_matcher = CompanyNameMatcher(EVENT_WORDS, NG_WORDS, LEGAL_SUFFIX)
+
 
 def extract_company_name(*, subject: str, body: str, from_address: str) -> str | None:
-    subject = _clean(subject)
-    body = _clean(body)
-    text = subject + "\n" + body
-
-    # 0) from_address（会社ドメインのメールだと強いが、個人名も混ざるので最後寄り）
-    #    ※ここは最後のフォールバックに回す
-    from_cand = _extract_from_from_address(from_address)
-
-    # 1) 「株式会社◯◯ / ◯◯株式会社 / 合同会社◯◯ / ◯◯合同会社」などを最優先
-    legal_pat = r"(?:%s)" % "|".join(map(re.escape, LEGAL_SUFFIX))
-    m = re.search(rf"({legal_pat}[^\s　]{1,30}|[^\s　]{1,30}{legal_pat})", text)
-    if m:
-        return _clean(m.group(1))
-
-    # 2) 件名が「【…】会社名」 → 最後の 】 の “後ろ” を会社候補にする
-    #    例: 【会社説明会のご案内】サイバーエージェント
-    if "】" in subject:
-        after = _clean(subject.split("】")[-1])
-        if _looks_like_company(after):
-            return after
-
-    # 3) 件名末尾の（会社名）
-    #    例: 【選考案内】...（ライトハウスコンサルティング）
-    m = re.search(r"[（(]([^）)]+)[）)]\s*$", subject)
-    if m:
-        cand = _clean(m.group(1))
-        if _looks_like_company(cand):
-            return cand
-
-    # 4) 「— 会社名」「- 会社名」「ー 会社名」末尾パターン
-    #    例: 【選考通過】面接のご案内 — 楽天株式会社
-    m = re.search(r"[—\-ー]\s*([^\s　]{2,40})\s*$", subject)
-    if m:
-        cand = _clean(m.group(1))
-        if _looks_like_company(cand):
-            return cand
-
-    # 5) 本文の「◯◯ 採用担当です」「◯◯ 採用チームです」などから拾う
-    m = re.search(r"([^\n]{2,40}?)(?:採用担当|採用チーム)です", body)
-    if m:
-        cand = _clean(m.group(1))
-        if _looks_like_company(cand):
-            return cand
-
-    # 6) from_address を最後の保険で使う
-    if from_cand:
-        return from_cand
-
-    return None
+    return _matcher.extract(subject=subject, body=body, from_address=from_address)
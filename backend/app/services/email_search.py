@@ -0,0 +1,180 @@
+# backend/app/services/email_search.py
+"""
+保存済みメール（件名・差出人・スニペット・本文）の全文検索
+
+- 日本語は分かち書きせず、かな・漢字の連続を 2 文字ずつ（bigram）に切って索引語にする
+  英数字は単語ごと。トークン化はアプリ側でやるので SQLite / Postgres で同じ結果になる
+- SQLite: FTS5 の emails_fts（件名・本文と、持ち主の "u<user_id>" を入れた owner 列。rowid = emails.id）
+  owner も MATCH の条件にするので、ユーザーの絞り込みと bm25 の順位付けが索引の中で終わり、
+  emails を引くのは返す件数分だけ
+- Postgres: emails.search_tsv（件名 A / 本文 B の重み付き tsvector）+ GIN、ts_rank で並べる
+  （語はパーサを通さず array_to_tsvector / 'lexeme'::tsquery でそのまま入れる）
+- 検索語は bigram の AND。1 文字の漢字・かなと英数字の単語は前方一致
+- ほかの DB では索引を作らず、検索は常に空（index_emails は何もせず、search_emails は [] を返す）
+
+index_emails() は取り込み時（_upsert_emails / import_gmail）に新しいメールだけ呼ぶ。
+"""
+import re
+import unicodedata
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.email import SEARCH_FTS_TABLE, Email
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# かな・カナ・漢字の連続（長音記号・々 も含める）
+_CJK = "々぀-ヿ㐀-䶿一-鿿豈-﫿"
+_TOKEN_RE = re.compile(rf"(?P<cjk>[{_CJK}]+)|(?P<word>[^\W_{_CJK}]+)")
+
+# 件名は本文より重く数える（bm25 の列ごとの重み。owner は順位に効かせない）
+_FTS_WEIGHTS = "3.0, 1.0, 0.0"
+
+# 検索結果で返す列
+_RESULT_COLUMNS = "e.id, e.gmail_message_id, e.received_at, e.from_address, e.subject, e.snippet"
+
+
+# ============================
+# トークン化
+# ============================
+
+def _normalize(value: str) -> str:
+    # 全角英数・半角カナをそろえる
+    return unicodedata.normalize("NFKC", value).lower()
+
+
+def _scan(value: str) -> Iterable[tuple[str, str]]:
+    """(種類, 連続した文字列) を順に返す（種類は "cjk" / "word"）"""
+    for m in _TOKEN_RE.finditer(_normalize(value)):
+        yield m.lastgroup, m.group()
+
+
+def search_tokens(value: str | None) -> list[str]:
+    """索引に入れる語（出現順・重複あり）"""
+    if not value:
+        return []
+    tokens = []
+    for kind, run in _scan(value):
+        if kind == "cjk" and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _query_terms(query: str) -> list[tuple[str, bool]]:
+    """検索語 → (語, 前方一致か) のリスト（重複は除く）"""
+    terms: dict[str, bool] = {}
+    for kind, run in _scan(query):
+        if kind == "cjk" and len(run) > 1:
+            for i in range(len(run) - 1):
+                terms.setdefault(run[i:i + 2], False)
+        else:
+            terms[run] = True
+    return list(terms.items())
+
+
+def _owner_token(user_id: int) -> str:
+    return f"u{user_id}"
+
+
+def _document(email: Email) -> tuple[list[str], list[str]]:
+    """(件名の語, 差出人・スニペット・本文の語)"""
+    body = []
+    for value in (email.from_address, email.snippet, email.body_plain):
+        body.extend(search_tokens(value))
+    return search_tokens(email.subject), body
+
+
+# ============================
+# 索引の更新
+# ============================
+
+def index_emails(db: Session, emails: list[Email]) -> None:
+    """emails を検索インデックスに入れる（入れ直す）。commit は呼び出し側"""
+    if not emails:
+        return
+    dialect = db.get_bind().dialect.name
+    docs = [(email.id, email.user_id, *_document(email)) for email in emails]
+
+    if dialect == "sqlite":
+        db.execute(
+            text(
+                f"INSERT OR REPLACE INTO {SEARCH_FTS_TABLE} (rowid, subject, body, owner) "
+                "VALUES (:id, :subject, :body, :owner)"
+            ),
+            [
+                {"id": id_, "subject": " ".join(s), "body": " ".join(b), "owner": _owner_token(user_id)}
+                for id_, user_id, s, b in docs
+            ],
+        )
+    elif dialect == "postgresql":
+        db.execute(
+            text(
+                "UPDATE emails SET search_tsv = "
+                "setweight(array_to_tsvector(CAST(:subject AS text[])), 'A') || "
+                "setweight(array_to_tsvector(CAST(:body AS text[])), 'B') "
+                "WHERE id = :id"
+            ),
+            [
+                {"id": id_, "subject": sorted(set(s)), "body": sorted(set(b))}
+                for id_, _, s, b in docs
+            ],
+        )
+
+
+# ============================
+# 検索
+# ============================
+
+def search_emails(
+    db: Session,
+    user_id: int,
+    query: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    offset: int = 0,
+) -> list[dict]:
+    """
+    user_id のメールを全文検索して関連度順に返す（同点は後から取り込んだ順）
+
+    Returns:
+        {"id", "gmail_message_id", "received_at", "from_address", "subject", "snippet", "rank"}
+        の dict のリスト。rank は大きいほど関連が強い。検索語が空、または SQLite / Postgres 以外なら []
+    """
+    terms = _query_terms(query)
+    if not terms:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    params = {"user_id": user_id, "limit": limit, "offset": offset}
+
+    if dialect == "sqlite":
+        terms_expr = " AND ".join(f'"{t}"' + ("*" if prefix else "") for t, prefix in terms)
+        # 検索語は件名・本文だけに当てる（owner の "u1" などに当たらないように）
+        params["match"] = f'owner:"{_owner_token(user_id)}" AND {{subject body}}:({terms_expr})'
+        sql = (
+            f"SELECT {_RESULT_COLUMNS}, -hit.score AS rank "
+            f"FROM (SELECT rowid, bm25({SEARCH_FTS_TABLE}, {_FTS_WEIGHTS}) AS score "
+            f"      FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH :match "
+            "      ORDER BY score, rowid DESC LIMIT :limit OFFSET :offset) AS hit "
+            "JOIN emails e ON e.id = hit.rowid "
+            "ORDER BY hit.score, e.id DESC"
+        )
+    elif dialect == "postgresql":
+        params["tsquery"] = " & ".join(f"'{t}'" + (":*" if prefix else "") for t, prefix in terms)
+        sql = (
+            f"SELECT {_RESULT_COLUMNS}, ts_rank(e.search_tsv, q) AS rank "
+            "FROM emails e, CAST(:tsquery AS tsquery) AS q "
+            "WHERE e.user_id = :user_id AND e.search_tsv @@ q "
+            "ORDER BY rank DESC, e.id DESC "
+            "LIMIT :limit OFFSET :offset"
+        )
+    else:
+        # 索引が無い（index_emails も何もしない）ので、リクエストを 500 にせず「見つからない」で返す
+        print(f"email search: full-text search is not supported on {dialect}")
+        return []
+
+    return [dict(row._mapping) for row in db.execute(text(sql), params)]
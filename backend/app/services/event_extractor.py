@@ -0,0 +1,121 @@
+# backend/app/services/event_extractor.py
+"""
+メール本文 → event 情報の抽出（DB には触らない純粋な処理）
+
+- extract_event_fields(): 1 通分（同期の取り込みから呼ぶ）
+- parse_emails_batch(): (subject, body, from) のリストを ProcessPoolExecutor で並列に処理
+  （バックフィルや再解析で数千通をまとめて処理する用。GIL を避けてコア数に比例させる）
+
+ワーカープロセスでも import されるので、DB や Gmail API のモジュールは import しないこと。
+（処理時間のメトリクスはプロセスごとに溜まるので、/metrics に出るのは API プロセス内で解析した分だけ）
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import re
+
+from app.core.metrics import FAST_BUCKETS, Histogram
+from app.services.company_parser import extract_company_name
+
+JST = ZoneInfo("Asia/Tokyo")
+
+# 就活っぽいメールの判定キーワード（暫定ルール）
+RECRUITING_KEYWORDS = ["説明会", "面接", "選考", "インターン", "グループディスカッション", "GD"]
+
+_DATE_RE = re.compile(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})")
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+
+# parse_emails_batch で 1 タスクにまとめる件数（プロセス間のやりとりを減らす）
+DEFAULT_CHUNK_SIZE = 256
+
+DATE_EXTRACT_SECONDS = Histogram(
+    "extract_dates_seconds", "日付・時刻の正規表現にかかった時間（1 通あたり）", buckets=FAST_BUCKETS
+)
+COMPANY_EXTRACT_SECONDS = Histogram(
+    "extract_company_name_seconds", "extract_company_name にかかった時間（1 通あたり）", buckets=FAST_BUCKETS
+)
+
+
+def extract_event_fields(subject: str, body: str, from_address: str) -> tuple[str, dict | None]:
+    """
+    メール 1 通から event にする情報を取り出す
+
+    Returns:
+        (processing_status, {"title", "company_name", "start_at"} or None)
+    """
+    text = subject + "\n" + body
+
+    # 就活っぽいメールだけ対象にする（暫定ルール）
+    if not any(k in text for k in RECRUITING_KEYWORDS):
+        return "parsed", None
+
+    # -----------------------------
+    # ① 日付・時刻抽出（まずは今の簡易版）
+    # -----------------------------
+    with DATE_EXTRACT_SECONDS.time():
+        date_match = _DATE_RE.search(text)
+        time_match = _TIME_RE.search(text)
+    if not date_match or not time_match:
+        return "failed", None
+
+    y, m, d = map(int, date_match.groups())
+    hh, mm = map(int, time_match.groups())
+    try:
+        start_at = datetime(y, m, d, hh, mm, tzinfo=JST)
+    except ValueError:
+        # 2025/13/40 や 25:99 のような日付っぽいだけの文字列
+        return "failed", None
+
+    # -----------------------------
+    # ② 会社名抽出（ここが最重要の差し替えポイント）
+    # -----------------------------
+    with COMPANY_EXTRACT_SECONDS.time():
+        company = extract_company_name(subject=subject, body=body, from_address=from_address)
+
+    # -----------------------------
+    # ③ タイトル（必要なら会社名を付け足す）
+    # -----------------------------
+    title = subject or "面接/説明会"
+
+    return "parsed", {"title": title, "company_name": company, "start_at": start_at}
+
+
+def _extract_chunk(items: list[tuple[str, str, str]]) -> list[tuple[str, dict | None]]:
+    """ワーカープロセス側で 1 チャンク分を処理する"""
+    return [extract_event_fields(subject, body, from_address) for subject, body, from_address in items]
+
+
+def parse_emails_batch(
+    items: list[tuple[str, str, str]],
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Executor | None = None,
+) -> list[tuple[str, dict | None]]:
+    """
+    (subject, body, from_address) のリストをまとめて解析する
+
+    Args:
+        items: 解析するメール（None ではなく "" を渡すこと）
+        max_workers: プロセス数（None なら CPU 数。1 ならこのプロセスで直接処理）
+        chunk_size: 1 タスクあたりの件数
+        executor: 使い回す Executor（ページごとに呼ぶときにプロセスを作り直さない）
+
+    Returns:
+        items と同じ順序の (processing_status, fields or None)
+    """
+    if not items:
+        return []
+
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    if executor is None and (max_workers == 1 or len(chunks) == 1):
+        # プロセスを立てるほどの量ではない
+        return _extract_chunk(items)
+
+    if executor is not None:
+        results = executor.map(_extract_chunk, chunks)
+        return [r for chunk in results for r in chunk]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_extract_chunk, chunks)
+        return [r for chunk in results for r in chunk]
@@ -0,0 +1,94 @@
+# backend/app/services/event_pages.py
+"""
+events の keyset ページング
+
+(start_at, id) の順に並べ、前ページ最後の (start_at, id) より後ろだけを読む。
+OFFSET と違って何ページ目でも ix_events_user_id_start_at_id を範囲スキャンするだけで済む。
+
+cursor は "start_at(ISO)|id" を base64url にした不透明な文字列。
+"""
+import base64
+import binascii
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+
+JST = ZoneInfo("Asia/Tokyo")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """cursor が壊れている／このアプリが出したものではない"""
+
+
+def _to_jst(dt: datetime) -> datetime:
+    # start_at は JST で保存している（SQLite は tz を持たないので壁時計の比較になる）
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=JST)
+    return dt.astimezone(JST)
+
+
+def encode_cursor(event: Event) -> str:
+    raw = f"{_to_jst(event.start_at).isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        start_at, event_id = raw.rsplit("|", 1)
+        return _to_jst(datetime.fromisoformat(start_at)), int(event_id)
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}") from e
+
+
+def list_events_page(
+    db: Session,
+    user_id: int,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    event_ids: list[int] | None = None,
+) -> tuple[list[Event], str | None]:
+    """
+    ユーザーの events を (start_at, id) 順に 1 ページ分返す。
+
+    Args:
+        date_from: start_at >= date_from（tz なしは JST とみなす）
+        date_to: start_at < date_to
+        limit: 1 ページの件数（MAX_PAGE_SIZE で頭打ち）
+        cursor: 前ページの next_cursor
+        event_ids: 指定したら その id の events だけ（同期で変わった events 用）
+
+    Returns:
+        (events, next_cursor)。続きが無ければ next_cursor は None
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = db.query(Event).filter(Event.user_id == user_id)
+    if event_ids is not None:
+        if not event_ids:
+            return [], None
+        query = query.filter(Event.id.in_(event_ids))
+    if date_from is not None:
+        query = query.filter(Event.start_at >= _to_jst(date_from))
+    if date_to is not None:
+        query = query.filter(Event.start_at < _to_jst(date_to))
+    if cursor:
+        after_start_at, after_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Event.start_at, Event.id) > tuple_(after_start_at, after_id))
+
+    # 1 件多く読んで、次のページがあるかを判定する
+    events = query.order_by(Event.start_at, Event.id).limit(limit + 1).all()
+    if len(events) <= limit:
+        return events, None
+    events = events[:limit]
+    return events, encode_cursor(events[-1])
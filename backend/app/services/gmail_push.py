@@ -0,0 +1,299 @@
+# backend/app/services/gmail_push.py
+"""
+Gmail のプッシュ通知（users.watch → Cloud Pub/Sub の push サブスクリプション → POST /api/gmail/push）
+
+- 通知の中身は {"emailAddress", "historyId"} だけ。emailAddress からユーザーを引き
+  （watch を張ったときの getProfile の値。まだ無ければログインのメールアドレス）、そのユーザーだけ差分同期を積む
+- 1 通届くだけで通知が何回も来る（ラベル変更・既読なども来る）ので、PushDebouncer で
+  最初の通知から GMAIL_PUSH_DEBOUNCE_SECONDS のあいだの通知を 1 回の同期にまとめる
+- 積む直前に historyId を同期済みのチェックポイントと比べ、同期済みなら積まない。
+  同期が走っている最中なら、その同期は通知より前の history を読んでいるかもしれないので、
+  もう 1 窓待ってから比べ直す（queued のジョブにはそのまま合流する）
+- watch は 7 日で切れるので、WatchRenewer のスレッドが期限の GMAIL_WATCH_RENEW_BEFORE_SECONDS 前に張り直す
+  （まだ張っていないユーザーもここで張る。取った行には先に印を付けるので、複数プロセスで動かしても重ならない）
+
+debounce はプロセスごと。Pub/Sub が別プロセスに通知を配っても、同じユーザーの同期は enqueue_sync_job で 1 本にまとまる。
+
+Pub/Sub 無しで試すときは benchmarks/send_push.py で偽の通知を POST する。
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import base64
+import json
+import threading
+import time
+import traceback
+
+from sqlalchemy import exists, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.metrics import CallbackMetric, Counter
+from app.core.settings import (
+    GMAIL_PUSH_DEBOUNCE_SECONDS,
+    GMAIL_PUSH_TOPIC,
+    GMAIL_WATCH_RENEW_BEFORE_SECONDS,
+)
+from app.database import SessionLocal
+from app.gmail_client import client_for_user
+from app.gmail_quota import BACKGROUND, gmail_lane
+from app.gmail_service import get_profile, watch_mailbox
+from app.models.gmail_sync_state import GmailSyncState
+from app.models.gmail_token import GmailToken
+from app.models.user import User
+from app.services.recruiting import label_ids_for
+from app.services.sync_jobs import _get_active_job, _is_stale, enqueue_sync_job
+from app.services.sync_leases import claim_lock, skip_locked
+
+JST = ZoneInfo("Asia/Tokyo")
+
+# label_ids の設定が無いユーザーの watch の対象（送信・下書きなどの変更では通知させない）
+DEFAULT_WATCH_LABEL_IDS = ["INBOX"]
+# 張り直しが必要な行を探す間隔（秒）と、1 回に張る件数（watch は 100 unit）
+WATCH_RENEW_INTERVAL = 300.0
+WATCH_RENEW_BATCH = 50
+# 張れなかったユーザーをやり直すまでの時間（秒）
+WATCH_RETRY_SECONDS = 3600
+
+PUSH_NOTIFICATIONS = Counter(
+    "gmail_push_notifications_total",
+    "受け取ったプッシュ通知（accepted / coalesced / unknown_user / invalid）",
+    ["result"],
+)
+PUSH_SYNCS = Counter(
+    "gmail_push_syncs_total",
+    "通知をまとめたあとの扱い（enqueued / up_to_date / deferred）",
+    ["result"],
+)
+WATCH_RENEWALS = Counter("gmail_watch_renewals_total", "users.watch の張り直し（ok / failed）", ["result"])
+
+
+# ============================
+# 通知の受け取り
+# ============================
+
+def decode_push_data(data: str) -> tuple[str, int]:
+    """Pub/Sub メッセージの data（base64 の JSON）から (emailAddress（小文字）, historyId)。形が違えば ValueError"""
+    try:
+        payload = json.loads(base64.b64decode(data))
+        return str(payload["emailAddress"]).strip().lower(), int(payload["historyId"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"invalid Gmail push data: {e}") from e
+
+
+def user_ids_for_email(db: Session, email: str) -> list[int]:
+    """通知の emailAddress のユーザー（同じ Gmail を複数のユーザーがつないでいれば全員）"""
+    user_ids = [
+        user_id
+        for (user_id,) in db.query(GmailSyncState.user_id).filter(GmailSyncState.watch_email == email).all()
+    ]
+    if user_ids:
+        return user_ids
+    # watch を張る前（watch_email がまだ無い）ならログインのメールアドレスで引く
+    return [user_id for (user_id,) in db.query(User.id).filter(User.email == email).all()]
+
+
+def handle_push(db: Session, data: str) -> str:
+    """通知 1 件を debouncer に渡す。結果（accepted / coalesced / unknown_user / invalid）を返す"""
+    try:
+        email, history_id = decode_push_data(data)
+    except ValueError as e:
+        print(f"gmail push: {e}")
+        result = "invalid"
+    else:
+        user_ids = user_ids_for_email(db, email)
+        if not user_ids:
+            result = "unknown_user"
+        else:
+            accepted = [debouncer.notify(user_id, history_id) for user_id in user_ids]
+            result = "accepted" if any(accepted) else "coalesced"
+    PUSH_NOTIFICATIONS.labels(result).inc()
+    return result
+
+
+def enqueue_push_syncs(db: Session, due: dict[int, int]) -> dict[int, int]:
+    """
+    まとめ終わった {user_id: 通知の最大 historyId} の同期を積む。
+    同期中で後回しにしたもの（同じ形の dict）を返す
+    """
+    checkpoints = dict(
+        db.query(GmailSyncState.user_id, GmailSyncState.history_id)
+        .filter(GmailSyncState.user_id.in_(list(due)))
+        .all()
+    )
+    deferred = {}
+    for user_id, history_id in due.items():
+        checkpoint = checkpoints.get(user_id)
+        if checkpoint and history_id <= int(checkpoint):
+            PUSH_SYNCS.labels("up_to_date").inc()
+            continue
+        job = _get_active_job(db, user_id)
+        if job is not None and job.status == "running" and not _is_stale(db, job):
+            deferred[user_id] = history_id
+            PUSH_SYNCS.labels("deferred").inc()
+            continue
+        enqueue_sync_job(db, user_id)
+        PUSH_SYNCS.labels("enqueued").inc()
+    return deferred
+
+
+class PushDebouncer:
+    """
+    ユーザーごとに最初の通知から window 秒待ち、そのあいだの通知を 1 回の同期にまとめるスレッド（最初の通知で起動）。
+    窓は延ばさない（通知が続いても最初の通知から window 秒で積む）
+    """
+
+    def __init__(self, window: float = GMAIL_PUSH_DEBOUNCE_SECONDS):
+        self.window = window
+        # user_id -> [積む時刻（monotonic）, 通知の最大 historyId]。
+        # 窓の長さが一定なので、入れた順 = 積む時刻の順（先頭から見ればよい）
+        self._pending: dict[int, list] = {}
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def notify(self, user_id: int, history_id: int) -> bool:
+        """通知を受け付ける。待っている同期にまとめたら False"""
+        with self._cond:
+            entry = self._pending.get(user_id)
+            if entry is not None:
+                entry[1] = max(entry[1], history_id)
+                return False
+            self._pending[user_id] = [time.monotonic() + self.window, history_id]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="gmail-push-debouncer", daemon=True)
+                self._thread.start()
+            if len(self._pending) == 1:
+                self._cond.notify()
+        return True
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _take_due(self) -> dict[int, int]:
+        """積む時刻になったものを取り出す（無ければ次の時刻まで待つ）"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = {}
+                for user_id, (due_at, history_id) in self._pending.items():
+                    if due_at > now:
+                        break
+                    due[user_id] = history_id
+                if due:
+                    for user_id in due:
+                        del self._pending[user_id]
+                    return due
+                first = next(iter(self._pending.values()), None)
+                self._cond.wait(None if first is None else first[0] - now)
+
+    def _run(self) -> None:
+        while True:
+            due = self._take_due()
+            db: Session = SessionLocal()
+            try:
+                deferred = enqueue_push_syncs(db, due)
+            except Exception:
+                traceback.print_exc()
+                deferred = {}
+            finally:
+                db.close()
+            for user_id, history_id in deferred.items():
+                self.notify(user_id, history_id)
+
+
+debouncer = PushDebouncer()
+
+CallbackMetric("gmail_push_pending", "まとめている最中のユーザー数", debouncer.pending)
+
+
+# ============================
+# watch の張り直し
+# ============================
+
+def renew_watch(db: Session, state: GmailSyncState) -> None:
+    """1 ユーザー分の users.watch を張り（直し）て、emailAddress と期限を書く"""
+    user_id = state.user_id
+    try:
+        client = client_for_user(user_id)
+        with gmail_lane(BACKGROUND):
+            profile = get_profile(user_id, client=client)
+            resp = watch_mailbox(
+                user_id, GMAIL_PUSH_TOPIC, label_ids_for(state) or DEFAULT_WATCH_LABEL_IDS, client=client
+            )
+    except Exception as e:
+        state.watch_error = f"{type(e).__name__}: {e}"
+        db.commit()
+        WATCH_RENEWALS.labels("failed").inc()
+        print(f"gmail watch failed for user {user_id}: {state.watch_error}")
+        return
+
+    state.watch_email = profile["emailAddress"].strip().lower()
+    state.watch_expires_at = datetime.fromtimestamp(int(resp["expiration"]) / 1000, JST)
+    state.watch_error = None
+    db.commit()
+    WATCH_RENEWALS.labels("ok").inc()
+
+
+def renew_expiring_watches(db: Session, now: datetime, limit: int = WATCH_RENEW_BATCH) -> int:
+    """
+    期限が近い（まだ張っていない）ユーザーの watch を limit 件まで張り直す。張ろうとした件数を返す。
+    GmailToken の無いユーザーと、失敗して WATCH_RETRY_SECONDS 経っていないユーザーは飛ばす
+    """
+    renew_before = now + timedelta(seconds=GMAIL_WATCH_RENEW_BEFORE_SECONDS)
+    retry_before = now - timedelta(seconds=WATCH_RETRY_SECONDS)
+    # 取った行は watch_attempted_at を先に書く（ほかのプロセスが同じ行を取らない。落ちても WATCH_RETRY_SECONDS 後にやり直す）
+    with claim_lock(db):
+        ids = [
+            state_id
+            for (state_id,) in skip_locked(
+                db,
+                db.query(GmailSyncState.id)
+                .filter(
+                    exists().where(GmailToken.user_id == GmailSyncState.user_id),
+                    or_(GmailSyncState.watch_expires_at.is_(None), GmailSyncState.watch_expires_at < renew_before),
+                    or_(GmailSyncState.watch_attempted_at.is_(None), GmailSyncState.watch_attempted_at < retry_before),
+                )
+                .order_by(GmailSyncState.watch_expires_at.is_not(None), GmailSyncState.watch_expires_at)
+                .limit(limit),
+            ).all()
+        ]
+        if ids:
+            db.execute(
+                update(GmailSyncState).where(GmailSyncState.id.in_(ids)).values(watch_attempted_at=now)
+            )
+        db.commit()
+
+    for state in db.query(GmailSyncState).filter(GmailSyncState.id.in_(ids)).all():
+        renew_watch(db, state)
+    return len(ids)
+
+
+class WatchRenewer:
+    """WATCH_RENEW_INTERVAL ごとに renew_expiring_watches を回すスレッド（溜まっている間は続けて回す）"""
+
+    def __init__(self, interval: float = WATCH_RENEW_INTERVAL):
+        self.interval = interval
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="gmail-watch-renewer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            renewed = 0
+            db: Session = SessionLocal()
+            try:
+                renewed = renew_expiring_watches(db, datetime.now(JST))
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.close()
+            if renewed < WATCH_RENEW_BATCH:
+                self._stopping.wait(self.interval)
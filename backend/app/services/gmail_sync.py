@@ -1,22 +1,67 @@
 # backend/app/services/gmail_sync.py
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
 from hashlib import sha256
 from email.utils import parsedate_to_datetime
+import time
 
-from sqlalchemy.orm import Session
+from sqlalchemy import insert as sa_insert, inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
 
-from app.models.email import Email
+from app.core.db_timing import track_db_time
+from app.core.etag import bump_data_version
+from app.core.metrics import Counter, Histogram
+from app.core.settings import GMAIL_TWO_PHASE_FETCH
+from app.models.email import Email, compress_body, decompress_body
 from app.models.event import Event
-from app.gmail_service import get_emails  # ★ ここを get_emails に
-from app.services.company_parser import extract_company_name
+from app.models.gmail_sync_state import GmailSyncState
+from app.gmail_client import client_for_user
+from app.gmail_quota import BACKGROUND, gmail_lane
+from app.gmail_service import (
+    HistoryExpiredError,
+    get_current_history_id,
+    get_emails_by_ids,
+    get_emails_metadata_first,
+    get_history_message_ids,
+    list_message_ids,
+)
+from app.services.email_search import index_emails
+from app.services.event_extractor import extract_event_fields, parse_emails_batch
+from app.services.recruiting import label_ids_for, make_candidate_filter, query_for
 
 JST = ZoneInfo("Asia/Tokyo")
 
-
-
+# チェックポイントが無い／期限切れのときに取り込む最新メール数
+FULL_SYNC_MAX_RESULTS = 50
+
+# 1 トランザクションで保存・解析するメール数
+INGEST_BATCH_SIZE = 500
+
+# history で増えたメールを検索条件と突き合わせるときに messages.list で見る件数（1 ページ）
+HISTORY_QUERY_CHECK_MAX = 500
+# 突き合わせの一覧を「前回の同期以降」に絞るときの余裕（届いた時刻と同期の時刻のずれ）
+HISTORY_QUERY_MARGIN = timedelta(days=1)
+
+SYNC_SECONDS = Histogram(
+    "gmail_sync_duration_seconds", "Gmail 同期 1 回の所要時間（段階別）", ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+SYNC_DB_SECONDS = Histogram(
+    "gmail_sync_db_seconds", "Gmail 同期 1 回のうち SQL 実行にかかった時間",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SYNC_DB_QUERIES = Counter("gmail_sync_db_queries_total", "Gmail 同期で実行した SQL の数")
+SYNCS = Counter("gmail_syncs_total", "Gmail 同期の実行回数", ["result"])
+SYNC_ITEMS = Counter(
+    "gmail_sync_items_total",
+    "Gmail 同期の件数の累計（fetched / bodies / parsed / matched / events_created）",
+    ["kind"],
+)
 
 
 def _parse_gmail_date(date_str: str | None) -> datetime:
@@ -36,152 +81,448 @@ def _parse_gmail_date(date_str: str | None) -> datetime:
         return dt.astimezone(JST)
 
 
-def sync_gmail_messages(db: Session, user_id: int) -> list[Event]:
+def sync_gmail_messages(
+    db: Session,
+    user_id: int,
+    progress: Callable[[dict], None] | None = None,
+) -> list[int]:
     """
-    1. Gmail API からメッセージ一覧を取得（get_emails）
+    1. Gmail API からメッセージ一覧を取得（前回の historyId 以降の差分 or 最新 50 件）
     2. emails テーブルに upsert
     3. processing_status='queued' のメールから events を生成
+    4. 次回用に historyId を保存
+
+    Returns:
+        この同期で作成/更新した event の id（昇順）。一覧は event_pages でページングして返す
+
+    progress を渡すと {"fetched", "parsed", "matched", "events_created"} の件数が
+    取得後とバッチを commit するごとに通知される（同期ジョブの進捗表示用）。
     """
+    started = time.perf_counter()
+    # 同期は裏の処理なので、画面からの Gmail 呼び出しにクォータを譲る
+    with track_db_time() as db_time, gmail_lane(BACKGROUND):
+        try:
+            changed, stats = _run_sync(db, user_id, progress)
+        except Exception:
+            SYNCS.labels("error").inc()
+            raise
+        finally:
+            SYNC_SECONDS.labels("total").observe(time.perf_counter() - started)
+            SYNC_DB_SECONDS.observe(db_time.seconds)
+            SYNC_DB_QUERIES.inc(db_time.queries)
+
+    SYNCS.labels("ok").inc()
+    for kind, n in stats.items():
+        SYNC_ITEMS.labels(kind).inc(n)
+
+    return sorted(changed)
+
+
+def _run_sync(
+    db: Session,
+    user_id: int,
+    progress: Callable[[dict], None] | None,
+) -> tuple[set[int], dict]:
+    stats = {"fetched": 0, "parsed": 0, "matched": 0, "events_created": 0}
+    changed: set[int] = set()
+
     # ==== ① Gmail からメッセージ一覧 ====
-    # get_emails は user_id を文字列として扱っているので str() しておく
-    gmail_messages = get_emails(str(user_id), max_results=50)
-
-    for gm in gmail_messages:
-        # gm: dict
-        #   - gm["id"], gm["date"], gm["from"], gm["subject"], gm["snippet"], gm["body"]
-        email = _upsert_email(db, user_id, gm)
-
-        if email.processing_status == "queued":
-            _parse_email_to_event(db, user_id, email)
-
-    # 最後にユーザーのイベント一覧を返す
-    events = (
-        db.query(Event)
-        .filter(Event.user_id == user_id)
-        .order_by(Event.start_at)
-        .all()
+    state = get_sync_state(db, user_id)
+    with SYNC_SECONDS.labels("fetch").time():
+        gmail_messages, history_id = _fetch_new_messages(user_id, state)
+
+    stats["fetched"] = len(gmail_messages)
+    # 本文まで取ったメール数（2 段階取得の効き具合）
+    stats["bodies"] = sum(1 for gm in gmail_messages if gm["body"] is not None)
+    if progress:
+        progress(stats)
+
+    # ==== ② ③ INGEST_BATCH_SIZE 件ごとにまとめて保存・解析し、1 回だけ commit ====
+    for start in range(0, len(gmail_messages), INGEST_BATCH_SIZE):
+        batch = gmail_messages[start:start + INGEST_BATCH_SIZE]
+        with SYNC_SECONDS.labels("store").time():
+            emails = _upsert_emails(db, user_id, batch)
+
+        queued = [e for e in emails if e.processing_status == "queued"]
+        changed_before = len(changed)
+        with SYNC_SECONDS.labels("parse").time():
+            created, matched = _parse_emails_to_events(db, user_id, queued, changed=changed)
+        stats["events_created"] += created
+        stats["matched"] += matched
+        stats["parsed"] += len(queued)
+        if len(changed) > changed_before:
+            bump_data_version(db, user_id)
+
+        db.commit()
+        if progress:
+            progress(stats)
+
+    # 全件処理できたときだけチェックポイントを進める
+    state.history_id = history_id
+    state.fetched_total += stats["fetched"]
+    state.matched_total += stats["matched"]
+    db.commit()
+
+    return changed, stats
+
+
+def get_sync_state(db: Session, user_id: int) -> GmailSyncState:
+    """ユーザーの同期チェックポイントを取得（無ければ作る）"""
+    state = db.query(GmailSyncState).filter_by(user_id=user_id).first()
+    if state is None:
+        state = GmailSyncState(user_id=user_id)
+        db.add(state)
+        try:
+            # Gmail 取得中に書き込みトランザクションを開いたままにしない
+            db.commit()
+        except IntegrityError:
+            # 同じユーザーの取り込み／同期が同時に作った → そちらを使う
+            db.rollback()
+            state = db.query(GmailSyncState).filter_by(user_id=user_id).one()
+    return state
+
+
+def _fetch_new_messages(user_id: int, state: GmailSyncState) -> tuple[list[dict], str]:
+    """
+    前回の historyId があれば history API で差分だけ取得する（変化なしなら 1 リクエスト）。
+    差分で増えたメールは _filter_by_query でユーザーの検索条件に当たるものだけにする。
+    チェックポイントが無い／期限切れなら、ユーザーの検索条件（就活キーワードなど）に
+    当たる最新 FULL_SYNC_MAX_RESULTS 件を取得する。
+    本文は GMAIL_TWO_PHASE_FETCH なら就活メールっぽいものだけ取る（_get_messages）。
+
+    Returns:
+        (メール dict のリスト, 次回の起点にする historyId)
+    """
+    client = client_for_user(user_id)
+    label_ids = label_ids_for(state)
+
+    if state.history_id:
+        try:
+            message_ids, history_id = get_history_message_ids(
+                user_id,
+                state.history_id,
+                client=client,
+                label_id=label_ids[0] if len(label_ids) == 1 else None,
+            )
+            message_ids = _filter_by_query(user_id, message_ids, state, client)
+            return _get_messages(user_id, message_ids, state, client), history_id
+        except HistoryExpiredError:
+            print(f"historyId {state.history_id} expired for user {user_id}, full sync")
+
+    # 一覧取得より前の historyId を押さえておけば、その間に届いたメールも次回拾える
+    history_id = get_current_history_id(user_id, client=client)
+    message_ids = list_message_ids(
+        user_id,
+        max_results=FULL_SYNC_MAX_RESULTS,
+        client=client,
+        query=query_for(state),
+        label_ids=label_ids,
     )
-    return events
+    state.last_full_sync_at = datetime.now(JST)
+    return _get_messages(user_id, message_ids, state, client), history_id
 
 
-def _upsert_email(db: Session, user_id: int, gm: dict) -> Email:
+def _filter_by_query(user_id: int, message_ids: list[str], state: GmailSyncState, client) -> list[str]:
     """
-    Gmail から取得した 1 通のメール(gm)を emails テーブルに保存 or 更新
+    history.list は q を受け付けない（labelId も 1 つだけ）ので、差分で増えたメールのうち
+    ユーザーの検索条件（query_for / label_ids_for）に当たるものだけ残す。
+    同じ条件の messages.list を前回の同期以降（after:）に絞って 1 ページ取り、突き合わせる。
+    一覧が 1 ページに収まらなかったときは判定できないので絞らない
     """
-    gmail_message_id = gm["id"]
-    received_at = _parse_gmail_date(gm.get("date"))
+    if not message_ids:
+        return message_ids
+
+    query = query_for(state)
+    # updated_at は同期のたびに進む（変化が無ければ古いまま = 一覧が広くなるだけなので安全側）
+    if state.updated_at is not None:
+        since = state.updated_at.replace(tzinfo=timezone.utc) - HISTORY_QUERY_MARGIN
+        query = f"{query} after:{int(since.timestamp())}"
+    matched = list_message_ids(
+        user_id,
+        max_results=HISTORY_QUERY_CHECK_MAX,
+        client=client,
+        query=query,
+        label_ids=label_ids_for(state),
+    )
+    if len(matched) >= HISTORY_QUERY_CHECK_MAX:
+        return message_ids
+    matched_ids = set(matched)
+    return [message_id for message_id in message_ids if message_id in matched_ids]
 
-    email = (
-        db.query(Email)
-        .filter(
-            Email.user_id == user_id,
-            Email.gmail_message_id == gmail_message_id,
-        )
-        .first()
+
+def _get_messages(user_id: int, message_ids: list[str], state: GmailSyncState, client) -> list[dict]:
+    """
+    メール本体を取得する。
+    2 段階取得なら、まず全件 format=metadata で取り、候補だけ本文まで取る
+    （候補でないメールは body=None のまま保存し、解析では subject だけを見る）。
+    """
+    if not GMAIL_TWO_PHASE_FETCH:
+        return get_emails_by_ids(user_id, message_ids, client=client)
+    return get_emails_metadata_first(
+        user_id, message_ids, make_candidate_filter(state), client=client
     )
 
-    if email is None:
-        email = Email(
-            user_id=user_id,
-            gmail_message_id=gmail_message_id,
-            received_at=received_at,
-            from_address=gm.get("from"),
-            subject=gm.get("subject"),
-            snippet=gm.get("snippet"),
-            body_plain=gm.get("body"),
-            processing_status="queued",
-        )
-        db.add(email)
+
+def _email_insert(db: Session):
+    """
+    方言ごとの INSERT（ON CONFLICT DO NOTHING が使えるなら使う）
+
+    ON CONFLICT が効くのは emails (user_id, gmail_message_id) の一意インデックス
+    uq_emails_user_id_gmail_message_id（migration 0002 / models/email.py）があるから。
+    0002 より前の DB では衝突にならず重複行が入るので、先に alembic upgrade head しておく（0002 が既存の重複も片付ける）
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
     else:
+        return sa_insert(Email)
+    return insert(Email).on_conflict_do_nothing()
+
+
+def _upsert_emails(db: Session, user_id: int, gms: list[dict]) -> list[Email]:
+    """
+    Gmail から取得したメール(gm)のリストを emails テーブルにまとめて保存 or 更新
+
+    - 既存の gmail_message_id は IN で 1 回だけ問い合わせる
+    - 新しいメールは複数行 INSERT 1 回（同時実行で先に入っていたら ON CONFLICT で無視。一意インデックスは _email_insert を参照）
+    - commit はしない（呼び出し側がバッチ単位で行う）
+
+    Returns:
+        gms と同じ順序の Email（重複 ID は 1 つにまとめる）
+    """
+    by_id: dict[str, dict] = {}
+    for gm in gms:
+        by_id.setdefault(gm["id"], gm)
+    if not by_id:
+        return []
+
+    emails = _load_emails(db, user_id, list(by_id))
+
+    for gmail_message_id, email in emails.items():
         # 必要に応じて更新（件名やスニペットが変わることはほぼないけど一応）
+        gm = by_id[gmail_message_id]
         email.snippet = gm.get("snippet") or email.snippet
         email.subject = gm.get("subject") or email.subject
 
-    db.commit()
-    db.refresh(email)
-    return email
+    rows = [
+        {
+            "user_id": user_id,
+            "gmail_message_id": gmail_message_id,
+            "received_at": _parse_gmail_date(gm.get("date")),
+            "from_address": gm.get("from"),
+            "subject": gm.get("subject"),
+            "snippet": gm.get("snippet"),
+            "body_zlib": compress_body(gm.get("body")),
+            "processing_status": "queued",
+        }
+        for gmail_message_id, gm in by_id.items()
+        if gmail_message_id not in emails
+    ]
+    if rows:
+        db.execute(_email_insert(db).values(rows))
+        # 入れたばかりのメールは索引と解析で本文を使うので、本文ごと引き直す
+        inserted = _load_emails(db, user_id, [r["gmail_message_id"] for r in rows], with_body=True)
+        # 新しく入ったメールだけ全文検索の索引に足す
+        index_emails(db, list(inserted.values()))
+        emails.update(inserted)
+
+    return [emails[gmail_message_id] for gmail_message_id in by_id if gmail_message_id in emails]
+
+
+def _load_emails(
+    db: Session, user_id: int, gmail_message_ids: list[str], with_body: bool = False
+) -> dict[str, Email]:
+    """gmail_message_id -> Email を 1 クエリで引く（with_body なら圧縮した本文も一緒に読む）"""
+    q = db.query(Email).filter(
+        Email.user_id == user_id,
+        Email.gmail_message_id.in_(gmail_message_ids),
+    )
+    if with_body:
+        q = q.options(undefer(Email.body_zlib))
+    return {e.gmail_message_id: e for e in q.all()}
 
-def _parse_email_to_event(db: Session, user_id: int, email: Email) -> None:
+
+def _load_bodies(db: Session, emails: list[Email]) -> None:
     """
-    emails テーブルに保存された 1 通のメールから、events を 0 or 1 件生成/更新
+    本文をまだ読んでいない Email（取り込み済みで queued / failed のまま残っていたもの）の本文を 1 クエリで読む。
+    body_zlib は deferred なので、そのまま body_plain を読むと 1 通ごとに SELECT が出る
     """
-    subject = email.subject or ""
-    body = email.body_plain or ""
-    text = subject + "\n" + body
+    ids = [e.id for e in emails if "body_zlib" in inspect(e).unloaded]
+    if ids:
+        db.query(Email).filter(Email.id.in_(ids)).options(undefer(Email.body_zlib)).all()
 
-    # 就活っぽいメールだけ対象にする（暫定ルール）
-    if not any(k in text for k in ["説明会", "面接", "選考", "インターン", "グループディスカッション", "GD"]):
-        email.processing_status = "parsed"
-        db.commit()
-        return
-
-    # -----------------------------
-    # ① 日付・時刻抽出（まずは今の簡易版）
-    # -----------------------------
-    date_match = re.search(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})", text)
-    time_match = re.search(r"(\d{1,2}):(\d{2})", text)
-    if not date_match or not time_match:
-        email.processing_status = "failed"
-        db.commit()
-        return
-
-    y, m, d = map(int, date_match.groups())
-    hh, mm = map(int, time_match.groups())
-    start_at = datetime(y, m, d, hh, mm, tzinfo=JST)
 
-    # -----------------------------
-    # ② 会社名抽出（ここが最重要の差し替えポイント）
-    # -----------------------------
-    from_address = email.from_address or ""
-    company = extract_company_name(subject=subject, body=body, from_address=from_address)
+def _dedup_hash(user_id: int, fields: dict) -> str:
+    """dedup_hash（重複登録防止）"""
+    base = f"{user_id}|{fields['company_name']}|{fields['title']}|{fields['start_at'].isoformat()}"
+    return sha256(base.encode("utf-8")).hexdigest()
 
-    # company が取れない場合の保険（NoneのままでOKなら不要）
-    if company is None:
-        company = None
 
-    # -----------------------------
-    # ③ タイトル（必要なら会社名を付け足す）
-    # -----------------------------
-    title = subject or "面接/説明会"
+def _parse_emails_to_events(
+    db: Session,
+    user_id: int,
+    emails: list[Email],
+    changed: set[int] | None = None,
+) -> tuple[int, int]:
+    """
+    emails テーブルに保存されたメールから、events を 0 or 1 件ずつ生成/更新
+    （既存 event は dedup_hash の IN 1 回で引く。commit は呼び出し側）
+    changed を渡すと、作成/更新した event の id を追加する。
 
-    # -----------------------------
-    # ④ dedup_hash（重複登録防止）
-    # -----------------------------
-    base = f"{user_id}|{company}|{title}|{start_at.isoformat()}"
-    dedup_hash = sha256(base.encode("utf-8")).hexdigest()
+    Returns:
+        (新しく作成した event の数, event 情報が取れたメールの数)
+    """
+    _load_bodies(db, emails)
+    extracted = []
+    for email in emails:
+        status, fields = extract_event_fields(
+            email.subject or "", email.body_plain or "", email.from_address or ""
+        )
+        email.processing_status = status
+        if fields is not None:
+            extracted.append((email.id, fields))
 
-    now = datetime.now(JST)
+    created = _apply_event_fields(db, user_id, extracted, changed=changed)
+    return created, len(extracted)
 
-    ev = (
-        db.query(Event)
-        .filter(Event.user_id == user_id, Event.dedup_hash == dedup_hash)
-        .first()
-    )
 
-    if ev is None:
-        ev = Event(
-            user_id=user_id,
-            email_id=email.id,
-            company_name=company,
-            title=title,
-            event_type="interview",  # 後で賢くする
-            start_at=start_at,
-            end_at=None,
-            location=None,
-            memo=None,
-            source="auto",
-            status="scheduled",
-            dedup_hash=dedup_hash,
-            created_at=now,
-            updated_at=now,
+def _apply_event_fields(
+    db: Session,
+    user_id: int,
+    extracted: list[tuple[int, dict]],
+    changed: set[int] | None = None,
+) -> int:
+    """
+    抽出結果 (email_id, fields) から events をまとめて生成/更新する（commit はしない）
+    changed を渡すと flush して、作成/更新した event の id を追加する（中身の変わらない既存 event は入れない）。
+    """
+    if not extracted:
+        return 0
+
+    hashes = [_dedup_hash(user_id, fields) for _, fields in extracted]
+    existing = {
+        ev.dedup_hash: ev
+        for ev in (
+            db.query(Event)
+            .filter(Event.user_id == user_id, Event.dedup_hash.in_(set(hashes)))
+            .all()
         )
-        db.add(ev)
-    else:
-        # 既存があれば必要に応じて更新
-        ev.company_name = company or ev.company_name
-        ev.title = title or ev.title
-        ev.updated_at = now
+    }
 
-    email.processing_status = "parsed"
-    db.commit()
+    now = datetime.now(JST)
+    created = 0
+    touched: list[Event] = []
+    for (email_id, fields), dedup_hash in zip(extracted, hashes):
+        ev = existing.get(dedup_hash)
+        if ev is None:
+            ev = Event(
+                user_id=user_id,
+                email_id=email_id,
+                company_name=fields["company_name"],
+                title=fields["title"],
+                event_type="interview",  # 後で賢くする
+                start_at=fields["start_at"],
+                end_at=None,
+                location=None,
+                memo=None,
+                source="auto",
+                status="scheduled",
+                dedup_hash=dedup_hash,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(ev)
+            existing[dedup_hash] = ev
+            created += 1
+        else:
+            # 既存があれば必要に応じて更新（何も変わらなければ触らない）
+            company_name = fields["company_name"] or ev.company_name
+            title = fields["title"] or ev.title
+            if (company_name, title) == (ev.company_name, ev.title):
+                continue
+            ev.company_name = company_name
+            ev.title = title
+            ev.updated_at = now
+        touched.append(ev)
+
+    if changed is not None:
+        # 新規 event の id を採番させる
+        db.flush()
+        changed.update(ev.id for ev in touched)
+    return created
+
+
+# ============================
+# 保存済みメールの再解析（バックフィル）
+# ============================
+
+def reparse_emails(
+    db: Session,
+    user_id: int | None = None,
+    statuses: tuple[str, ...] = ("queued", "failed"),
+    page_size: int = 5000,
+    max_workers: int | None = None,
+) -> dict:
+    """
+    保存済みの Email を processing_status で選んで解析し直す。
 
+    解析は parse_emails_batch でプロセスプールに分散し、
+    DB への書き込み（ステータス更新・event 生成）は親プロセスでページごとに 1 commit。
+
+    Args:
+        user_id: 指定したユーザーだけ（None なら全ユーザー）
+        statuses: 対象にする processing_status
+        page_size: 1 回に読み込む / commit する件数
+        max_workers: 解析プロセス数（None なら CPU 数、1 ならプロセスを使わない）
+
+    Returns:
+        {"emails": 解析した件数, "events_created": 作成した event 数}
+    """
+    stats = {"emails": 0, "events_created": 0}
+    pool = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else None
+    try:
+        last_id = 0
+        while True:
+            q = db.query(
+                Email.id, Email.user_id, Email.subject, Email.body_zlib, Email.from_address
+            ).filter(Email.processing_status.in_(statuses), Email.id > last_id)
+            if user_id is not None:
+                q = q.filter(Email.user_id == user_id)
+            rows = q.order_by(Email.id).limit(page_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            results = parse_emails_batch(
+                [(r.subject or "", decompress_body(r.body_zlib) or "", r.from_address or "") for r in rows],
+                max_workers=max_workers,
+                executor=pool,
+            )
+
+            ids_by_status: dict[str, list[int]] = defaultdict(list)
+            extracted_by_user: dict[int, list[tuple[int, dict]]] = defaultdict(list)
+            for row, (status, fields) in zip(rows, results):
+                ids_by_status[status].append(row.id)
+                if fields is not None:
+                    extracted_by_user[row.user_id].append((row.id, fields))
+
+            for status, ids in ids_by_status.items():
+                db.execute(
+                    update(Email).where(Email.id.in_(ids)).values(processing_status=status)
+                )
+            for uid, extracted in extracted_by_user.items():
+                changed: set[int] = set()
+                stats["events_created"] += _apply_event_fields(db, uid, extracted, changed=changed)
+                # 解析し直しても events が変わらなければ ETag はそのまま（クライアントに取り直させない）
+                if changed:
+                    bump_data_version(db, uid)
+
+            db.commit()
+            stats["emails"] += len(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return stats
@@ -0,0 +1,110 @@
+# backend/app/services/recruiting.py
+"""
+就活メールだけを取るための Gmail 検索条件
+
+messages.list に q / labelIds を付けて、ニュースレターなどを Gmail 側で落とす
+（一覧に出たメールは 1 通ずつ messages.get するので、ここで減らすほど安い）。
+
+- キーワードは event_extractor.RECRUITING_KEYWORDS と company_parser.EVENT_WORDS の和
+  （取り込み後の判定と同じ語を使うので、q で落としたメールは解析しても event にならない）
+- ユーザーごとに GmailSyncState で上書きできる
+    gmail_query      : キーワード部分を置き換える検索式（None なら既定）
+    label_ids        : labelIds（Gmail の仕様で「すべてのラベルを持つ」メールだけになる）
+    sender_allowlist : キーワードに当たらなくても取る送信元（from: で OR に足す）
+- 差分同期（history.list）は q を受け付けないので、増えたメールを同じ条件の messages.list と突き合わせて絞る
+  （gmail_sync._filter_by_query）
+"""
+import json
+from typing import Callable
+
+from app.models.gmail_sync_state import GmailSyncState
+from app.services.company_parser import EVENT_WORDS
+from app.services.event_extractor import RECRUITING_KEYWORDS
+
+# 順序を保って重複を除く
+DEFAULT_QUERY_WORDS = list(dict.fromkeys(RECRUITING_KEYWORDS + EVENT_WORDS))
+
+# Gmail の検索式で区切りや演算子になる文字
+_SPECIAL_CHARS = set(' \t"(){}:-')
+
+
+def _quote(term: str) -> str:
+    if any(c in _SPECIAL_CHARS for c in term):
+        return '"' + term.replace('"', "") + '"'
+    return term
+
+
+def build_gmail_query(
+    keywords: list[str] | None = None,
+    custom_query: str | None = None,
+    senders: list[str] | None = None,
+) -> str:
+    """
+    Gmail の検索式を組み立てる
+
+    Args:
+        keywords: OR でつなぐキーワード（None なら DEFAULT_QUERY_WORDS）
+        custom_query: 指定したらキーワードの代わりにそのまま使う
+        senders: このアドレスからのメールはキーワードに当たらなくても取る
+
+    Returns:
+        例: '{説明会 面接 ... from:hr@example.com}'（{} は Gmail の OR）
+    """
+    if custom_query:
+        terms = [f"({custom_query})"]
+    else:
+        terms = [_quote(k) for k in (keywords or DEFAULT_QUERY_WORDS)]
+    terms += [f"from:{_quote(s)}" for s in senders or ()]
+
+    if len(terms) == 1:
+        return terms[0]
+    return "{" + " ".join(terms) + "}"
+
+
+def _load_list(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return [v for v in json.loads(value) if v]
+
+
+def dump_list(values: list[str] | None) -> str | None:
+    values = [v.strip() for v in values or () if v and v.strip()]
+    return json.dumps(values, ensure_ascii=False) if values else None
+
+
+def label_ids_for(state: GmailSyncState) -> list[str]:
+    return _load_list(state.label_ids)
+
+
+def sender_allowlist_for(state: GmailSyncState) -> list[str]:
+    return _load_list(state.sender_allowlist)
+
+
+def query_for(state: GmailSyncState) -> str:
+    """ユーザーの設定から messages.list の q を作る"""
+    return build_gmail_query(
+        custom_query=state.gmail_query,
+        senders=sender_allowlist_for(state),
+    )
+
+
+def make_candidate_filter(state: GmailSyncState) -> Callable[[dict], bool]:
+    """
+    format=metadata で取ったメール dict（subject / from / snippet）から、
+    本文まで取る価値があるか（面接・説明会の案内っぽいか）を判定する関数を返す。
+
+    取り込み後の extract_event_fields は subject + 本文に RECRUITING_KEYWORDS が無いと
+    何もしないので、subject + snippet に無ければ本文は取らない
+    （snippet より後ろにだけキーワードがあるメールは落ちる）。
+    送信元 allowlist に入っているメールは常に候補にする。
+    """
+    senders = [s.lower() for s in sender_allowlist_for(state)]
+
+    def _is_candidate(message: dict) -> bool:
+        text = (message.get("subject") or "") + "\n" + (message.get("snippet") or "")
+        if any(k in text for k in RECRUITING_KEYWORDS):
+            return True
+        from_address = (message.get("from") or "").lower()
+        return any(s in from_address for s in senders)
+
+    return _is_candidate
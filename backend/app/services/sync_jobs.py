@@ -0,0 +1,286 @@
+# backend/app/services/sync_jobs.py
+"""
+Gmail 同期ジョブ
+
+- enqueue_sync_job() で sync_jobs テーブルに積む（外部ブローカー不要）
+- SyncWorkerPool のスレッドが queued のジョブを取り出して sync_gmail_messages を実行
+- 同じユーザーのジョブが queued / running なら、新しく積まずにそれに合流する
+- 取るときにそのユーザーのリース（app/services/sync_leases.py）も取り、実行中は heartbeat で延ばす。
+  複数プロセス・複数ホストでも同じユーザーを同時に同期しない。ワーカーが落ちたジョブはリースの期限切れで分かる
+"""
+from datetime import datetime, timedelta
+import json
+from zoneinfo import ZoneInfo
+import threading
+import time
+import traceback
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.profiling import mark_job_for_profiling, maybe_profile_job
+from app.core.settings import SYNC_WORKERS, SYNC_JOB_STALE_SECONDS
+from app.database import SessionLocal
+from app.models.sync_job import SyncJob
+from app.models.sync_lease import SyncLease
+from app.services.gmail_sync import sync_gmail_messages
+from app.services.sync_leases import (
+    LeaseLostError,
+    acquire_lease,
+    claim_lock,
+    keeper,
+    lease_is_live,
+    release_lease,
+    skip_locked,
+)
+
+JST = ZoneInfo("Asia/Tokyo")
+
+# 他プロセスが積んだジョブを拾うためのポーリング間隔（秒）
+POLL_INTERVAL = 2.0
+# 進捗を DB に書く最短間隔（秒）
+PROGRESS_WRITE_INTERVAL = 1.0
+# 1 回の取得で見る queued ジョブの数（リースが取れなかったら次を見る）
+CLAIM_CANDIDATES = 5
+
+# 同じプロセス内で積まれたらすぐワーカーを起こす
+_wakeup = threading.Event()
+
+
+# ============================
+# キュー操作
+# ============================
+
+def enqueue_sync_job(db: Session, user_id: int) -> SyncJob:
+    """
+    ユーザーの同期ジョブを積む。
+    すでに queued / running のジョブがあればそれを返す（二重に同期しない）。
+    """
+    job = _get_active_job(db, user_id)
+    if job is not None and not _is_stale(db, job):
+        return job
+    if job is not None:
+        _finish_job(db, job, "failed", error="stale: worker did not finish")
+
+    job = SyncJob(
+        user_id=user_id,
+        status="queued",
+        active_user_id=user_id,
+        created_at=datetime.now(JST),
+    )
+    db.add(job)
+    try:
+        db.flush()
+        # ワーカーが拾う前に印を付けておく
+        mark_job_for_profiling(job.id)
+        db.commit()
+    except IntegrityError:
+        # 別リクエスト／別プロセスが同時に積んだ → そちらに合流
+        db.rollback()
+        job = _get_active_job(db, user_id)
+        if job is None:
+            raise
+        return job
+
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def get_sync_job(db: Session, user_id: int, job_id: int) -> SyncJob | None:
+    return (
+        db.query(SyncJob)
+        .filter(SyncJob.id == job_id, SyncJob.user_id == user_id)
+        .first()
+    )
+
+
+def changed_event_ids(job: SyncJob) -> list[int]:
+    """ジョブが作成/更新した event の id（終わっていなければ空）"""
+    if not job.changed_event_ids:
+        return []
+    return json.loads(job.changed_event_ids)
+
+
+def _get_active_job(db: Session, user_id: int) -> SyncJob | None:
+    return db.query(SyncJob).filter(SyncJob.active_user_id == user_id).first()
+
+
+def _is_stale(db: Session, job: SyncJob) -> bool:
+    """running のまま実行しているワーカーがいなくなったジョブか"""
+    if job.status != "running" or job.started_at is None:
+        return False
+    live = lease_is_live(db, job.user_id, job.id)
+    if live is not None:
+        return not live
+    # リースの無いジョブ（リース導入前に走り出したものなど）は経過時間で判断する
+    started_at = job.started_at
+    if started_at.tzinfo is None:
+        # SQLite は tz を保存しないので JST とみなす
+        started_at = started_at.replace(tzinfo=JST)
+    return datetime.now(JST) - started_at > timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+
+
+def _finish_job(db: Session, job: SyncJob, status: str, error: str | None = None) -> None:
+    job.status = status
+    job.error = error
+    job.active_user_id = None
+    job.finished_at = datetime.now(JST)
+    db.commit()
+
+
+def _claim_next_job(db: Session) -> SyncJob | None:
+    """
+    queued のジョブを 1 件 running にして、そのユーザーのリースと一緒に返す。
+    Postgres は FOR UPDATE SKIP LOCKED でほかのワーカーが見ている行を飛ばし、
+    SQLite は claim_lock で取る処理を 1 つずつにする。
+    リースが生きているユーザー（別プロセスがまだ同期中）のジョブと、取り合いに負けたジョブは飛ばして次の候補を見る。
+    """
+    now = datetime.now(JST)
+    leased = exists().where(SyncLease.user_id == SyncJob.user_id, SyncLease.expires_at >= now)
+    with claim_lock(db):
+        candidates = db.execute(
+            skip_locked(
+                db,
+                select(SyncJob.id, SyncJob.user_id)
+                .where(SyncJob.status == "queued", ~leased)
+                .order_by(SyncJob.id)
+                .limit(CLAIM_CANDIDATES),
+            )
+        ).all()
+        for job_id, user_id in candidates:
+            if not acquire_lease(db, user_id, job_id, now):
+                continue
+            result = db.execute(
+                update(SyncJob)
+                .where(SyncJob.id == job_id, SyncJob.status == "queued")
+                .values(status="running", started_at=now)
+            )
+            if result.rowcount == 1:
+                db.commit()
+                return db.get(SyncJob, job_id)
+            # リースの無い昔のワーカーが先に取った → 取ったリースだけ返して次の候補を見る
+            # （rollback すると残りの候補の行ロックまで手放すので、ここではしない）
+            release_lease(db, user_id, job_id)
+        db.commit()
+    return None
+
+
+# ============================
+# 実行
+# ============================
+
+def run_sync_job(job_id: int) -> None:
+    """running 状態のジョブを 1 件実行する"""
+    db: Session = SessionLocal()
+    user_id = None
+    lease = None
+    try:
+        user_id = db.get(SyncJob, job_id).user_id
+        lease = keeper.hold(user_id, job_id)
+        stats: dict = {}
+        last_write = 0.0
+
+        def _progress(s: dict) -> None:
+            nonlocal last_write
+            # リースを奪われていたら、次のバッチを書く前に止める
+            lease.check()
+            stats.update(s)
+            now = time.monotonic()
+            if now - last_write >= PROGRESS_WRITE_INTERVAL:
+                last_write = now
+                _write_progress(job_id, stats)
+
+        try:
+            with maybe_profile_job(job_id):
+                changed_event_ids = sync_gmail_messages(db, user_id, progress=_progress)
+            lease.check()
+        except Exception as e:
+            if isinstance(e, LeaseLostError):
+                print(f"sync job {job_id}: {e}")
+            else:
+                traceback.print_exc()
+            db.rollback()
+            job = db.get(SyncJob, job_id)
+            _apply_stats(job, stats)
+            release_lease(db, user_id, job_id)
+            _finish_job(db, job, "failed", error=str(e))
+            return
+
+        job = db.get(SyncJob, job_id)
+        _apply_stats(job, stats)
+        job.changed_event_ids = json.dumps(changed_event_ids)
+        release_lease(db, user_id, job_id)
+        _finish_job(db, job, "succeeded")
+    finally:
+        if lease is not None:
+            keeper.drop(lease)
+        db.close()
+
+
+def _apply_stats(job: SyncJob, stats: dict) -> None:
+    job.fetched_count = stats.get("fetched", 0)
+    job.parsed_count = stats.get("parsed", 0)
+    job.matched_count = stats.get("matched", 0)
+    job.events_created = stats.get("events_created", 0)
+
+
+def _write_progress(job_id: int, stats: dict) -> None:
+    """進捗は同期処理とは別セッションで書く（ステータス API からすぐ見えるように）"""
+    db: Session = SessionLocal()
+    try:
+        job = db.get(SyncJob, job_id)
+        if job is not None:
+            _apply_stats(job, stats)
+            db.commit()
+    except Exception as e:
+        # 進捗は表示用なので、書けなくても同期自体は止めない
+        print(f"sync job {job_id}: progress write failed: {e!r}")
+    finally:
+        db.close()
+
+
+class SyncWorkerPool:
+    """sync_jobs テーブルをポーリングしてジョブを実行するワーカースレッド群"""
+
+    def __init__(self, num_workers: int = SYNC_WORKERS):
+        self.num_workers = num_workers
+        self._threads: list[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        for i in range(self.num_workers):
+            t = threading.Thread(
+                target=self._worker_loop,
+                name=f"sync-worker-{i}",
+                daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        _wakeup.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads.clear()
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            _wakeup.clear()
+            job_id = None
+            db: Session = SessionLocal()
+            try:
+                job = _claim_next_job(db)
+                job_id = job.id if job else None
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.close()
+
+            if job_id is None:
+                _wakeup.wait(POLL_INTERVAL)
+                continue
+
+            run_sync_job(job_id)
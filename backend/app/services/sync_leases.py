@@ -0,0 +1,256 @@
+# backend/app/services/sync_leases.py
+"""
+ユーザーごとの同期のリース（複数プロセス・複数ホストで同じユーザーを同時に同期しない）
+
+- sync_leases の 1 行 = 1 ユーザー。ジョブを取るときに同じトランザクションで取り、
+  expires_at（SYNC_LEASE_TTL_SECONDS 後）までは持ち主のプロセスだけがそのユーザーを同期できる
+- 取るのは INSERT ... ON CONFLICT (user_id) DO UPDATE ... WHERE expires_at < now の 1 文
+  （期限切れなら奪う。生きているリースがあれば 0 行）
+- 持ち主は LeaseKeeper のスレッドが TTL/3 ごとに延ばす。延ばせなかったら（落ちたと思われて奪われた）
+  Lease.lost を立てるので、同期側は次の区切りで LeaseLostError で止まる
+- Postgres はジョブ・スケジュールを SELECT ... FOR UPDATE SKIP LOCKED で取るので、ワーカー同士が
+  同じ行を取り合って待たない。SQLite は書き込みが 1 本なので、取る処理だけ DB ファイル横の
+  ロックファイル（flock）で 1 つずつにする（"database is locked" で落ちないように）
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import os
+import socket
+import threading
+import traceback
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows（プロセス内のロックだけになる）
+    fcntl = None
+
+from app.core.metrics import CallbackMetric, Counter
+from app.core.settings import SYNC_LEASE_TTL_SECONDS
+from app.database import SessionLocal
+from app.models.sync_lease import SyncLease
+
+JST = ZoneInfo("Asia/Tokyo")
+
+_HOST = socket.gethostname()
+
+LEASE_EVENTS = Counter(
+    "sync_lease_events_total", "同期リースの取得・延長・喪失など（acquired / busy / renewed / lost / released）",
+    ["event"],
+)
+
+_claim_thread_lock = threading.Lock()
+
+
+class LeaseLostError(Exception):
+    """同期中にリースを失った（期限切れで別プロセスに奪われた）"""
+
+
+def lease_owner() -> str:
+    # fork されたワーカーでも別の持ち主になるように、pid は毎回取る
+    return f"{_HOST}:{os.getpid()}"
+
+
+def _now() -> datetime:
+    return datetime.now(JST)
+
+
+def _aware(dt: datetime | None) -> datetime | None:
+    # SQLite は tz を保存しないので JST とみなす
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=JST)
+    return dt
+
+
+# ============================
+# 取得の排他（SQLite 用）
+# ============================
+
+@contextmanager
+def claim_lock(db: Session):
+    """
+    ジョブ・スケジュールを取る間だけの排他。
+    Postgres は SKIP LOCKED で足りるので何もしない。SQLite はプロセス内のロック + ロックファイル
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        yield
+        return
+    with _claim_thread_lock:
+        path = bind.url.database
+        if fcntl is None or not path or path == ":memory:":
+            yield
+            return
+        with open(f"{path}.claim.lock", "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def skip_locked(db: Session, query):
+    """Postgres なら FOR UPDATE SKIP LOCKED を付ける（ほかのワーカーが取っている行は飛ばす）"""
+    if db.get_bind().dialect.name == "postgresql":
+        return query.with_for_update(skip_locked=True)
+    return query
+
+
+# ============================
+# リースの操作（commit は呼び出し側）
+# ============================
+
+def acquire_lease(db: Session, user_id: int, job_id: int | None, now: datetime | None = None) -> bool:
+    """user_id のリースを取る（無い・期限切れなら取れる）。取れたら True"""
+    now = now or _now()
+    values = {
+        "user_id": user_id,
+        "owner": lease_owner(),
+        "job_id": job_id,
+        "acquired_at": now,
+        "heartbeat_at": now,
+        "expires_at": now + timedelta(seconds=SYNC_LEASE_TTL_SECONDS),
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(SyncLease).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SyncLease.user_id],
+            set_={k: stmt.excluded[k] for k in values if k != "user_id"},
+            where=SyncLease.expires_at < now,
+        )
+        acquired = db.execute(stmt).rowcount == 1
+    else:
+        acquired = db.execute(
+            update(SyncLease)
+            .where(SyncLease.user_id == user_id, SyncLease.expires_at < now)
+            .values(**values)
+        ).rowcount == 1
+        if not acquired:
+            try:
+                with db.begin_nested():
+                    db.add(SyncLease(**values))
+                acquired = True
+            except IntegrityError:
+                acquired = False
+
+    LEASE_EVENTS.labels("acquired" if acquired else "busy").inc()
+    return acquired
+
+
+def release_lease(db: Session, user_id: int, job_id: int | None) -> None:
+    """自分の持っているリースを返す（奪われていたら何もしない）"""
+    db.execute(
+        delete(SyncLease).where(
+            SyncLease.user_id == user_id,
+            SyncLease.owner == lease_owner(),
+            SyncLease.job_id == job_id,
+        )
+    )
+    LEASE_EVENTS.labels("released").inc()
+
+
+def lease_is_live(db: Session, user_id: int, job_id: int, now: datetime | None = None) -> bool | None:
+    """
+    job_id のリースが期限内か。job_id のリースが無ければ None
+    （リースを入れる前に走り出したジョブなど。呼び出し側が別の基準で判断する）
+    """
+    lease = db.get(SyncLease, user_id, populate_existing=True)
+    if lease is None or lease.job_id != job_id:
+        return None
+    return _aware(lease.expires_at) >= (now or _now())
+
+
+# ============================
+# heartbeat
+# ============================
+
+class Lease:
+    """同期中のリース。LeaseKeeper が延ばせなくなったら lost が立つ"""
+
+    def __init__(self, user_id: int, job_id: int | None):
+        self.user_id = user_id
+        self.job_id = job_id
+        self.lost = False
+
+    def check(self) -> None:
+        if self.lost:
+            raise LeaseLostError(f"sync lease for user {self.user_id} (job {self.job_id}) was lost")
+
+
+class LeaseKeeper:
+    """このプロセスが持っているリースを interval 秒ごとに延ばすスレッド（最初の hold で起動）"""
+
+    def __init__(self, interval: float = SYNC_LEASE_TTL_SECONDS / 3):
+        self.interval = interval
+        self._leases: dict[int, Lease] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._wakeup = threading.Event()
+
+    def hold(self, user_id: int, job_id: int | None) -> Lease:
+        lease = Lease(user_id, job_id)
+        with self._lock:
+            self._leases[user_id] = lease
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sync-lease-keeper", daemon=True)
+                self._thread.start()
+        return lease
+
+    def drop(self, lease: Lease) -> None:
+        with self._lock:
+            if self._leases.get(lease.user_id) is lease:
+                del self._leases[lease.user_id]
+
+    def held(self) -> int:
+        return len(self._leases)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.renew_all()
+            except Exception:
+                traceback.print_exc()
+
+    def renew_all(self) -> None:
+        with self._lock:
+            leases = list(self._leases.values())
+        if not leases:
+            return
+        db: Session = SessionLocal()
+        try:
+            now = _now()
+            for lease in leases:
+                renewed = db.execute(
+                    update(SyncLease)
+                    .where(
+                        SyncLease.user_id == lease.user_id,
+                        SyncLease.owner == lease_owner(),
+                        SyncLease.job_id == lease.job_id,
+                    )
+                    .values(heartbeat_at=now, expires_at=now + timedelta(seconds=SYNC_LEASE_TTL_SECONDS))
+                ).rowcount == 1
+                db.commit()
+                if renewed:
+                    LEASE_EVENTS.labels("renewed").inc()
+                elif not lease.lost:
+                    lease.lost = True
+                    LEASE_EVENTS.labels("lost").inc()
+                    print(f"sync lease lost: user={lease.user_id} job={lease.job_id}")
+        finally:
+            db.close()
+
+
+keeper = LeaseKeeper()
+
+CallbackMetric("sync_leases_held", "このプロセスが持っている同期リースの数", keeper.held)
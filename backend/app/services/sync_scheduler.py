@@ -0,0 +1,336 @@
+# backend/app/services/sync_scheduler.py
+"""
+Gmail の定期同期スケジューラ
+
+- GmailToken のあるユーザーごとに sync_schedules の行を持ち、next_due_at を過ぎたら
+  enqueue_sync_job() で同期ジョブを積む（実行は今までどおり SyncWorkerPool）
+- due なものは next_due_at の古い順に積む。同じユーザーは終わってから interval 後まで due にならないので、
+  ユーザー間は round-robin になる。積んだまま終わっていないジョブは SYNC_SCHEDULER_MAX_INFLIGHT 件まで
+  （キューを短く保ち、ボタンからの同期が定期同期の後ろで長く待たされないように）
+- 同期間隔は就活メール（event 情報の取れたメール）が最後に来てからの日数で倍々に伸ばす
+  （来たばかり: SYNC_INTERVAL_MIN_SECONDS、7 日くらい来ない: SYNC_INTERVAL_MAX_SECONDS）。
+  失敗が続くユーザーも倍々で間隔を空ける
+- due のまま積めずに待っている行があれば（ワーカーが追いついていない）、その遅れの分だけ
+  次の間隔を伸ばして需要を落とす。ユーザー数が増えても遅れは SYNC_INTERVAL_MIN_SECONDS 程度で頭打ちになる
+  （そのぶん静かなユーザーの同期が間引かれる。間引かれ具合は sync_scheduler{stat="backlog_seconds"} で見る）
+- プッシュ通知の watch が生きているユーザー（app/services/gmail_push.py）は通知で同期するので、
+  定期同期は取りこぼしの保険として SYNC_INTERVAL_MAX_SECONDS ごと
+- 新しく作る行は 1 回の突き合わせで ENSURE_BATCH 件まで、初回の時刻は user_id で
+  SYNC_INTERVAL_MIN_SECONDS の中にばらす（1 万人分が一度に due にならないように）
+
+必要なワーカー数の目安は「ユーザーごとの 1/間隔 の合計 × 1 回の同期時間」。
+
+ジョブの結果は次の tick で sync_jobs から拾って行に書く（別プロセスのワーカーが実行したジョブも拾える）。
+複数プロセスで動かしても、1 行を取れるのは 1 プロセスだけ（Postgres は SKIP LOCKED、SQLite は claim_lock）。
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import threading
+import time
+import traceback
+
+from sqlalchemy import delete, exists, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.metrics import CallbackMetric, Counter, Histogram
+from app.core.settings import (
+    SYNC_INTERVAL_MAX_SECONDS,
+    SYNC_INTERVAL_MIN_SECONDS,
+    SYNC_JOB_STALE_SECONDS,
+    SYNC_SCHEDULER_MAX_INFLIGHT,
+    SYNC_SCHEDULER_TICK_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.gmail_sync_state import GmailSyncState
+from app.models.gmail_token import GmailToken
+from app.models.sync_job import SyncJob
+from app.models.sync_schedule import SyncSchedule
+from app.services.sync_jobs import _is_stale, enqueue_sync_job
+from app.services.sync_leases import claim_lock, skip_locked
+
+JST = ZoneInfo("Asia/Tokyo")
+
+# GmailToken と sync_schedules の突き合わせをする間隔（秒）
+ENSURE_INTERVAL = 60.0
+# 積んだジョブが走っている／due が残っている間の tick 間隔（秒）。
+# 終わったジョブをすぐ回収して次を積まないと、ワーカーが空いたまま tick を待つことになる
+BUSY_TICK_SECONDS = 0.25
+# 1 回の突き合わせで作る行の上限
+ENSURE_BATCH = 500
+# 就活メールが来ない日数はここで頭打ち（2 ** 日数 が大きくなりすぎないように）
+MAX_QUIET_DAYS = 30
+
+SCHEDULE_LAG_SECONDS = Histogram(
+    "sync_schedule_lag_seconds", "next_due_at からジョブを積むまでの遅れ",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+SCHEDULED_SYNCS = Counter("sync_schedule_runs_total", "スケジューラが積んだ同期の結果", ["result"])
+
+# 直近の tick の様子（/metrics 用）
+_last_tick = {"due": 0, "inflight": 0, "enqueued": 0, "backlog_seconds": 0.0}
+
+CallbackMetric(
+    "sync_scheduler",
+    "直近の tick の due 件数・積んだまま終わっていない件数・積んだ件数・いちばん古い due の遅れ（秒）",
+    lambda: dict(_last_tick), ["stat"],
+)
+
+
+def _aware(dt: datetime | None) -> datetime | None:
+    # SQLite は tz を保存しないので JST とみなす
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=JST)
+    return dt
+
+
+def _spread(user_id: int, seconds: int) -> int:
+    """user_id から 0〜seconds-1 の秒数（連番の user_id でも散らばるように掛けて割る）"""
+    return (user_id * 2654435761) % max(seconds, 1)
+
+
+def next_interval(
+    last_recruiting_at: datetime | None,
+    consecutive_failures: int,
+    now: datetime,
+    backlog_seconds: float = 0.0,
+    watched: bool = False,
+) -> int:
+    """
+    次の同期までの秒数（backlog_seconds: 積めずに待っている due の遅れ。その分だけ伸ばす）。
+    watched（watch が生きている）ならプッシュ通知で同期するので、定期同期は取りこぼしの保険として上限の間隔
+    """
+    if consecutive_failures:
+        seconds = SYNC_INTERVAL_MIN_SECONDS * 2 ** min(consecutive_failures, MAX_QUIET_DAYS)
+    elif watched or last_recruiting_at is None:
+        seconds = SYNC_INTERVAL_MAX_SECONDS
+    else:
+        quiet_days = (now - _aware(last_recruiting_at)).total_seconds() / 86400
+        seconds = SYNC_INTERVAL_MIN_SECONDS * 2 ** min(max(quiet_days, 0), MAX_QUIET_DAYS)
+    seconds = min(max(seconds, SYNC_INTERVAL_MIN_SECONDS), SYNC_INTERVAL_MAX_SECONDS)
+    # 追いついていないときは上限を超えても伸ばす（静かなユーザーの分も需要を落とさないと遅れが止まらない）
+    return int(seconds * (1 + backlog_seconds / SYNC_INTERVAL_MIN_SECONDS))
+
+
+# ============================
+# sync_schedules の操作
+# ============================
+
+def ensure_schedules(db: Session, now: datetime) -> int:
+    """
+    GmailToken があって行の無いユーザーの行を作り、GmailToken の無くなったユーザーの行を消す。
+    作った行数を返す
+    """
+    db.execute(
+        delete(SyncSchedule).where(~exists().where(GmailToken.user_id == SyncSchedule.user_id))
+    )
+    missing = [
+        user_id
+        for (user_id,) in (
+            db.query(GmailToken.user_id)
+            .filter(~exists().where(SyncSchedule.user_id == GmailToken.user_id))
+            .limit(ENSURE_BATCH)
+            .all()
+        )
+    ]
+    if missing:
+        db.execute(
+            insert(SyncSchedule),
+            [
+                {
+                    "user_id": user_id,
+                    "interval_seconds": SYNC_INTERVAL_MIN_SECONDS,
+                    "next_due_at": now + timedelta(seconds=_spread(user_id, SYNC_INTERVAL_MIN_SECONDS)),
+                    "consecutive_failures": 0,
+                }
+                for user_id in missing
+            ],
+        )
+    try:
+        db.commit()
+    except IntegrityError:
+        # 別プロセスが同時に作った → 次の突き合わせで残りを作る
+        db.rollback()
+        return 0
+    return len(missing)
+
+
+def backlog_seconds(db: Session, now: datetime) -> float:
+    """due のまま積まれずに待っている行のうち、いちばん古いものの遅れ（秒）"""
+    oldest = (
+        db.query(func.min(SyncSchedule.next_due_at))
+        .filter(SyncSchedule.next_due_at <= now, SyncSchedule.running_job_id.is_(None))
+        .scalar()
+    )
+    return max((now - _aware(oldest)).total_seconds(), 0.0) if oldest is not None else 0.0
+
+
+def collect_finished(db: Session, now: datetime, backlog: float = 0.0) -> int:
+    """積んだジョブのうち終わったもの（と死んだもの）の結果を行に書き、次回の時刻を決める"""
+    rows = (
+        db.query(SyncSchedule, SyncJob)
+        .outerjoin(SyncJob, SyncJob.id == SyncSchedule.running_job_id)
+        .filter(SyncSchedule.running_job_id.isnot(None))
+        .all()
+    )
+    watched = set()
+    if rows:
+        watched = {
+            user_id
+            for (user_id,) in (
+                db.query(GmailSyncState.user_id)
+                .filter(
+                    GmailSyncState.user_id.in_([schedule.user_id for schedule, _ in rows]),
+                    GmailSyncState.watch_expires_at > now,
+                )
+                .all()
+            )
+        }
+    collected = 0
+    for schedule, job in rows:
+        if job is None or _is_stale(db, job):
+            # ジョブが消えた／ワーカーごと死んだ → すぐ積み直す（enqueue_sync_job が stale を片付ける）
+            schedule.running_job_id = None
+            schedule.next_due_at = now
+            collected += 1
+            continue
+        if job.status not in ("succeeded", "failed"):
+            continue
+
+        started_at = _aware(job.started_at or job.created_at)
+        finished_at = _aware(job.finished_at) or now
+        schedule.last_run_at = started_at
+        schedule.last_duration_seconds = (finished_at - started_at).total_seconds()
+        schedule.last_status = job.status
+        schedule.last_error = job.error
+        if job.status == "succeeded":
+            schedule.consecutive_failures = 0
+            if job.matched_count:
+                schedule.last_recruiting_at = finished_at
+        else:
+            schedule.consecutive_failures += 1
+
+        schedule.interval_seconds = next_interval(
+            schedule.last_recruiting_at, schedule.consecutive_failures, now, backlog,
+            watched=schedule.user_id in watched,
+        )
+        schedule.next_due_at = finished_at + timedelta(seconds=schedule.interval_seconds)
+        schedule.running_job_id = None
+        SCHEDULED_SYNCS.labels(job.status).inc()
+        collected += 1
+
+    db.commit()
+    return collected
+
+
+def enqueue_due(db: Session, now: datetime) -> list[float]:
+    """
+    due な行を古い順に、積んだまま終わっていないジョブが上限になるまで積む。
+    積んだ行の遅れ（秒）のリストを返す
+    """
+    inflight = (
+        db.query(func.count(SyncSchedule.id))
+        .filter(SyncSchedule.running_job_id.isnot(None))
+        .scalar()
+    )
+    due_count = (
+        db.query(func.count(SyncSchedule.id))
+        .filter(SyncSchedule.next_due_at <= now, SyncSchedule.running_job_id.is_(None))
+        .scalar()
+    )
+    _last_tick.update(due=due_count, inflight=inflight, enqueued=0)
+
+    free = SYNC_SCHEDULER_MAX_INFLIGHT - inflight
+    if free <= 0 or due_count == 0:
+        return []
+
+    # まとめて取って next_due_at を先送りする（Postgres は SKIP LOCKED でほかのプロセスが取っている行を飛ばす。
+    # ジョブを積む前に落ちても、先送りした時刻にまた due になる）
+    with claim_lock(db):
+        due = skip_locked(
+            db,
+            db.query(SyncSchedule.id, SyncSchedule.user_id, SyncSchedule.next_due_at)
+            .filter(SyncSchedule.next_due_at <= now, SyncSchedule.running_job_id.is_(None))
+            .order_by(SyncSchedule.next_due_at, SyncSchedule.id)
+            .limit(free),
+        ).all()
+        if due:
+            db.execute(
+                update(SyncSchedule)
+                .where(SyncSchedule.id.in_([schedule_id for schedule_id, _, _ in due]))
+                .values(next_due_at=now + timedelta(seconds=SYNC_JOB_STALE_SECONDS))
+            )
+        db.commit()
+
+    lags = []
+    for schedule_id, user_id, due_at in due:
+        job = enqueue_sync_job(db, user_id)
+        db.execute(
+            update(SyncSchedule).where(SyncSchedule.id == schedule_id).values(running_job_id=job.id)
+        )
+        db.commit()
+
+        lag = max((now - _aware(due_at)).total_seconds(), 0.0)
+        SCHEDULE_LAG_SECONDS.observe(lag)
+        lags.append(lag)
+
+    _last_tick["enqueued"] = len(lags)
+    return lags
+
+
+# ============================
+# スケジューラ本体
+# ============================
+
+class SyncScheduler:
+    """
+    SYNC_SCHEDULER_TICK_SECONDS ごとに sync_schedules を見て due なユーザーの同期を積むスレッド
+    （積んだジョブが走っている間は BUSY_TICK_SECONDS ごと）
+    """
+
+    def __init__(self, tick_seconds: float = SYNC_SCHEDULER_TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._last_ensure = float("-inf")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="sync-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                self.tick()
+            except Exception:
+                traceback.print_exc()
+            busy = _last_tick["inflight"] > 0 or _last_tick["due"] > 0
+            interval = min(self.tick_seconds, BUSY_TICK_SECONDS) if busy else self.tick_seconds
+            self._stopping.wait(max(interval - (time.monotonic() - started), 0))
+
+    def tick(self, now: datetime | None = None) -> list[float]:
+        """
+        1 回分: 行の突き合わせ（ときどき）→ 終わったジョブの回収 → due な行を積む。
+        積んだ行の遅れ（秒）のリストを返す
+        """
+        db: Session = SessionLocal()
+        try:
+            now = now or datetime.now(JST)
+            if time.monotonic() - self._last_ensure >= ENSURE_INTERVAL:
+                self._last_ensure = time.monotonic()
+                created = ensure_schedules(db, now)
+                if created:
+                    print(f"sync scheduler: {created} schedules created")
+            backlog = backlog_seconds(db, now)
+            _last_tick["backlog_seconds"] = backlog
+            collect_finished(db, now, backlog)
+            return enqueue_due(db, now)
+        finally:
+            db.close()
@@ -0,0 +1,48 @@
+# backend/benchmarks/bench_batch_parse.py
+"""
+parse_emails_batch のスループットをプロセス数ごとに測る
+
+    cd backend
+    python -m benchmarks.bench_batch_parse --messages 50000
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.event_extractor import parse_emails_batch
+from benchmarks.mailgen import generate_messages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, seed=7, recruiting_ratio=0.5)
+    items = [(m["subject"], m["body"], m["from"]) for m in messages]
+
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpus})
+    baseline = None
+    for workers in worker_counts:
+        if workers == 1:
+            t0 = time.perf_counter()
+            parse_emails_batch(items, max_workers=1)
+            elapsed = time.perf_counter() - t0
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # プロセス起動コストは除いて測る
+                parse_emails_batch(items[:workers * args.chunk_size], executor=pool, chunk_size=args.chunk_size)
+                t0 = time.perf_counter()
+                parse_emails_batch(items, executor=pool, chunk_size=args.chunk_size)
+                elapsed = time.perf_counter() - t0
+
+        rate = len(items) / elapsed
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {rate:10,.0f} emails/sec  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
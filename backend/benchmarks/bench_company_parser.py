@@ -0,0 +1,35 @@
+# backend/benchmarks/bench_company_parser.py
+"""
+extract_company_name のマイクロベンチマーク
+
+emails/sec を測る。マッチャー化する前の実装と結果が一致することは
+tests/test_company_parser.py（tests/company_parser_golden.json）で確かめる。
+
+    cd backend
+    python -m benchmarks.bench_company_parser --messages 20000
+"""
+import argparse
+import time
+
+from app.services.company_parser import extract_company_name
+from benchmarks.mailgen import generate_messages
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, seed=42)
+    best = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        for m in messages:
+            extract_company_name(subject=m["subject"], body=m["body"], from_address=m["from"])
+        best = min(best, time.perf_counter() - t0)
+
+    print(f"{len(messages)} emails in {best * 1000:.1f} ms -> {len(messages) / best:,.0f} emails/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# backend/benchmarks/bench_gmail_client.py
+"""
+Gmail クライアントの作り方による固定費を比べる
+
+1. リクエスト組み立て: build() + users().messages().get() を毎回 vs GmailClient を使い回し
+2. 往復: ローカルの HTTP サーバーに messages.get を投げて、
+   毎回 Http を作る（接続を張り直す）場合と _pooled_http() を使い回す場合を比べる
+
+    cd backend
+    python -m benchmarks.bench_gmail_client --requests 500
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httplib2
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+
+from app.gmail_client import GmailClient, _pooled_http
+
+GMAIL_ROOT = "https://gmail.googleapis.com/"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # ヘッダーと本文を別々に書くので、Nagle が効くと keep-alive 側だけ遅延 ACK 待ちになる
+    disable_nagle_algorithm = True
+    connections = 0
+    body = json.dumps({"id": "m1", "snippet": "", "payload": {"headers": []}}).encode()
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _LocalHttp:
+    """googleapis.com 宛てのリクエストをローカルサーバーに向け直す"""
+
+    def __init__(self, http: httplib2.Http, root: str):
+        self.http = http
+        self.root = root
+
+    def request(self, uri, *args, **kwargs):
+        return self.http.request(uri.replace(GMAIL_ROOT, self.root), *args, **kwargs)
+
+
+def _fake_credentials() -> Credentials:
+    return Credentials(token="bench", expiry=datetime.utcnow() + timedelta(hours=1))
+
+
+def bench_build(n: int, creds) -> None:
+    t0 = time.perf_counter()
+    for i in range(n):
+        service = build("gmail", "v1", credentials=creds)
+        service.users().messages().get(userId="me", id=str(i))
+    cold = time.perf_counter() - t0
+
+    client = GmailClient(AuthorizedHttp(creds, http=_pooled_http()))
+    t0 = time.perf_counter()
+    for i in range(n):
+        client.messages.get(userId="me", id=str(i))
+    warm = time.perf_counter() - t0
+
+    print(f"build() per request : {cold / n * 1000:8.3f} ms/req")
+    print(f"GmailClient reused  : {warm / n * 1000:8.3f} ms/req  ({cold / warm:.0f}x)")
+
+
+def bench_round_trip(n: int, creds, root: str) -> None:
+    client = GmailClient(None)
+
+    def _run(make_http) -> tuple[float, int]:
+        _Handler.connections = 0
+        t0 = time.perf_counter()
+        for i in range(n):
+            client.http = AuthorizedHttp(creds, http=_LocalHttp(make_http(), root))
+            client.execute(client.messages.get(userId="me", id=str(i)))
+        return time.perf_counter() - t0, _Handler.connections
+
+    fresh, fresh_conns = _run(httplib2.Http)
+    pooled, pooled_conns = _run(_pooled_http)
+    print(f"new Http per request: {fresh / n * 1000:8.3f} ms/req  connections={fresh_conns}")
+    print(f"pooled Http         : {pooled / n * 1000:8.3f} ms/req  connections={pooled_conns}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    creds = _fake_credentials()
+    bench_build(min(args.requests, 200), creds)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        bench_round_trip(args.requests, creds, f"http://127.0.0.1:{server.server_port}/")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
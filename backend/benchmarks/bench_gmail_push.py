@@ -0,0 +1,155 @@
+# backend/benchmarks/bench_gmail_push.py
+"""
+プッシュ通知（app/services/gmail_push.py）を偽 Gmail サーバー + SQLite で確かめる
+
+1. watch: 全ユーザーの watch を renew_expiring_watches で張り、users.watch の回数と期限が入ったことを見る
+2. burst: 偽 Gmail に --burst 通届けてから、ユーザーごとに --burst 回の通知（historyId を 1 ずつ進める）を
+   /api/gmail/push に POST し、全部の同期が終わるまで待つ。debounce の窓ごとに
+   積んだ同期ジョブ数・history.list の回数（= 実際の同期回数）・最初の通知から同期完了までの時間を出す
+3. stale: 同期済みの historyId の通知をもう一度送り、同期が積まれないことを見る
+
+    cd backend
+    python -m benchmarks.bench_gmail_push
+    python -m benchmarks.bench_gmail_push --users 200 --burst 10 --windows 0,0.5,2
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=10, help="ユーザーごとの通知数（= 届けるメール数）")
+    parser.add_argument("--windows", default="0,1", help="debounce の窓（秒）")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="偽 Gmail の応答時間")
+    args = parser.parse_args()
+
+    # 設定は import 時に読まれるので、app を import する前に環境変数で渡す
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/push.db",
+        GMAIL_PUSH_TOKEN="bench",
+        GMAIL_PUSH_TOPIC="projects/bench/topics/gmail",
+    )
+    import contextlib
+    import io
+
+    from fastapi.testclient import TestClient
+    from google.oauth2.credentials import Credentials
+    from sqlalchemy import func, insert
+
+    from app.creds import _cache_put
+    from app.database import Base, SessionLocal, engine
+    from app.gmail_client import use_api_root
+    from app.main import app
+    from app.models import GmailSyncState, GmailToken, SyncJob, User
+    from app.services import gmail_push
+    from app.services.gmail_push import JST, PushDebouncer, renew_expiring_watches
+    from app.services.sync_jobs import SyncWorkerPool
+    from benchmarks.fake_gmail import FakeGmailProcess
+    from benchmarks.mailgen import generate_messages
+    from benchmarks.send_push import make_envelope
+
+    Base.metadata.create_all(engine)
+    windows = [float(w) for w in args.windows.split(",")]
+    messages = generate_messages(50 + args.burst * (len(windows) + 1), seed=24)
+    user_ids = range(1, args.users + 1)
+    expiry = datetime.utcnow() + timedelta(hours=2)
+    client = TestClient(app)  # lifespan は動かさない（ワーカーはここで起動する）
+
+    with FakeGmailProcess(messages, delivered=50, latency_ms=args.latency_ms) as fake:
+        use_api_root(fake.root)
+        history_id = fake.stats()["history_id"]
+        with SessionLocal() as db:
+            db.execute(
+                insert(User),
+                [{"id": u, "google_sub": f"push-{u}", "email": f"user{u}@example.com"} for u in user_ids],
+            )
+            db.execute(insert(GmailToken), [{"user_id": u, "token_json": "{}", "version": 1} for u in user_ids])
+            db.execute(
+                insert(GmailSyncState),
+                [{"user_id": u, "history_id": str(history_id), "fetched_total": 0, "matched_total": 0} for u in user_ids],
+            )
+            db.commit()
+        for u in user_ids:
+            _cache_put(u, Credentials(token="bench", expiry=expiry))
+
+        # 1. watch
+        fake.reset_stats()
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            while renew_expiring_watches(db, datetime.now(JST)) == gmail_push.WATCH_RENEW_BATCH:
+                pass
+            watched = db.query(func.count(GmailSyncState.id)).filter(GmailSyncState.watch_expires_at.isnot(None)).scalar()
+            # 偽 Gmail の getProfile は全員 me@example.com なので、通知はログインのメールアドレスで引かせる
+            db.query(GmailSyncState).update({GmailSyncState.watch_email: None})
+            db.commit()
+        print(
+            f"watch: users={args.users} watched={watched} users.watch={fake.stats()['requests'].get('users.watch', 0)} "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+        workers = SyncWorkerPool(num_workers=args.workers)
+        workers.start()
+        try:
+            # 2. burst
+            for window in windows:
+                gmail_push.debouncer = PushDebouncer(window)
+                fake.deliver(args.burst)
+                fake.reset_stats()
+                with SessionLocal() as db:
+                    jobs_before = db.query(func.count(SyncJob.id)).scalar()
+                post_seconds = []
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for i in range(args.burst):
+                        for u in user_ids:
+                            t = time.perf_counter()
+                            resp = client.post(
+                                "/api/gmail/push?token=bench",
+                                json=make_envelope(f"user{u}@example.com", history_id + i + 1),
+                            )
+                            post_seconds.append(time.perf_counter() - t)
+                            assert resp.status_code == 204, resp.text
+                    while True:
+                        with SessionLocal() as db:
+                            synced = (
+                                db.query(func.count(GmailSyncState.id))
+                                .filter(GmailSyncState.history_id == str(history_id + args.burst))
+                                .scalar()
+                            )
+                            active = db.query(func.count(SyncJob.id)).filter(SyncJob.active_user_id.isnot(None)).scalar()
+                        if synced == args.users and active == 0 and gmail_push.debouncer.pending() == 0:
+                            break
+                        time.sleep(0.05)
+                elapsed = time.perf_counter() - started
+                with SessionLocal() as db:
+                    jobs = db.query(func.count(SyncJob.id)).scalar() - jobs_before
+                history_id += args.burst
+                print(
+                    f"burst: window={window:4.1f}s notifications={args.users * args.burst} jobs={jobs} "
+                    f"history.list={fake.stats()['requests'].get('history.list', 0)}  "
+                    f"POST p50={statistics.median(post_seconds) * 1000:.2f} ms  all synced in {elapsed:.2f}s"
+                )
+
+            # 3. stale
+            with SessionLocal() as db:
+                jobs_before = db.query(func.count(SyncJob.id)).scalar()
+            for u in user_ids:
+                client.post("/api/gmail/push?token=bench", json=make_envelope(f"user{u}@example.com", history_id))
+            while gmail_push.debouncer.pending():
+                time.sleep(0.05)
+            time.sleep(0.2)
+            with SessionLocal() as db:
+                jobs = db.query(func.count(SyncJob.id)).scalar() - jobs_before
+            print(f"stale: notifications={args.users} jobs={jobs}")
+        finally:
+            workers.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# backend/benchmarks/bench_gmail_quota.py
+"""
+Gmail のクォータ制御（app/gmail_quota.py）を偽 Gmail サーバー相手に確かめる
+
+1. retry: --error-rate の割合で 429（batch の中身も 1 件ずつ）を返すサーバーから
+   --messages 通を batch で取り、全件そろうこと・やり直し回数・かかった時間を出す
+2. lanes: 同じユーザーで background（同期）の batch 取得を回し続けながら、
+   interactive（/api/gmail 相当）の messages.list を叩いて応答時間（p50 / max）を出す。
+   比較として、同期も interactive で出したとき（レーン無し）も測る
+
+    cd backend
+    python -m benchmarks.bench_gmail_quota
+    python -m benchmarks.bench_gmail_quota --error-rate 0.3 --error-status 403 --user-rate 100
+"""
+import argparse
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+
+from app import gmail_quota as quota
+from app.core.metrics import render_metrics
+from app.gmail_client import client_for_credentials, use_api_root
+from app.gmail_quota import BACKGROUND, INTERACTIVE, QuotaScheduler, gmail_lane
+from app.gmail_service import get_emails_by_ids
+from benchmarks.fake_gmail import FakeGmailProcess
+from benchmarks.mailgen import generate_messages
+
+USER_ID = 1
+
+
+def _metric_lines(prefix: str) -> list[str]:
+    return [
+        line for line in render_metrics().splitlines()
+        if line.startswith(prefix) and not line.startswith("#") and not line.endswith(" 0")
+    ]
+
+
+def bench_retry(fake: FakeGmailProcess, ids: list[str], creds, batch_size: int) -> None:
+    client = client_for_credentials(creds, user_id=USER_ID)
+    fake.reset_stats()
+    started = time.perf_counter()
+    emails = get_emails_by_ids(USER_ID, ids, batch_size=batch_size, client=client)
+    wall = time.perf_counter() - started
+    stats = fake.stats()
+    print(
+        f"retry: fetched={len(emails)}/{len(ids)} injected_errors={stats['injected_errors']} "
+        f"http_requests={stats['http_requests']} wall={wall:.2f}s"
+    )
+    for line in _metric_lines("gmail_api_retries_total"):
+        print(f"  {line}")
+
+
+def _background_sync(creds, ids: list[str], batch_size: int, lane: str, stop: threading.Event) -> None:
+    client = client_for_credentials(creds, user_id=USER_ID)
+    with gmail_lane(lane):
+        while not stop.is_set():
+            get_emails_by_ids(USER_ID, ids, batch_size=batch_size, client=client, metadata_only=True)
+
+
+def bench_lanes(creds, ids: list[str], batch_size: int, seconds: float, sync_lane: str) -> None:
+    stop = threading.Event()
+    syncer = threading.Thread(target=_background_sync, args=(creds, ids, batch_size, sync_lane, stop))
+    syncer.start()
+    time.sleep(0.5)
+
+    client = client_for_credentials(creds, user_id=USER_ID)
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        client.execute(client.messages.list(userId="me", maxResults=10))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.05)
+    stop.set()
+    syncer.join()
+
+    print(
+        f"lanes: sync={sync_lane:<11s} interactive messages.list "
+        f"p50={statistics.median(latencies) * 1000:7.2f} ms  max={max(latencies) * 1000:7.2f} ms  n={len(latencies)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--user-rate", type=float, default=250, help="ユーザーごとの quota unit / 秒")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, seed=21)
+    ids = [m["id"] for m in messages]
+    creds = Credentials(token="bench", expiry=datetime.utcnow() + timedelta(hours=1))
+
+    with FakeGmailProcess(messages, error_rate=args.error_rate, error_status=args.error_status) as fake:
+        use_api_root(fake.root)
+        quota.scheduler = QuotaScheduler(user_rate=args.user_rate)
+        bench_retry(fake, ids, creds, args.batch_size)
+
+    with FakeGmailProcess(messages) as fake:
+        use_api_root(fake.root)
+        for lane in (INTERACTIVE, BACKGROUND):
+            quota.scheduler = QuotaScheduler(user_rate=args.user_rate)
+            bench_lanes(creds, ids, args.batch_size, args.seconds, lane)
+
+
+if __name__ == "__main__":
+    main()
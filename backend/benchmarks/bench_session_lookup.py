@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_session_lookup.py
+"""
+認証済みリクエスト 1 回あたりの「ユーザー解決」コストを測る
+
+- legacy  : 毎回 google_sub で users を SELECT（以前の get_current_user_id）
+- lru     : user_id を持たない古いセッション → google_sub → users.id の LRU キャッシュ
+- session : ログイン時にセッションへ入れた user_id を使う（存在の確認は USER_ID_CACHE_TTL_SECONDS ごとに 1 回）
+
+リクエストごとの SQL 発行回数と p50 / p95 レイテンシを出す。
+
+    cd backend
+    python -m benchmarks.bench_session_lookup --requests 2000
+"""
+import argparse
+import base64
+import json
+import statistics
+import tempfile
+import time
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.testclient import TestClient
+from itsdangerous import TimestampSigner
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.deps import get_current_user_id
+from app.core.identity import _user_ids, identity_cache_stats
+from app.core.settings import SESSION_SECRET_KEY
+from app.database import Base, get_db
+from app.main import app
+from app.models import User
+
+
+def _legacy_user_id(request: Request, db: Session = Depends(get_db)) -> int:
+    """キャッシュ導入前の get_current_user_id（比較用に再現）"""
+    google_sub = request.session.get("google_id")
+    if not google_sub:
+        raise HTTPException(status_code=401, detail="未ログイン")
+    user = db.query(User).filter(User.google_sub == google_sub).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user.id
+
+
+@app.get("/_bench/legacy")
+def _bench_legacy(user_id: int = Depends(_legacy_user_id)):
+    return {"user_id": user_id}
+
+
+@app.get("/_bench/current")
+def _bench_current(user_id: int = Depends(get_current_user_id)):
+    return {"user_id": user_id}
+
+
+def _session_cookie(data: dict) -> str:
+    """SessionMiddleware と同じ形式で署名したセッション cookie を作る"""
+    payload = base64.b64encode(json.dumps(data).encode("utf-8"))
+    return TimestampSigner(str(SESSION_SECRET_KEY)).sign(payload).decode("utf-8")
+
+
+def _run(client: TestClient, path: str, cookie: str, n: int, counter: list) -> tuple[list[float], float]:
+    timings = []
+    counter[0] = 0
+    for _ in range(n):
+        # レスポンスで書き戻されたセッションは使わず、毎回同じ cookie を送る
+        client.cookies.clear()
+        t0 = time.perf_counter()
+        resp = client.get(path, headers={"cookie": f"session={cookie}"})
+        timings.append(time.perf_counter() - t0)
+        assert resp.status_code == 200, resp.text
+    return timings, counter[0] / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    engine = create_engine(f"sqlite:///{tmp.name}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionBench = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    counter = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        counter[0] += 1
+
+    def _get_db():
+        db = SessionBench()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+
+    with SessionBench() as db:
+        db.add_all([User(google_sub=f"sub-{i}", email=f"u{i}@example.com") for i in range(1000)])
+        db.commit()
+        user = db.query(User).filter(User.google_sub == "sub-500").one()
+        user_id = user.id
+
+    old_cookie = _session_cookie({"google_id": "sub-500"})
+    new_cookie = _session_cookie({"google_id": "sub-500", "user_id": user_id})
+
+    client = TestClient(app, base_url="https://testserver")
+    _user_ids.clear()
+    cases = [
+        ("legacy", "/_bench/legacy", old_cookie),
+        ("lru", "/_bench/current", old_cookie),
+        ("session", "/_bench/current", new_cookie),
+    ]
+    for name, path, cookie in cases:
+        _run(client, path, cookie, 50, counter)  # ウォームアップ
+        timings, queries = _run(client, path, cookie, args.requests, counter)
+        timings.sort()
+        p50 = statistics.median(timings) * 1000
+        p95 = timings[int(len(timings) * 0.95)] * 1000
+        print(f"{name:8s} queries/req={queries:.2f}  p50={p50:.3f} ms  p95={p95:.3f} ms")
+
+    print("identity cache:", identity_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# backend/benchmarks/bench_sync_leases.py
+"""
+同期ワーカーを複数プロセスで動かして、スループットと「同じユーザーを 2 回同期していないか」を見る
+
+プロセス数ごとに新しい SQLite を作り、--users 人分の同期ジョブを積んでから、
+--threads スレッドの SyncWorkerPool を持つ子プロセスを並べて全部終わるまで待つ。
+同期は差分同期（偽 Gmail の history.list 1 回）なので、history.list の回数 = 実際に同期した回数。
+ジョブ数と一致しなければ、同じユーザーを重ねて同期している。
+
+    cd backend
+    python -m benchmarks.bench_sync_leases
+    python -m benchmarks.bench_sync_leases --processes 1,2,4 --threads 2 --users 400 --latency-ms 50
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+
+def serve_worker(threads: int, users: int, api_root: str) -> None:
+    """子プロセス側: 全ユーザーの Credentials をキャッシュに入れて SyncWorkerPool を動かし続ける"""
+    from google.oauth2.credentials import Credentials
+
+    from app.creds import _cache_put
+    from app.gmail_client import use_api_root
+    from app.services.sync_jobs import SyncWorkerPool
+
+    use_api_root(api_root)
+    expiry = datetime.utcnow() + timedelta(hours=1)
+    for u in range(1, users + 1):
+        _cache_put(u, Credentials(token="bench", expiry=expiry))
+    SyncWorkerPool(num_workers=threads).start()
+    while True:
+        time.sleep(3600)
+
+
+def bench(processes: int, args, fake) -> None:
+    from app.database import Base
+    from app.models import GmailSyncState, GmailToken, SyncJob, User
+    from app.services.sync_jobs import JST
+
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/leases.db"
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    history_id = str(fake.stats()["history_id"])
+    user_ids = range(1, args.users + 1)
+    with Session() as db:
+        now = datetime.now(JST)
+        db.execute(insert(User), [{"id": u, "google_sub": f"lease-{u}"} for u in user_ids])
+        db.execute(insert(GmailToken), [{"user_id": u, "token_json": "{}", "version": 1} for u in user_ids])
+        db.execute(
+            insert(GmailSyncState),
+            [{"user_id": u, "history_id": history_id, "fetched_total": 0, "matched_total": 0} for u in user_ids],
+        )
+        db.execute(
+            insert(SyncJob),
+            [
+                {"user_id": u, "status": "queued", "active_user_id": u, "created_at": now,
+                 "fetched_count": 0, "parsed_count": 0, "matched_count": 0, "events_created": 0}
+                for u in user_ids
+            ],
+        )
+        db.commit()
+
+    fake.reset_stats()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    started = time.monotonic()
+    children = [
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.bench_sync_leases",
+                "--serve-worker", str(args.threads), "--users", str(args.users), "--api-root", fake.root,
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        for _ in range(processes)
+    ]
+    try:
+        while True:
+            with Session() as db:
+                remaining = db.query(func.count(SyncJob.id)).filter(SyncJob.status.in_(("queued", "running"))).scalar()
+            if remaining == 0:
+                break
+            time.sleep(0.1)
+        elapsed = time.monotonic() - started
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.wait()
+
+    with Session() as db:
+        succeeded = db.query(func.count(SyncJob.id)).filter(SyncJob.status == "succeeded").scalar()
+        failed = db.query(func.count(SyncJob.id)).filter(SyncJob.status == "failed").scalar()
+    syncs = fake.stats()["requests"].get("history.list", 0)
+    print(
+        f"processes={processes} threads={args.threads}  jobs={args.users} succeeded={succeeded} failed={failed}  "
+        f"{elapsed:6.2f}s  {args.users / elapsed:7.1f} jobs/s  "
+        f"history.list={syncs} ({'no duplicates' if syncs == succeeded else 'DUPLICATED'})"
+    )
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--users", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="偽 Gmail の応答時間")
+    parser.add_argument("--serve-worker", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--api-root", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_worker is not None:
+        serve_worker(args.serve_worker, args.users, args.api_root)
+        return
+
+    from benchmarks.fake_gmail import FakeGmailProcess
+    from benchmarks.mailgen import generate_messages
+
+    with FakeGmailProcess(generate_messages(50, seed=23), latency_ms=args.latency_ms) as fake:
+        for processes in (int(p) for p in args.processes.split(",")):
+            bench(processes, args, fake)
+
+
+if __name__ == "__main__":
+    main()
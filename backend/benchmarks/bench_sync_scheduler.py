@@ -0,0 +1,131 @@
+# backend/benchmarks/bench_sync_scheduler.py
+"""
+定期同期スケジューラ（app/services/sync_scheduler.py）の遅れ（next_due_at → ジョブを積むまで）を
+ユーザー数ごとに測る。偽 Gmail サーバー + SQLite、同期は本物の sync_gmail_messages
+
+- 全ユーザーに GmailToken と historyId 済みの GmailSyncState を入れておく（差分同期 = ほぼ history.list 1 回）
+- --active-ratio の割合のユーザーは就活メールが 0〜7 日前に来たことにする（間隔が短い）。残りは上限の間隔
+- 最初の next_due_at は各ユーザーの間隔の中にばらす（定常状態から始める）
+- 間隔は実時間だと長すぎるので --min-interval / --max-interval で縮める
+
+    cd backend
+    python -m benchmarks.bench_sync_scheduler --users 1000
+    python -m benchmarks.bench_sync_scheduler --users 10000 --workers 4 --seconds 120
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--min-interval", type=int, default=30, help="SYNC_INTERVAL_MIN_SECONDS")
+    parser.add_argument("--max-interval", type=int, default=2160, help="SYNC_INTERVAL_MAX_SECONDS")
+    parser.add_argument("--active-ratio", type=float, default=0.2)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="偽 Gmail の応答時間")
+    args = parser.parse_args()
+
+    # 設定は import 時に読まれるので、app を import する前に環境変数で渡す
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/scheduler.db",
+        SYNC_WORKERS=str(args.workers),
+        SYNC_INTERVAL_MIN_SECONDS=str(args.min_interval),
+        SYNC_INTERVAL_MAX_SECONDS=str(args.max_interval),
+    )
+    import contextlib
+    import io
+
+    from google.oauth2.credentials import Credentials
+    from sqlalchemy import func, insert
+
+    from app.creds import _cache_put
+    from app.database import Base, SessionLocal, engine
+    from app.gmail_client import use_api_root
+    from app.models import GmailSyncState, GmailToken, SyncJob, SyncSchedule, User
+    from app.services import sync_scheduler
+    from app.services.sync_jobs import SyncWorkerPool
+    from app.services.sync_scheduler import JST, SyncScheduler, next_interval
+    from benchmarks.fake_gmail import FakeGmailProcess
+    from benchmarks.mailgen import generate_messages
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(22)
+    now = datetime.now(JST)
+    expiry = datetime.utcnow() + timedelta(hours=2)
+
+    with FakeGmailProcess(generate_messages(50, seed=22), latency_ms=args.latency_ms) as fake:
+        use_api_root(fake.root)
+        history_id = str(fake.stats()["history_id"])
+
+        with SessionLocal() as db:
+            user_ids = range(1, args.users + 1)
+            db.execute(insert(User), [{"id": u, "google_sub": f"sched-{u}"} for u in user_ids])
+            db.execute(insert(GmailToken), [{"user_id": u, "token_json": "{}", "version": 1} for u in user_ids])
+            db.execute(
+                insert(GmailSyncState),
+                [{"user_id": u, "history_id": history_id, "fetched_total": 0, "matched_total": 0} for u in user_ids],
+            )
+            rows = []
+            for u in user_ids:
+                recruiting_at = None
+                if rng.random() < args.active_ratio:
+                    recruiting_at = now - timedelta(days=rng.uniform(0, 7))
+                interval = next_interval(recruiting_at, 0, now)
+                rows.append({
+                    "user_id": u,
+                    "interval_seconds": interval,
+                    "next_due_at": now + timedelta(seconds=rng.uniform(0, interval)),
+                    "last_recruiting_at": recruiting_at,
+                    "consecutive_failures": 0,
+                })
+            db.execute(insert(SyncSchedule), rows)
+            db.commit()
+            demand = sum(1 / r["interval_seconds"] for r in rows)
+
+        for u in user_ids:
+            _cache_put(u, Credentials(token="bench", expiry=expiry))
+
+        print(
+            f"users={args.users} workers={args.workers} interval={args.min_interval}-{args.max_interval}s "
+            f"demand={demand:.1f} syncs/s"
+        )
+
+        workers = SyncWorkerPool(num_workers=args.workers)
+        scheduler = SyncScheduler()
+        workers.start()
+        lags: list[float] = []
+        max_backlog = 0.0
+        started = time.monotonic()
+        try:
+            # 同期ごとの print を黙らせる
+            with contextlib.redirect_stdout(io.StringIO()):
+                while time.monotonic() - started < args.seconds:
+                    lags.extend(scheduler.tick())
+                    max_backlog = max(max_backlog, sync_scheduler._last_tick["backlog_seconds"])
+                    time.sleep(sync_scheduler.BUSY_TICK_SECONDS)
+        finally:
+            workers.stop()
+        elapsed = time.monotonic() - started
+
+        with SessionLocal() as db:
+            done = db.query(func.count(SyncJob.id)).filter(SyncJob.status == "succeeded").scalar()
+            failed = db.query(func.count(SyncJob.id)).filter(SyncJob.status == "failed").scalar()
+
+    lags.sort()
+    p99 = lags[max(0, int(len(lags) * 0.99) - 1)] if lags else 0.0
+    print(
+        f"  syncs: succeeded={done} failed={failed} ({done / elapsed:.1f}/s)  "
+        f"lag p50={statistics.median(lags) if lags else 0:.2f}s p99={p99:.2f}s max={lags[-1] if lags else 0:.2f}s  "
+        f"max backlog={max_backlog:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_two_phase.py
+"""
+メール取得の 1 段階（全件 format=full）と 2 段階（全件 metadata → 候補だけ full）を
+偽 Gmail サーバー相手に比べる。転送バイト数・リクエスト数・経過時間・クライアント側 CPU 時間を出す。
+
+    cd backend
+    python -m benchmarks.bench_two_phase --messages 1000 --recruiting-ratio 0.2
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+
+from app.gmail_client import client_for_credentials, use_api_root
+from app.gmail_service import get_emails_by_ids, get_emails_metadata_first
+from app.models.gmail_sync_state import GmailSyncState
+from app.services.recruiting import make_candidate_filter
+from benchmarks.fake_gmail import FakeGmailProcess
+from benchmarks.mailgen import generate_messages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--recruiting-ratio", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, seed=3, recruiting_ratio=args.recruiting_ratio)
+    ids = [m["id"] for m in messages]
+    creds = Credentials(token="bench", expiry=datetime.utcnow() + timedelta(hours=1))
+    is_candidate = make_candidate_filter(GmailSyncState())
+
+    with FakeGmailProcess(messages) as fake:
+        use_api_root(fake.root)
+        client = client_for_credentials(creds)
+
+        cases = [
+            ("full", lambda: get_emails_by_ids(0, ids, batch_size=args.batch_size, client=client)),
+            ("two-phase", lambda: get_emails_metadata_first(
+                0, ids, is_candidate, batch_size=args.batch_size, client=client
+            )),
+        ]
+        results = {}
+        for name, run in cases:
+            run()  # ウォームアップ（接続・import）
+            fake.reset_stats()
+            wall0, cpu0 = time.perf_counter(), time.process_time()
+            emails = run()
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            stats = fake.stats()
+            results[name] = emails
+            bodies = sum(1 for e in emails if e["body"] is not None)
+            print(
+                f"{name:10s} wall={wall:6.2f}s cpu={cpu:6.2f}s "
+                f"bytes={stats['bytes_sent'] / 1e6:7.2f}MB bodies={bodies:5d} "
+                f"requests={stats['requests']}"
+            )
+
+    # 2 段階で本文を取らなかったメールが、1 段階でも event にならないことを確認する
+    from app.services.event_extractor import extract_event_fields
+
+    full_by_id = {e["id"]: e for e in results["full"]}
+    missed = 0
+    for e in results["two-phase"]:
+        if e["body"] is None:
+            f = full_by_id[e["id"]]
+            _, fields = extract_event_fields(f["subject"] or "", f["body"] or "", f["from"] or "")
+            missed += fields is not None
+    print(f"events missed by two-phase: {missed}")
+
+
+if __name__ == "__main__":
+    main()
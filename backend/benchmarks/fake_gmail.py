@@ -0,0 +1,605 @@
+# backend/benchmarks/fake_gmail.py
+"""
+ベンチマーク用の偽 Gmail API サーバー（http.server だけで動く）
+
+mailgen のメールボックス（就活メール + ノイズ）を Gmail API の形で返す。
+- GET  /gmail/v1/users/me/messages             messages.list（maxResults / pageToken / q / labelIds、q の after: は届いた時刻）
+- GET  /gmail/v1/users/me/messages/{id}        messages.get（format=full / metadata）
+- GET  /gmail/v1/users/me/history              history.list（messagesAdded / pageToken、期限切れは 404）
+- GET  /gmail/v1/users/me/profile              users.getProfile
+- POST /gmail/v1/users/me/watch                users.watch（通知は送らない。benchmarks/send_push.py で送る）
+- POST /batch（/batch/gmail/v1 も可）           batch（multipart/mixed）
+- ベンチ用: GET /_stats（転送バイト数・リクエスト数）, POST /_reset,
+            POST /_deliver?n=100（新着を届ける）, POST /_expire（historyId を期限切れに）,
+            POST /_fail?n=5（次の 5 リクエストをエラーにする）
+
+format=full は実物に寄せて、配送系のヘッダーと text/plain + text/html の 2 パートを付ける。
+--latency-ms でリクエストごと、--per-item-ms で batch の 1 件ごとに待たせられる。
+--error-rate でその割合の API リクエスト（batch の中身も 1 件ずつ）を --error-status
+（429 / 403 = rateLimitExceeded / 503 など）で失敗させる。失敗させた数は /_stats の injected_errors。
+
+単体で起動して、アプリをこのサーバーに向ける:
+    cd backend
+    python -m benchmarks.fake_gmail --port 8765 --messages 1000 --latency-ms 30
+    GMAIL_API_ROOT=http://127.0.0.1:8765/ uvicorn app.main:app
+（Gmail token は偽物でよいが、期限内の token が DB に入っている必要がある）
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+import urllib.request
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.mailgen import generate_messages
+
+_MESSAGE_RE = re.compile(r"^/gmail/v1/users/me/messages/([^/?]+)$")
+
+# format=full にだけ付く配送系ヘッダー（実物は数 KB ある）
+_TRANSPORT_HEADERS = [
+    ("Delivered-To", "me@example.com"),
+    ("Received", "by 2002:a05:6a10:1234 with SMTP id abc123; Mon, 1 Sep 2025 03:00:00 -0700 (PDT)"),
+    ("X-Received", "by 2002:a17:90a:abcd with SMTP id xyz789.1756720800000; Mon, 1 Sep 2025 03:00:00 -0700 (PDT)"),
+    ("ARC-Seal", "i=1; a=rsa-sha256; t=1756720800; cv=none; d=google.com; s=arc-20240605; b=" + "A" * 340),
+    ("ARC-Message-Signature", "i=1; a=rsa-sha256; c=relaxed/relaxed; d=google.com; s=arc-20240605; bh=" + "B" * 340),
+    ("ARC-Authentication-Results", "i=1; mx.google.com; dkim=pass header.i=@example.co.jp; spf=pass"),
+    ("Return-Path", "<bounce@example.co.jp>"),
+    ("Received-SPF", "pass (google.com: domain of bounce@example.co.jp designates 192.0.2.1 as permitted sender)"),
+    ("DKIM-Signature", "v=1; a=rsa-sha256; c=relaxed/relaxed; d=example.co.jp; s=s1; bh=" + "C" * 300),
+    ("MIME-Version", "1.0"),
+    ("Content-Type", 'multipart/alternative; boundary="000000000000abcdef"'),
+]
+
+_HTML_TEMPLATE = (
+    "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><style>"
+    + "body{font-family:sans-serif;margin:0;padding:0}.c{max-width:600px;margin:0 auto}" * 20
+    + "</style></head><body><div class=\"c\"><p>{body}</p>"
+    + "<table><tr><td style=\"padding:8px;color:#666;font-size:12px\">配信停止はこちら</td></tr></table>" * 10
+    + "</div></body></html>"
+)
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _compile_query(q: str | None):
+    """
+    messages.list の q のうち、このアプリが作る形だけを解釈する（recruiting.build_gmail_query）
+    - {a b from:c} は OR、{} なしは AND
+    - from:x は From に、それ以外の語は件名・本文に部分一致
+    - () を含む式（ユーザー指定の検索式）は解釈せず全件に一致させる
+    """
+    if not q or "(" in q:
+        return lambda m: True
+    q = q.strip()
+    any_of = q.startswith("{") and q.endswith("}")
+    if any_of:
+        q = q[1:-1]
+    terms = [t.strip('"').lower() for t in re.findall(r'"[^"]*"|\S+', q)]
+
+    def _match(m: dict) -> bool:
+        text = (m["subject"] + "\n" + m["body"]).lower()
+        hits = (
+            t[5:] in m["from"].lower() if t.startswith("from:") else t in text
+            for t in terms
+        )
+        return any(hits) if any_of else all(hits)
+
+    return _match
+
+
+class FakeMailbox:
+    """
+    mailgen のメールを Gmail API のレスポンス形式にする
+
+    メールは古い順に 1 通ずつ「配信」され、配信ごとに historyId が 1 進む。
+    delivered で最初に配信済みにする通数を決め、残りは deliver() で後から届ける
+    （差分同期 = history.list のベンチ用）。
+    """
+
+    LABEL_IDS = ["INBOX", "CATEGORY_UPDATES"]
+    BASE_HISTORY_ID = 100000
+
+    def __init__(self, messages: list[dict], delivered: int | None = None):
+        # mailgen は新しい順なので、配信は逆順（古い順）
+        self.pending = list(reversed(messages))
+        self.delivered: list[dict] = []
+        self.by_id: dict[str, dict] = {}
+        self.history_ids: dict[str, int] = {}
+        # 届いた時刻（Gmail の internalDate 相当。q の after: で見る）
+        self.delivered_at: dict[str, float] = {}
+        # これより前の startHistoryId は 404（期限切れ）にする
+        self.min_history_id = self.BASE_HISTORY_ID
+        self.lock = threading.Lock()
+        self.deliver(len(self.pending) if delivered is None else delivered)
+
+    @property
+    def history_id(self) -> int:
+        return self.BASE_HISTORY_ID + len(self.delivered)
+
+    def deliver(self, n: int) -> int:
+        """未配信のメールを n 通届ける。実際に届けた通数を返す"""
+        with self.lock:
+            batch, self.pending = self.pending[:n], self.pending[n:]
+            for m in batch:
+                self.delivered.append(m)
+                self.by_id[m["id"]] = m
+                self.history_ids[m["id"]] = self.history_id
+                self.delivered_at[m["id"]] = time.time()
+            return len(batch)
+
+    def expire_history(self) -> None:
+        """今までに渡した historyId をすべて期限切れにする"""
+        with self.lock:
+            self.min_history_id = self.history_id + 1
+
+    def profile(self) -> dict:
+        return {
+            "emailAddress": "me@example.com",
+            "messagesTotal": len(self.delivered),
+            "threadsTotal": len(self.delivered),
+            "historyId": str(self.history_id),
+        }
+
+    def list_messages(
+        self,
+        max_results: int = 100,
+        page_token: str | None = None,
+        q: str | None = None,
+        label_ids: list[str] | None = None,
+    ) -> dict:
+        max_results = min(max_results, 500)
+        # after:<epoch 秒> は届いた時刻で絞る（残りの式は _compile_query）
+        after = re.search(r"(?:^|\s)after:(\d+)(?=\s|$)", q or "")
+        if after:
+            q = (q[:after.start()] + q[after.end():]).strip()
+        match = _compile_query(q)
+        if label_ids and not set(label_ids) <= set(self.LABEL_IDS):
+            visible = []
+        else:
+            visible = [
+                m for m in reversed(self.delivered)
+                if match(m) and (not after or self.delivered_at[m["id"]] > int(after.group(1)))
+            ]
+
+        start = int(page_token or 0)
+        page = visible[start:start + max_results]
+        resp = {
+            "messages": [{"id": m["id"], "threadId": m["id"]} for m in page],
+            "resultSizeEstimate": len(visible),
+        }
+        if start + max_results < len(visible):
+            resp["nextPageToken"] = str(start + max_results)
+        if not page:
+            resp.pop("messages")
+        return resp
+
+    def history(
+        self,
+        start_history_id: int,
+        page_token: str | None = None,
+        max_results: int = 100,
+        label_id: str | None = None,
+    ) -> dict | None:
+        """messagesAdded だけの history.list。期限切れなら None"""
+        if start_history_id < self.min_history_id:
+            return None
+        max_results = min(max_results, 500)
+
+        first = max(start_history_id - self.BASE_HISTORY_ID, 0) + int(page_token or 0)
+        page = self.delivered[first:first + max_results]
+        if label_id and label_id not in self.LABEL_IDS:
+            page = []
+
+        resp = {"historyId": str(self.history_id)}
+        if page:
+            resp["history"] = [
+                {
+                    "id": str(self.history_ids[m["id"]]),
+                    "messages": [{"id": m["id"], "threadId": m["id"]}],
+                    "messagesAdded": [
+                        {"message": {"id": m["id"], "threadId": m["id"], "labelIds": self.LABEL_IDS}}
+                    ],
+                }
+                for m in page
+            ]
+        if first + max_results < len(self.delivered):
+            resp["nextPageToken"] = str(int(page_token or 0) + max_results)
+        return resp
+
+    def get_message(self, message_id: str, fmt: str = "full", metadata_headers: list[str] | None = None) -> dict | None:
+        m = self.by_id.get(message_id)
+        if m is None:
+            return None
+
+        headers = [
+            {"name": "Subject", "value": m["subject"]},
+            {"name": "From", "value": m["from"]},
+            {"name": "To", "value": m["to"]},
+            {"name": "Date", "value": m["date"]},
+        ]
+        resp = {
+            "id": m["id"],
+            "threadId": m["id"],
+            "labelIds": self.LABEL_IDS,
+            "snippet": m["snippet"],
+            "historyId": str(self.history_ids[m["id"]]),
+            "internalDate": "1756720800000",
+        }
+
+        if fmt == "metadata":
+            if metadata_headers:
+                wanted = {h.lower() for h in metadata_headers}
+                headers = [h for h in headers if h["name"].lower() in wanted]
+            resp["payload"] = {"mimeType": "multipart/alternative", "headers": headers}
+            resp["sizeEstimate"] = 2000
+            return resp
+
+        html = _HTML_TEMPLATE.replace("{body}", m["body"].replace("\n", "<br>"))
+        resp["payload"] = {
+            "partId": "",
+            "mimeType": "multipart/alternative",
+            "filename": "",
+            "headers": [{"name": k, "value": v} for k, v in _TRANSPORT_HEADERS] + headers,
+            "body": {"size": 0},
+            "parts": [
+                {
+                    "partId": "0",
+                    "mimeType": "text/plain",
+                    "filename": "",
+                    "headers": [{"name": "Content-Type", "value": 'text/plain; charset="UTF-8"'}],
+                    "body": {"size": len(m["body"].encode()), "data": _b64(m["body"])},
+                },
+                {
+                    "partId": "1",
+                    "mimeType": "text/html",
+                    "filename": "",
+                    "headers": [{"name": "Content-Type", "value": 'text/html; charset="UTF-8"'}],
+                    "body": {"size": len(html.encode()), "data": _b64(html)},
+                },
+            ],
+        }
+        resp["sizeEstimate"] = 6000 + len(html)
+        return resp
+
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # サーバーごとに差し替える（make_server が設定する）
+    mailbox: FakeMailbox
+    stats: dict
+    stats_lock: threading.Lock
+    latency: float = 0.0           # HTTP リクエスト 1 回ごとの待ち（秒）
+    per_item_latency: float = 0.0  # batch の中身 1 件ごとの待ち（秒）
+    error_rate: float = 0.0        # API リクエストをこの割合で error_status にする
+    error_status: int = 429
+    rng: random.Random
+
+    def log_message(self, *args):
+        pass
+
+    # ---------- 送信 ----------
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json; charset=UTF-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.stats_lock:
+            self.stats["bytes_sent"] += len(body)
+
+    def _send_json(self, status: int, obj: dict) -> None:
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    def _count_http(self) -> None:
+        with self.stats_lock:
+            self.stats["http_requests"] += 1
+
+    def _count(self, key: str) -> None:
+        with self.stats_lock:
+            self.stats["requests"][key] = self.stats["requests"].get(key, 0) + 1
+
+    # ---------- エラー注入 ----------
+
+    def _should_fail(self) -> bool:
+        with self.stats_lock:
+            if self.stats["fail_next"] > 0:
+                self.stats["fail_next"] -= 1
+            elif not (self.error_rate and self.rng.random() < self.error_rate):
+                return False
+            self.stats["injected_errors"] += 1
+        return True
+
+    def _error(self) -> tuple[int, dict]:
+        """実物の Gmail と同じ形のレート制限・サーバーエラー"""
+        status = self.error_status
+        if status in (403, 429):
+            message = "User-rate limit exceeded." if status == 403 else "Too many concurrent requests for user."
+            reason = "userRateLimitExceeded" if status == 403 else "rateLimitExceeded"
+            return status, {
+                "error": {
+                    "code": status,
+                    "message": message,
+                    "errors": [{"message": message, "domain": "usageLimits", "reason": reason}],
+                    "status": "RESOURCE_EXHAUSTED" if status == 429 else "PERMISSION_DENIED",
+                }
+            }
+        return status, {"error": {"code": status, "message": "Backend Error", "status": "UNAVAILABLE"}}
+
+    # ---------- API ----------
+
+    def _dispatch_api(self, method: str, path_qs: str) -> tuple[int, dict]:
+        """1 リクエスト分の (status, JSON) を返す（batch の中身からも呼ぶ）"""
+        if self._should_fail():
+            return self._error()
+        url = urlsplit(path_qs)
+        query = parse_qs(url.query)
+
+        def _arg(name: str, default=None):
+            return query.get(name, [default])[0]
+
+        if method == "GET" and url.path == "/gmail/v1/users/me/messages":
+            self._count("messages.list")
+            return 200, self.mailbox.list_messages(
+                max_results=int(_arg("maxResults", "100")),
+                page_token=_arg("pageToken"),
+                q=_arg("q"),
+                label_ids=query.get("labelIds"),
+            )
+
+        if method == "GET" and url.path == "/gmail/v1/users/me/profile":
+            self._count("users.getProfile")
+            return 200, self.mailbox.profile()
+
+        if method == "GET" and url.path == "/gmail/v1/users/me/history":
+            self._count("history.list")
+            resp = self.mailbox.history(
+                int(_arg("startHistoryId", "0")),
+                page_token=_arg("pageToken"),
+                max_results=int(_arg("maxResults", "100")),
+                label_id=_arg("labelId"),
+            )
+            if resp is None:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return 200, resp
+
+        if method == "POST" and url.path == "/gmail/v1/users/me/watch":
+            self._count("users.watch")
+            # 本物と同じく 7 日後に切れる（expiration は epoch ミリ秒の文字列）
+            return 200, {
+                "historyId": str(self.mailbox.history_id),
+                "expiration": str(int((time.time() + 7 * 86400) * 1000)),
+            }
+
+        m = _MESSAGE_RE.match(url.path)
+        if method == "GET" and m:
+            fmt = _arg("format", "full")
+            self._count(f"messages.get:{fmt}")
+            resp = self.mailbox.get_message(m.group(1), fmt, query.get("metadataHeaders"))
+            if resp is None:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return 200, resp
+
+        return 404, {"error": {"code": 404, "message": f"unknown endpoint {method} {url.path}"}}
+
+    def _handle_batch(self) -> None:
+        self._count("batch")
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        envelope = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw
+        )
+
+        boundary = "batch_fake_gmail"
+        out = []
+        for part in envelope.iter_parts():
+            if self.per_item_latency:
+                time.sleep(self.per_item_latency)
+            content_id = part.get("Content-ID", "").strip("<>")
+            request_line = part.get_payload(decode=True).split(b"\r\n", 1)[0].decode()
+            method, path_qs, _ = request_line.split(" ", 2)
+            status, obj = self._dispatch_api(method, path_qs)
+            body = json.dumps(obj, ensure_ascii=False)
+            out.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{body}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        self._send(200, "".join(out).encode("utf-8"), f"multipart/mixed; boundary={boundary}")
+
+    # ---------- ベンチ用の操作 ----------
+
+    def _handle_control(self) -> bool:
+        url = urlsplit(self.path)
+        if url.path == "/_stats":
+            with self.stats_lock:
+                stats = json.loads(json.dumps(self.stats))
+            stats["history_id"] = self.mailbox.history_id
+            stats["delivered"] = len(self.mailbox.delivered)
+            body = json.dumps(stats).encode()
+        elif url.path == "/_reset":
+            with self.stats_lock:
+                self.stats["bytes_sent"] = 0
+                self.stats["http_requests"] = 0
+                self.stats["requests"] = {}
+                self.stats["injected_errors"] = 0
+                self.stats["fail_next"] = 0
+            body = b"{}"
+        elif url.path == "/_deliver":
+            n = int(parse_qs(url.query).get("n", ["1"])[0])
+            body = json.dumps({"delivered": self.mailbox.deliver(n)}).encode()
+        elif url.path == "/_expire":
+            self.mailbox.expire_history()
+            body = b"{}"
+        elif url.path == "/_fail":
+            n = int(parse_qs(url.query).get("n", ["1"])[0])
+            with self.stats_lock:
+                self.stats["fail_next"] += n
+            body = b"{}"
+        else:
+            return False
+        # 制御用のやりとりは bytes_sent に数えない
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def do_GET(self):
+        if self._handle_control():
+            return
+        self._count_http()
+        if self.latency:
+            time.sleep(self.latency)
+        status, obj = self._dispatch_api("GET", self.path)
+        self._send_json(status, obj)
+
+    def do_POST(self):
+        if self._handle_control():
+            return
+        self._count_http()
+        if self.latency:
+            time.sleep(self.latency)
+        if self.path.split("?")[0] in ("/batch", "/batch/gmail/v1"):
+            self._handle_batch()
+            return
+        # users.watch など。本文は使わないので読み捨てる
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status, obj = self._dispatch_api("POST", self.path)
+        self._send_json(status, obj)
+
+
+def make_server(
+    messages: list[dict],
+    host: str = "127.0.0.1",
+    port: int = 0,
+    delivered: int | None = None,
+    latency_ms: float = 0.0,
+    per_item_ms: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 429,
+    seed: int = 0,
+) -> ThreadingHTTPServer:
+    handler = type(
+        "BoundFakeGmailHandler",
+        (FakeGmailHandler,),
+        {
+            "mailbox": FakeMailbox(messages, delivered=delivered),
+            "stats": {"bytes_sent": 0, "http_requests": 0, "requests": {}, "injected_errors": 0, "fail_next": 0},
+            "stats_lock": threading.Lock(),
+            "latency": latency_ms / 1000,
+            "per_item_latency": per_item_ms / 1000,
+            "error_rate": error_rate,
+            "error_status": error_status,
+            "rng": random.Random(seed),
+        },
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _serve(messages: list[dict], port_queue, server_kwargs: dict) -> None:
+    server = make_server(messages, **server_kwargs)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+class FakeGmailProcess:
+    """
+    偽サーバーを別プロセスで動かす（クライアント側の CPU 時間をサーバーと分けて測れる）
+
+        with FakeGmailProcess(messages, latency_ms=20) as fake:
+            use_api_root(fake.root)      # app.gmail_client
+            fake.deliver(100)            # 新着を 100 通届ける
+            fake.stats()                 # {"bytes_sent", "requests", "history_id", ...}
+    """
+
+    def __init__(self, messages: list[dict], **server_kwargs):
+        self.messages = messages
+        self.server_kwargs = server_kwargs
+        self.root = None
+        self._process = None
+
+    def __enter__(self) -> "FakeGmailProcess":
+        ctx = multiprocessing.get_context("spawn")
+        port_queue = ctx.Queue()
+        self._process = ctx.Process(
+            target=_serve, args=(self.messages, port_queue, self.server_kwargs), daemon=True
+        )
+        self._process.start()
+        self.root = f"http://127.0.0.1:{port_queue.get(timeout=60)}/"
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join()
+
+    def _control(self, path: str) -> dict:
+        method = "GET" if path.startswith("_stats") else "POST"
+        req = urllib.request.Request(self.root + path, method=method)
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+
+    def stats(self) -> dict:
+        return self._control("_stats")
+
+    def reset_stats(self) -> None:
+        self._control("_reset")
+
+    def deliver(self, n: int) -> int:
+        return self._control(f"_deliver?n={n}")["delivered"]
+
+    def expire_history(self) -> None:
+        self._control("_expire")
+
+    def fail_next(self, n: int) -> None:
+        """次の n リクエスト（batch の中身は 1 件ずつ数える）を error_status で失敗させる"""
+        self._control(f"_fail?n={n}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--delivered", type=int, default=None, help="最初に届いている通数（既定: 全部）")
+    parser.add_argument("--recruiting-ratio", type=float, default=0.2)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--per-item-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.messages, seed=1, recruiting_ratio=args.recruiting_ratio)
+    server = make_server(
+        messages,
+        port=args.port,
+        delivered=args.delivered,
+        latency_ms=args.latency_ms,
+        per_item_ms=args.per_item_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    print(f"fake gmail listening on http://127.0.0.1:{server.server_port}/ ({len(messages)} messages)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
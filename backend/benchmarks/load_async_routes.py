@@ -0,0 +1,172 @@
+# backend/benchmarks/load_async_routes.py
+"""
+Gmail の取り込み（POST /api/gmail/import）が走っている間も、他の API が遅くならないかを見る負荷テスト
+
+偽 Gmail サーバー（応答に --latency-ms かかる）と uvicorn（1 ワーカー）を立て、
+  1. idle: /health と /api/events だけを叩く
+  2. importing: 同時に --importers 本のクライアントが import を投げ続ける
+の 2 段階で /health・/api/events のレイテンシ（p50 / p99）を出す。
+import がイベントループを止めていれば、2 の p99 が Gmail の待ち時間ぶん跳ね上がる。
+
+    cd backend
+    python -m benchmarks.load_async_routes
+    python -m benchmarks.load_async_routes --importers 16 --latency-ms 300 --seconds 10
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.fake_gmail import FakeGmailProcess
+from benchmarks.mailgen import generate_messages
+
+PROBES = ["/health", "/api/events/"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(port: int, users: int) -> None:
+    """子プロセス側: X-User-Id ヘッダのユーザーでログイン済み扱いにして app を起動する"""
+    from datetime import datetime, timedelta
+
+    import uvicorn
+    from fastapi import Request
+    from google.oauth2.credentials import Credentials
+
+    from app.core.deps import get_current_user_id
+    from app.creds import _cache_put
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.models import User
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add_all([User(id=u, google_sub=f"load-{u}") for u in range(1, users + 1)])
+        db.commit()
+
+    # DB の token の代わりに、期限内の Credentials をキャッシュに入れておく
+    expiry = datetime.utcnow() + timedelta(hours=1)
+    for u in range(1, users + 1):
+        _cache_put(u, Credentials(token="load", expiry=expiry))
+
+    def _user_from_header(request: Request) -> int:
+        return int(request.headers.get("X-User-Id", "1"))
+
+    app.dependency_overrides[get_current_user_id] = _user_from_header
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_ready(base: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base + "/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def _probe(base: str, path: str, stop: threading.Event, out: list[float]) -> None:
+    with httpx.Client(base_url=base, timeout=30) as client:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            client.get(path)
+            out.append(time.perf_counter() - t0)
+            time.sleep(0.01)
+
+
+def _importer(base: str, user_id: int, stop: threading.Event, counts: list[int]) -> None:
+    # 同じユーザーの import を同時に投げることはないので、クライアントごとに別ユーザー
+    with httpx.Client(base_url=base, timeout=120, headers={"X-User-Id": str(user_id)}) as client:
+        while not stop.is_set():
+            try:
+                counts.append(client.post("/api/gmail/import").status_code)
+            except httpx.HTTPError:
+                counts.append(0)
+
+
+def _phase(base: str, seconds: float, importers: int) -> tuple[dict, list[int]]:
+    stop = threading.Event()
+    timings = {path: [] for path in PROBES}
+    imports: list[int] = []
+    threads = [
+        threading.Thread(target=_probe, args=(base, path, stop, timings[path])) for path in PROBES
+    ] + [
+        threading.Thread(target=_importer, args=(base, i + 2, stop, imports)) for i in range(importers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return timings, imports
+
+
+def _report(label: str, timings: dict, imports: list[int]) -> None:
+    for path, values in timings.items():
+        values = sorted(values)
+        p99 = values[max(0, int(len(values) * 0.99) - 1)]
+        print(
+            f"  {label:<10} {path:<14} n={len(values):5d}  "
+            f"p50={statistics.median(values) * 1000:8.2f} ms  p99={p99 * 1000:8.2f} ms"
+        )
+    if imports:
+        ok = sum(1 for s in imports if s == 200)
+        print(f"  {label:<10} imports completed={len(imports)} ok={ok}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--importers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--seconds", type=float, default=8)
+    parser.add_argument("--serve", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        serve(args.serve, users=args.importers + 1)
+        return
+
+    messages = generate_messages(200, seed=20)
+    with FakeGmailProcess(messages, latency_ms=args.latency_ms) as fake:
+        port = _free_port()
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/load.db",
+            GMAIL_API_ROOT=fake.root,
+        )
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.load_async_routes",
+                "--serve", str(port), "--importers", str(args.importers),
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            _wait_ready(base)
+            print(f"gmail latency={args.latency_ms:.0f} ms, importers={args.importers}")
+            _report("idle", *_phase(base, args.seconds, 0))
+            _report("importing", *_phase(base, args.seconds, args.importers))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
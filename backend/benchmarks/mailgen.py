@@ -0,0 +1,95 @@
+# backend/benchmarks/mailgen.py
+"""
+ベンチマーク用のメール生成器（就活メール + ノイズメール）
+
+get_emails() が返す dict と同じ形（id / date / from / to / subject / snippet / body）を作る。
+seed を固定すれば毎回同じメールボックスになる。
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+JST = timezone(timedelta(hours=9))
+
+COMPANIES = [
+    "株式会社サイバーエージェント", "楽天グループ株式会社", "Sky株式会社", "合同会社DMM.com",
+    "株式会社メルカリ", "ライトハウスコンサルティング", "株式会社リクルート", "ソニー株式会社",
+    "トヨタ自動車株式会社", "株式会社野村総合研究所", "有限会社サンプル商事", "アクセンチュア",
+    "株式会社博報堂", "三菱商事株式会社", "株式会社ゆめみ", "freee株式会社",
+]
+SHORT_NAMES = ["サイバーエージェント", "メルカリ", "アクセンチュア", "ゆめみ", "ライトハウスコンサルティング"]
+PEOPLE = ["星歩夢", "山田太郎", "佐藤花子", "鈴木一郎"]
+STAGES = ["一次面接", "二次面接", "最終面接", "会社説明会", "インターン選考", "グループディスカッション"]
+
+RECRUITING_SUBJECTS = [
+    "【{stage}のご案内】{company}",
+    "【選考案内】{stage}について（{short}）",
+    "【選考通過】{stage}のご案内 — {company}",
+    "{company} {stage}日程のご連絡",
+    "【{short}】{stage}のお知らせ",
+    "{stage}のご案内",
+]
+RECRUITING_BODIES = [
+    "{person}様\n\n{company} 採用担当です。\n{stage}の日程が決まりましたのでご連絡いたします。\n"
+    "日時: {date} {time}\n場所: オンライン（Zoom）\n\n当日はよろしくお願いいたします。",
+    "{person}様\nこの度は弊社にご応募いただきありがとうございます。\n"
+    "{stage}を下記の日程で実施いたします。\n■日時 {date} {time}〜\n■持ち物 筆記用具\n{short} 採用チームです",
+    "{stage}のご案内です。\n{date} {time} より開始します。\n詳細はマイページをご確認ください。",
+]
+NOISE = [
+    ("週刊ニュースレター #{n}", "Weekly Digest <news@example.com>", "今週のおすすめ記事をお届けします。"),
+    ("【セール】最大50%OFF！", "ショップ <shop@example.jp>", "期間限定のセールを開催中です。"),
+    ("ご注文の確認 (#{n})", "Amazon.co.jp <auto-confirm@amazon.co.jp>", "ご注文ありがとうございます。"),
+    ("マイナビ2026 おすすめ企業特集", "マイナビ2026 <news@mynavi.jp>", "あなたにおすすめの企業をご紹介します。"),
+    ("Re: 来週の飲み会", "{person} <friend@gmail.com>", "了解です！また連絡します。"),
+    ("セキュリティ通知", "Google <no-reply@accounts.google.com>", "新しいデバイスからのログインがありました。"),
+]
+
+
+def _recruiting(rng: random.Random, received: datetime) -> dict:
+    company = rng.choice(COMPANIES)
+    short = rng.choice(SHORT_NAMES)
+    stage = rng.choice(STAGES)
+    event_at = received + timedelta(days=rng.randint(3, 30))
+    fmt = {
+        "company": company, "short": short, "stage": stage, "person": rng.choice(PEOPLE),
+        "date": event_at.strftime(rng.choice(["%Y/%m/%d", "%Y-%m-%d"])),
+        "time": f"{rng.choice([9, 10, 13, 14, 16])}:{rng.choice(['00', '30'])}",
+    }
+    subject = rng.choice(RECRUITING_SUBJECTS).format(**fmt)
+    body = rng.choice(RECRUITING_BODIES).format(**fmt)
+    sender = rng.choice([
+        f"{company} <recruit@example.co.jp>",
+        f'"{company} 採用担当" <saiyo@example.co.jp>',
+        f'"{rng.choice(PEOPLE)}" <hr@example.co.jp>',
+        "noreply@example.co.jp",
+    ])
+    return {"subject": subject, "body": body, "from": sender}
+
+
+def _noise(rng: random.Random, n: int) -> dict:
+    subject, sender, body = rng.choice(NOISE)
+    fmt = {"n": n, "person": rng.choice(PEOPLE)}
+    return {
+        "subject": subject.format(**fmt),
+        "body": (body + "\n") * rng.randint(3, 40),
+        "from": sender.format(**fmt),
+    }
+
+
+def generate_messages(n: int, seed: int = 0, recruiting_ratio: float = 0.2) -> list[dict]:
+    """新しい順に n 通のメール dict を返す"""
+    rng = random.Random(seed)
+    now = datetime(2025, 9, 1, 12, 0, tzinfo=JST)
+    messages = []
+    for i in range(n):
+        received = now - timedelta(minutes=37 * i)
+        m = _recruiting(rng, received) if rng.random() < recruiting_ratio else _noise(rng, i)
+        messages.append({
+            "id": f"{seed:04x}{i:012x}",
+            "date": format_datetime(received),
+            "to": "me@example.com",
+            "snippet": m["body"].replace("\n", " ")[:100],
+            **m,
+        })
+    return messages
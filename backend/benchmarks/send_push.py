@@ -0,0 +1,68 @@
+# backend/benchmarks/send_push.py
+"""
+Pub/Sub の push と同じ形の Gmail 通知を POST する（Pub/Sub 無しで /api/gmail/push を試す）
+
+    cd backend
+    GMAIL_PUSH_TOKEN=devtoken uvicorn app.main:app
+    python -m benchmarks.send_push --token devtoken --email you@gmail.com --history-id 123456
+    python -m benchmarks.send_push --token devtoken --email you@gmail.com --history-id 123456 --count 20 --interval-ms 50
+
+--count で同じユーザーへの通知を続けて送る（historyId は 1 ずつ進める。debounce で 1 回の同期になるはず）。
+"""
+import argparse
+import base64
+import json
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+
+def make_envelope(email: str, history_id: int, subscription: str = "projects/local/subscriptions/gmail-push") -> dict:
+    """Pub/Sub の push サブスクリプションが送ってくる本文"""
+    data = json.dumps({"emailAddress": email, "historyId": history_id}).encode()
+    return {
+        "message": {
+            "data": base64.b64encode(data).decode(),
+            "messageId": uuid.uuid4().hex,
+            "publishTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "subscription": subscription,
+    }
+
+
+def push_url(base_url: str, token: str) -> str:
+    return f"{base_url.rstrip('/')}/api/gmail/push?{urllib.parse.urlencode({'token': token})}"
+
+
+def send(url: str, envelope: dict) -> int:
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(envelope).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req) as resp:
+        return resp.status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True, help="GMAIL_PUSH_TOKEN")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--history-id", type=int, required=True)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--interval-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    url = push_url(args.base_url, args.token)
+    for i in range(args.count):
+        status = send(url, make_envelope(args.email, args.history_id + i))
+        print(f"historyId={args.history_id + i} -> {status}")
+        if args.interval_ms:
+            time.sleep(args.interval_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,5 +7,5 @@ pip install --upgrade pip setuptools wheel
 # 依存関係のインストール
 pip install --no-cache-dir -r requirements.txt
 
-# データベースマイグレーション
-python create_tables.py
\ No newline at end of file
+# データベースマイグレーション（create_tables.py で作った既存 DB もそのまま上げられる）
+alembic upgrade head
\ No newline at end of file
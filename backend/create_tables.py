@@ -1,14 +1,23 @@
 # backend/create_tables.py
+from pathlib import Path
+
 from app.database import engine, Base
 from app.models.user import User
 from app.models.event import Event
 from app.models.email import Email  # 該当するモデルがあれば
 from app.models.gmail_token import GmailToken
+from app.models.gmail_sync_state import GmailSyncState
+from app.models.sync_job import SyncJob
 
 def create_tables():
-    """全てのテーブルを作成"""
+    """全てのテーブルを作成（ローカル開発用。本番は `alembic upgrade head`）"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+
+    # create_all で最新スキーマになったので、マイグレーション履歴も head に合わせる
+    from alembic import command
+    from alembic.config import Config
+    command.stamp(Config(str(Path(__file__).resolve().parent / "alembic.ini")), "head")
     print("✅ Tables created successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+# backend/migrations/env.py
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.database import Base, DATABASE_URL
+import app.models  # noqa: F401  全モデルを Base に登録
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# -x / Config.set_main_option で上書きされていなければ .env の DATABASE_URL
+url = config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+# 0007 の全文検索の索引はモデルに無いので、autogenerate が消す差分を出さないように比較から外す
+# （SQLite: FTS5 の emails_fts とその影テーブル emails_fts_*、Postgres: emails.search_tsv と GIN インデックス）
+SEARCH_INDEX_TABLE_PREFIX = "emails_fts"
+SEARCH_INDEX_COLUMN = "search_tsv"
+SEARCH_INDEX_NAME = "ix_emails_search_tsv"
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table" and name.startswith(SEARCH_INDEX_TABLE_PREFIX):
+        return False
+    if type_ == "column" and name == SEARCH_INDEX_COLUMN and object.table.name == "emails":
+        return False
+    if type_ == "index" and name == SEARCH_INDEX_NAME:
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(url, future=True)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite は ALTER TABLE が弱いので batch モード（テーブル作り直し）で
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,119 @@
+"""baseline: create_tables.py 時代のスキーマ
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+create_tables.py（Base.metadata.create_all）で作られた既存 DB でもそのまま
+`alembic upgrade head` できるように、既にあるテーブルは作らない。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("google_sub", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("name", sa.String(), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_google_sub", "users", ["google_sub"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"])
+
+    if not _has_table("emails"):
+        op.create_table(
+            "emails",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("gmail_message_id", sa.Text(), nullable=False),
+            sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("from_address", sa.Text()),
+            sa.Column("subject", sa.Text()),
+            sa.Column("snippet", sa.Text()),
+            sa.Column("processing_status", sa.String(16), nullable=False),
+            sa.Column("body_plain", sa.Text()),
+        )
+        op.create_index("ix_emails_id", "emails", ["id"])
+
+    if not _has_table("events"):
+        op.create_table(
+            "events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("email_id", sa.Integer(), sa.ForeignKey("emails.id"), nullable=True),
+            sa.Column("company_name", sa.Text()),
+            sa.Column("title", sa.Text(), nullable=False),
+            sa.Column("event_type", sa.String(16), nullable=False),
+            sa.Column("start_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("end_at", sa.DateTime(timezone=True)),
+            sa.Column("location", sa.Text()),
+            sa.Column("memo", sa.Text()),
+            sa.Column("source", sa.String(16), nullable=False),
+            sa.Column("status", sa.String(16), nullable=False),
+            sa.Column("dedup_hash", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+        op.create_index("ix_events_id", "events", ["id"])
+
+    if not _has_table("gmail_tokens"):
+        op.create_table(
+            "gmail_tokens",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+            sa.Column("token_json", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if not _has_table("gmail_sync_states"):
+        op.create_table(
+            "gmail_sync_states",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+            sa.Column("history_id", sa.Text(), nullable=True),
+            sa.Column("last_full_sync_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if not _has_table("sync_jobs"):
+        op.create_table(
+            "sync_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("status", sa.String(16), nullable=False),
+            sa.Column("active_user_id", sa.Integer(), nullable=True, unique=True),
+            sa.Column("fetched_count", sa.Integer(), nullable=False),
+            sa.Column("parsed_count", sa.Integer(), nullable=False),
+            sa.Column("events_created", sa.Integer(), nullable=False),
+            sa.Column("error", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("started_at", sa.DateTime(timezone=True)),
+            sa.Column("finished_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_sync_jobs_id", "sync_jobs", ["id"])
+        op.create_index("ix_sync_jobs_user_id", "sync_jobs", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("sync_jobs")
+    op.drop_table("gmail_sync_states")
+    op.drop_table("gmail_tokens")
+    op.drop_table("events")
+    op.drop_table("emails")
+    op.drop_table("users")
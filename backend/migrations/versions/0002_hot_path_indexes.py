@@ -0,0 +1,77 @@
+"""hot path 用の複合インデックスと一意制約
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+- emails (user_id, gmail_message_id) UNIQUE … 取り込み時の既存チェック / ON CONFLICT の対象
+- events (user_id, dedup_hash) UNIQUE      … 自動生成 event の重複チェック
+- events (user_id, start_at)               … 一覧（list_events）の絞り込み + 並び替え
+- gmail_tokens (user_id) は baseline の UNIQUE 制約が裏でインデックスを持つので追加しない
+
+一意インデックスを張る前に既存の重複を片付ける:
+emails は若い id に寄せて（events.email_id も付け替えて）削除、
+events の dedup_hash 重複は古い 1 件だけ残して NULL にする（手動 event と同じ扱い）。
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE events SET email_id = (
+            SELECT MIN(e2.id) FROM emails e1
+            JOIN emails e2
+              ON e2.user_id = e1.user_id AND e2.gmail_message_id = e1.gmail_message_id
+            WHERE e1.id = events.email_id
+        )
+        WHERE email_id IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM emails WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM emails GROUP BY user_id, gmail_message_id
+            ) keep
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE events SET dedup_hash = NULL
+        WHERE dedup_hash IS NOT NULL AND id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM events
+                WHERE dedup_hash IS NOT NULL
+                GROUP BY user_id, dedup_hash
+            ) keep
+        )
+        """
+    )
+
+    op.create_index(
+        "uq_emails_user_id_gmail_message_id",
+        "emails",
+        ["user_id", "gmail_message_id"],
+        unique=True,
+    )
+    op.create_index(
+        "uq_events_user_id_dedup_hash",
+        "events",
+        ["user_id", "dedup_hash"],
+        unique=True,
+    )
+    op.create_index("ix_events_user_id_start_at", "events", ["user_id", "start_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_user_id_start_at", table_name="events")
+    op.drop_index("uq_events_user_id_dedup_hash", table_name="events")
+    op.drop_index("uq_emails_user_id_gmail_message_id", table_name="emails")
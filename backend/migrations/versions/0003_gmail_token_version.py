@@ -0,0 +1,28 @@
+"""gmail_tokens に楽観ロック用の version 列
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+token refresh を複数プロセスで同時に書き込んだときに後勝ちで上書きしないため。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("gmail_tokens") as batch_op:
+        batch_op.add_column(
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("gmail_tokens") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,35 @@
+"""events の keyset ページング用 index と、同期ジョブの変更 event id
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+- ix_events_user_id_start_at → ix_events_user_id_start_at_id（(start_at, id) で並べて読むため）
+- sync_jobs.changed_event_ids: 同期で作成/更新した event の id（JSON 配列）
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_events_user_id_start_at_id", "events", ["user_id", "start_at", "id"]
+    )
+    op.drop_index("ix_events_user_id_start_at", table_name="events")
+
+    with op.batch_alter_table("sync_jobs") as batch_op:
+        batch_op.add_column(sa.Column("changed_event_ids", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sync_jobs") as batch_op:
+        batch_op.drop_column("changed_event_ids")
+
+    op.create_index("ix_events_user_id_start_at", "events", ["user_id", "start_at"])
+    op.drop_index("ix_events_user_id_start_at_id", table_name="events")
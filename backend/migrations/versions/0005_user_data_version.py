@@ -0,0 +1,28 @@
+"""users に変更バージョン data_version 列
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+/api/events や /api/user の ETag に使う（app/core/etag.py）。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column("data_version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("data_version")
@@ -0,0 +1,48 @@
+"""Gmail 同期の絞り込み設定と取得／一致件数
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+- gmail_sync_states: gmail_query / label_ids / sender_allowlist（messages.list の q / labelIds）
+  と fetched_total / matched_total（累計）
+- sync_jobs.matched_count: その同期で event 情報が取れたメール数
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("gmail_sync_states") as batch_op:
+        batch_op.add_column(sa.Column("gmail_query", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("label_ids", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("sender_allowlist", sa.Text(), nullable=True))
+        batch_op.add_column(
+            sa.Column("fetched_total", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(
+            sa.Column("matched_total", sa.Integer(), nullable=False, server_default="0")
+        )
+
+    with op.batch_alter_table("sync_jobs") as batch_op:
+        batch_op.add_column(
+            sa.Column("matched_count", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sync_jobs") as batch_op:
+        batch_op.drop_column("matched_count")
+
+    with op.batch_alter_table("gmail_sync_states") as batch_op:
+        batch_op.drop_column("matched_total")
+        batch_op.drop_column("fetched_total")
+        batch_op.drop_column("sender_allowlist")
+        batch_op.drop_column("label_ids")
+        batch_op.drop_column("gmail_query")
@@ -0,0 +1,110 @@
+"""メールの全文検索インデックス
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+- SQLite: FTS5 仮想テーブル emails_fts(subject, body, owner)（rowid = emails.id、owner = "u<user_id>"）
+- Postgres: emails.search_tsv（tsvector）+ GIN インデックス ix_emails_search_tsv
+- 既存のメールはここで索引に入れる（トークン化は app/services/email_search.py の search_tokens と同じ bigram。
+  アプリのコードが後で変わっても同じ索引になるように、ここに写しておく）
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# かな・カナ・漢字の連続（長音記号・々 も含める）
+_CJK = "々぀-ヿ㐀-䶿一-鿿豈-﫿"
+_TOKEN_RE = re.compile(rf"(?P<cjk>[{_CJK}]+)|(?P<word>[^\W_{_CJK}]+)")
+
+
+def _search_tokens(value: str | None) -> list[str]:
+    """索引に入れる語（NFKC + 小文字。かな・漢字は 2 文字ずつ、それ以外は語ごと。出現順・重複あり）"""
+    if not value:
+        return []
+    tokens = []
+    for m in _TOKEN_RE.finditer(unicodedata.normalize("NFKC", value).lower()):
+        run = m.group()
+        if m.lastgroup == "cjk" and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    if dialect == "sqlite":
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(subject, body, owner)")
+    elif dialect == "postgresql":
+        op.add_column("emails", sa.Column("search_tsv", postgresql.TSVECTOR(), nullable=True))
+        op.create_index(
+            "ix_emails_search_tsv", "emails", ["search_tsv"], postgresql_using="gin"
+        )
+    else:
+        return
+
+    _backfill(bind, dialect)
+
+
+def _backfill(bind, dialect: str) -> None:
+    if dialect == "sqlite":
+        write = sa.text(
+            "INSERT OR REPLACE INTO emails_fts (rowid, subject, body, owner) "
+            "VALUES (:id, :subject, :body, :owner)"
+        )
+    else:
+        write = sa.text(
+            "UPDATE emails SET search_tsv = "
+            "setweight(array_to_tsvector(CAST(:subject AS text[])), 'A') || "
+            "setweight(array_to_tsvector(CAST(:body AS text[])), 'B') "
+            "WHERE id = :id"
+        )
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, user_id, subject, from_address, snippet, body_plain FROM emails "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            subject = _search_tokens(row.subject)
+            body = _search_tokens(row.from_address) + _search_tokens(row.snippet) + _search_tokens(row.body_plain)
+            if dialect == "sqlite":
+                params.append({
+                    "id": row.id, "subject": " ".join(subject), "body": " ".join(body),
+                    "owner": f"u{row.user_id}",
+                })
+            else:
+                params.append({"id": row.id, "subject": sorted(set(subject)), "body": sorted(set(body))})
+        bind.execute(write, params)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute("DROP TABLE IF EXISTS emails_fts")
+    elif dialect == "postgresql":
+        op.drop_index("ix_emails_search_tsv", table_name="emails")
+        op.drop_column("emails", "search_tsv")
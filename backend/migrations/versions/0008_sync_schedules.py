@@ -0,0 +1,40 @@
+"""定期同期のスケジュール
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+- sync_schedules: ユーザーごとの次回同期時刻・間隔・前回の結果（app/services/sync_scheduler.py）
+  行はスケジューラが GmailToken のあるユーザー分を作るので、ここでは入れない
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_schedules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+        sa.Column("next_due_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("interval_seconds", sa.Integer(), nullable=False),
+        sa.Column("running_job_id", sa.Integer(), nullable=True),
+        sa.Column("last_run_at", sa.DateTime(timezone=True)),
+        sa.Column("last_duration_seconds", sa.Float()),
+        sa.Column("last_status", sa.String(16)),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("consecutive_failures", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_recruiting_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_sync_schedules_next_due_at", "sync_schedules", ["next_due_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_schedules_next_due_at", table_name="sync_schedules")
+    op.drop_table("sync_schedules")
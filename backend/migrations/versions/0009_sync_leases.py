@@ -0,0 +1,34 @@
+"""同期のリース（ユーザーごとの排他）
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+- sync_leases: 同期中のユーザーと、持っているプロセス・ジョブ・heartbeat・期限（app/services/sync_leases.py）
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_leases",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("owner", sa.String(255), nullable=False),
+        sa.Column("job_id", sa.Integer(), nullable=True),
+        sa.Column("acquired_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_sync_leases_expires_at", "sync_leases", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_leases_expires_at", table_name="sync_leases")
+    op.drop_table("sync_leases")
@@ -0,0 +1,35 @@
+"""Gmail のプッシュ通知（users.watch）の状態
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+- gmail_sync_states: watch_email（通知の emailAddress → ユーザー）/ watch_expires_at /
+  watch_attempted_at / watch_error（app/services/gmail_push.py）
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("gmail_sync_states") as batch_op:
+        batch_op.add_column(sa.Column("watch_email", sa.String(320), nullable=True))
+        batch_op.add_column(sa.Column("watch_expires_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("watch_attempted_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("watch_error", sa.Text(), nullable=True))
+        batch_op.create_index("ix_gmail_sync_states_watch_email", ["watch_email"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("gmail_sync_states") as batch_op:
+        batch_op.drop_index("ix_gmail_sync_states_watch_email")
+        batch_op.drop_column("watch_error")
+        batch_op.drop_column("watch_attempted_at")
+        batch_op.drop_column("watch_expires_at")
+        batch_op.drop_column("watch_email")
@@ -0,0 +1,67 @@
+"""メール本文を zlib で圧縮して持つ
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+- emails.body_plain（Text）→ emails.body_zlib（LargeBinary、UTF-8 + zlib。app/models/email.py の compress_body と同じ形式）
+- 既存の行はここで BACKFILL_BATCH_SIZE 件ずつ圧縮して移す
+- 空いた領域は自動では返らないので、移したあとに SQLite は VACUUM、Postgres は VACUUM FULL emails を流す
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+# アプリのコードが後で変わっても動くように、圧縮・展開はここに書いておく
+COMPRESS_LEVEL = 6
+
+
+def _compress(value: str) -> bytes:
+    return zlib.compress(value.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _convert(src: str, dst: str, fn) -> None:
+    """emails の src 列を fn で変換して dst 列に書く（id 順に BACKFILL_BATCH_SIZE 件ずつ）"""
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                f"SELECT id, {src} FROM emails WHERE id > :last_id AND {src} IS NOT NULL "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        bind.execute(
+            sa.text(f"UPDATE emails SET {dst} = :value WHERE id = :id"),
+            [{"id": id_, "value": fn(value)} for id_, value in rows],
+        )
+
+
+def upgrade() -> None:
+    op.add_column("emails", sa.Column("body_zlib", sa.LargeBinary(), nullable=True))
+    _convert("body_plain", "body_zlib", _compress)
+    with op.batch_alter_table("emails") as batch_op:
+        batch_op.drop_column("body_plain")
+
+
+def downgrade() -> None:
+    op.add_column("emails", sa.Column("body_plain", sa.Text(), nullable=True))
+    _convert("body_zlib", "body_plain", _decompress)
+    with op.batch_alter_table("emails") as batch_op:
+        batch_op.drop_column("body_zlib")
@@ -0,0 +1,32 @@
+# backend/reparse_emails.py
+"""
+保存済みメールを解析し直して events を作り直す（バックフィル用）
+
+    python reparse_emails.py                     # queued / failed のメールを全ユーザー分
+    python reparse_emails.py --user-id 3 --all   # ユーザー 3 の全メール
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.services.gmail_sync import reparse_emails
+
+
+def main():
+    parser = argparse.ArgumentParser(description="保存済みメールの再解析")
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--all", action="store_true", help="parsed 済みのメールも対象にする")
+    parser.add_argument("--workers", type=int, default=None, help="解析プロセス数（既定: CPU 数）")
+    args = parser.parse_args()
+
+    statuses = ("queued", "failed", "parsed") if args.all else ("queued", "failed")
+
+    db = SessionLocal()
+    try:
+        stats = reparse_emails(db, user_id=args.user_id, statuses=statuses, max_workers=args.workers)
+    finally:
+        db.close()
+    print(f"✅ reparsed {stats['emails']} emails, created {stats['events_created']} events")
+
+
+if __name__ == "__main__":
+    main()
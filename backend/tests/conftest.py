@@ -0,0 +1,27 @@
+# backend/tests/conftest.py
+"""
+テスト共通の準備
+
+設定（DATABASE_URL など）は app を import したときに読まれるので、app を import する前に
+一時ファイルの SQLite を指しておく。テーブルは alembic ではなく create_all で作る。
+
+    cd backend
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+import pytest
+
+import app.models  # テーブル定義を Base に登録する
+from app.database import Base, engine
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _tables():
+    Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
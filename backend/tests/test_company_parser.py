@@ -0,0 +1,28 @@
+# backend/tests/test_company_parser.py
+"""
+extract_company_name がマッチャー化する前の実装と同じ結果を返すこと
+
+company_parser_golden.json は前の実装で解析した期待値（mailgen のメール 200 件 +
+括弧・ダッシュ・署名などの崩れた件名/本文/差出人を組み合わせた 100 件）。
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from app.services.company_parser import extract_company_name
+
+GOLDEN = Path(__file__).resolve().parent / "company_parser_golden.json"
+CASES = json.loads(GOLDEN.read_text(encoding="utf-8"))
+
+
+def test_golden_corpus_size():
+    assert len(CASES) == 300
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case["subject"][:30])
+def test_matches_golden(case):
+    got = extract_company_name(
+        subject=case["subject"], body=case["body"], from_address=case["from_address"]
+    )
+    assert got == case["expected"]
@@ -0,0 +1,88 @@
+# backend/tests/test_creds.py
+"""app/creds.py の refresh が single-flight になっていること（偽のトークンエンドポイントで数える）"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+
+from app import creds
+from app.database import SessionLocal
+from app.models import GmailToken, User
+
+THREADS = 8
+
+
+class FakeResponse:
+    def __init__(self, data: dict):
+        self.status = 200
+        self.headers = {"content-type": "application/json"}
+        self.data = json.dumps(data).encode()
+
+
+class FakeTokenEndpoint:
+    """google.auth.transport.Request の代わり。呼ばれた回数を数え、毎回違う access_token を返す"""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, method="GET", body=None, headers=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        # refresh 中に後続のスレッドが追いつくように少し待たせる
+        time.sleep(self.delay)
+        return FakeResponse({"access_token": f"fresh-{n}", "expires_in": 3600, "token_type": "Bearer"})
+
+
+def _expired_token_json() -> str:
+    return Credentials(
+        token="stale",
+        refresh_token="refresh",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="client",
+        client_secret="secret",
+        expiry=datetime.utcnow() - timedelta(minutes=5),
+    ).to_json()
+
+
+def test_concurrent_refresh_is_single_flight(monkeypatch):
+    user_id = 9001
+    with SessionLocal() as db:
+        db.add(User(id=user_id, google_sub="creds-test", email="creds@example.com"))
+        db.add(GmailToken(user_id=user_id, token_json=_expired_token_json()))
+        db.commit()
+    creds.invalidate_credentials(user_id)
+
+    endpoint = FakeTokenEndpoint()
+    monkeypatch.setattr(creds, "token_request_factory", lambda: endpoint)
+
+    start = threading.Barrier(THREADS)
+    tokens: list[str] = []
+    errors: list[BaseException] = []
+
+    def load() -> None:
+        start.wait()
+        try:
+            tokens.append(creds.load_credentials(user_id).token)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert errors == []
+    assert endpoint.calls == 1
+    assert tokens == ["fresh-1"] * THREADS
+    # 終わったらユーザーごとのロックは残さない
+    assert user_id not in creds._refresh_locks
+    # refresh した token は DB にも書かれている（別プロセスはこれを使う）
+    with SessionLocal() as db:
+        token = db.query(GmailToken).filter(GmailToken.user_id == user_id).one()
+        assert json.loads(token.token_json)["token"] == "fresh-1"
@@ -0,0 +1,68 @@
+# backend/tests/test_gmail_import.py
+"""POST /api/gmail/import の中身（_import_gmail）を偽 Gmail（benchmarks/fake_gmail.py）相手に"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from google.oauth2.credentials import Credentials
+
+from app.api import gmail as gmail_api
+from app.core.etag import get_data_version
+from app.creds import _cache_put
+from app.database import SessionLocal
+from app.gmail_client import use_api_root
+from app.models import Email, GmailToken, SyncLease, User
+from app.services.sync_leases import acquire_lease
+from benchmarks.fake_gmail import FakeGmailProcess
+from benchmarks.mailgen import generate_messages
+
+USER_ID = 901
+
+
+@pytest.fixture(scope="module")
+def fake_gmail():
+    with FakeGmailProcess(generate_messages(40, seed=20), delivered=20) as fake:
+        use_api_root(fake.root)
+        with SessionLocal() as db:
+            db.add(User(id=USER_ID, google_sub="import-test", email="import@example.com"))
+            db.add(GmailToken(user_id=USER_ID, token_json="{}"))
+            db.commit()
+        _cache_put(USER_ID, Credentials(token="test", expiry=datetime.utcnow() + timedelta(hours=1)))
+        yield fake
+
+
+def test_import_bumps_data_version_only_for_new_events(fake_gmail, monkeypatch):
+    with SessionLocal() as db:
+        version = get_data_version(db, USER_ID)
+
+        result = gmail_api._import_gmail(db, USER_ID)
+        assert result["imported_emails"] > 0 and result["new_events"]
+        assert get_data_version(db, USER_ID) == version + 1
+        # リースは返している
+        assert db.get(SyncLease, USER_ID) is None
+
+        # 取り込み済みだけ → 何も変わらない
+        assert gmail_api._import_gmail(db, USER_ID)["imported_emails"] == 0
+        assert get_data_version(db, USER_ID) == version + 1
+
+        # 新しいメールは入っても event ができなければ ETag はそのまま
+        fake_gmail.deliver(20)
+        monkeypatch.setattr(gmail_api, "_make_event_from_email", lambda email: None)
+        emails = db.query(Email).filter(Email.user_id == USER_ID).count()
+        result = gmail_api._import_gmail(db, USER_ID)
+        assert result["imported_emails"] > 0 and result["new_events"] == []
+        assert db.query(Email).filter(Email.user_id == USER_ID).count() == emails + result["imported_emails"]
+        assert get_data_version(db, USER_ID) == version + 1
+
+
+def test_import_is_refused_while_a_sync_holds_the_lease(fake_gmail):
+    with SessionLocal() as db:
+        assert acquire_lease(db, USER_ID, job_id=1)
+        db.commit()
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                gmail_api._import_gmail(db, USER_ID)
+            assert exc_info.value.status_code == 409
+        finally:
+            db.query(SyncLease).filter(SyncLease.user_id == USER_ID).delete()
+            db.commit()
@@ -0,0 +1,146 @@
+# backend/tests/test_gmail_quota.py
+"""
+app/gmail_quota.py のやり直しとレーン
+
+- 偽 Gmail（benchmarks/fake_gmail.py）に 429 / 503 を返させ、GmailClient がその回数だけやり直すこと
+- バケットが空のとき、background は interactive が取り終わるまで待つこと
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+
+from app import gmail_quota as quota
+from app.core.settings import GMAIL_MAX_RETRIES
+from app.gmail_client import client_for_credentials, use_api_root
+from app.gmail_quota import BACKGROUND, INTERACTIVE, QuotaScheduler, TokenBucket, gmail_lane
+from app.gmail_service import get_profile
+from benchmarks.fake_gmail import FakeGmailProcess
+from benchmarks.mailgen import generate_messages
+
+USER_ID = 1
+METHOD = "gmail.users.getProfile"
+
+
+@pytest.fixture(scope="module", params=[429, 503])
+def fake_gmail(request):
+    with FakeGmailProcess(generate_messages(10, seed=21), error_status=request.param) as fake:
+        use_api_root(fake.root)
+        yield fake, request.param
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """待たない（バックオフ 0 秒・クォータ十分）クライアント。バックオフした attempt を記録する"""
+    attempts: list[int] = []
+
+    def _no_wait(attempt, exc=None):
+        attempts.append(attempt)
+        return 0.0
+
+    monkeypatch.setattr(quota, "backoff_delay", _no_wait)
+    monkeypatch.setattr(quota, "scheduler", QuotaScheduler(user_rate=10_000, project_rate=10_000))
+    creds = Credentials(token="test", expiry=datetime.utcnow() + timedelta(hours=1))
+    c = client_for_credentials(creds, user_id=USER_ID)
+    c.attempts = attempts
+    return c
+
+
+def test_retries_injected_errors(fake_gmail, client):
+    fake, status = fake_gmail
+    fake.reset_stats()
+    retries = quota.RETRIES.labels(METHOD, str(status))
+    before = retries.value
+
+    fake.fail_next(3)
+    profile = get_profile(USER_ID, client=client)
+
+    assert profile["emailAddress"]
+    assert client.attempts == [0, 1, 2]
+    assert retries.value - before == 3
+    stats = fake.stats()
+    assert stats["injected_errors"] == 3
+    assert stats["requests"]["users.getProfile"] == 1
+
+
+def test_gives_up_after_max_retries(fake_gmail, client):
+    fake, status = fake_gmail
+    fake.reset_stats()
+
+    fake.fail_next(GMAIL_MAX_RETRIES + 1)
+    with pytest.raises(HttpError) as exc_info:
+        get_profile(USER_ID, client=client)
+
+    assert exc_info.value.resp.status == status
+    assert client.attempts == list(range(GMAIL_MAX_RETRIES))
+    assert fake.stats()["injected_errors"] == GMAIL_MAX_RETRIES + 1
+
+
+def test_rate_limit_drains_user_bucket(fake_gmail, client, monkeypatch):
+    """429 なら同じユーザーの呼び出しも一緒に待たせる（503 はバケットに触らない）"""
+    fake, status = fake_gmail
+    bucket = quota.scheduler.user_bucket(USER_ID)
+    # 残高は貯まり直すので見ない。drain が呼ばれたかだけ数える
+    drained: list[TokenBucket] = []
+    drain = TokenBucket.drain
+
+    def _spy(self) -> None:
+        drained.append(self)
+        drain(self)
+
+    monkeypatch.setattr(TokenBucket, "drain", _spy)
+
+    fake.fail_next(1)
+    get_profile(USER_ID, client=client)
+
+    assert drained == ([bucket] if status == 429 else [])
+
+
+def test_background_yields_to_interactive():
+    """空のバケットに background → interactive の順で並ばせると、interactive が先に取る"""
+    scheduler = QuotaScheduler(user_rate=20, project_rate=10_000, headroom=0.2)
+    scheduler.user_bucket(USER_ID).drain()
+    done: list[str] = []
+
+    def take(lane: str) -> None:
+        with gmail_lane(lane):
+            scheduler.acquire(USER_ID, 5)
+        done.append(lane)
+
+    background = threading.Thread(target=take, args=(BACKGROUND,))
+    background.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=take, args=(INTERACTIVE,))
+    interactive.start()
+    background.join(timeout=5)
+    interactive.join(timeout=5)
+
+    assert done == [INTERACTIVE, BACKGROUND]
+
+
+def test_background_waits_while_interactive_is_waiting():
+    """残高が background の分あっても、interactive が待っている間は取らない"""
+    bucket = TokenBucket(rate=10, headroom=0.0)
+    bucket.tokens = 0
+    got = threading.Event()
+
+    def interactive() -> None:
+        bucket.acquire(10, INTERACTIVE)
+
+    def background() -> None:
+        bucket.acquire(1, BACKGROUND)
+        got.set()
+
+    t1 = threading.Thread(target=interactive)
+    t1.start()
+    time.sleep(0.05)
+    t2 = threading.Thread(target=background)
+    t2.start()
+    # 1 単位分貯まっても、interactive（10 単位待ち）が先
+    assert not got.wait(0.5)
+    t1.join(timeout=5)
+    assert got.wait(2)
+    t2.join(timeout=5)
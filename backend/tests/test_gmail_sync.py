@@ -0,0 +1,51 @@
+# backend/tests/test_gmail_sync.py
+"""app/services/gmail_sync.py の保存済みメールの解析"""
+from email.utils import parsedate_to_datetime
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.models import Email, User
+from app.services.gmail_sync import _parse_emails_to_events
+from benchmarks.mailgen import generate_messages
+
+USER_ID = 1001
+
+
+def test_parse_reads_stored_bodies_in_one_query():
+    """本文（deferred）を読んでいない queued のメールを解析しても、本文の SELECT は 1 回だけ"""
+    messages = generate_messages(20, seed=11, recruiting_ratio=1.0)
+    with SessionLocal() as db:
+        db.add(User(id=USER_ID, google_sub="parse-bodies", email="parse@example.com"))
+        db.add_all([
+            Email(
+                user_id=USER_ID,
+                gmail_message_id=m["id"],
+                from_address=m["from"],
+                subject=m["subject"],
+                body_plain=m["body"],
+                received_at=parsedate_to_datetime(m["date"]),
+                processing_status="queued",
+            )
+            for m in messages
+        ])
+        db.commit()
+
+    with SessionLocal() as db:
+        # 同期の _upsert_emails と同じく本文なしで引く
+        emails = db.query(Email).filter(Email.user_id == USER_ID).all()
+        selects: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and "body_zlib" in statement:
+                selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            _, matched = _parse_emails_to_events(db, USER_ID, emails)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert len(selects) == 1
+        assert matched > 0
+        assert {e.body_plain for e in emails} == {m["body"] for m in messages}
@@ -0,0 +1,60 @@
+# backend/tests/test_identity.py
+"""app/core/identity.py のセッション → users.id（ほかのプロセスでの削除）"""
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from app.core import identity
+from app.core.settings import USER_ID_CACHE_TTL_SECONDS
+from app.database import SessionLocal, engine
+from app.models import User
+
+USER_ID = 1101
+
+
+class _Clock:
+    """identity の time の代わり（monotonic だけ進められる）"""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def monotonic(self) -> float:
+        return time.monotonic() + self.offset
+
+
+def test_user_deleted_by_another_process_is_rejected_after_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(identity, "time", clock)
+    with SessionLocal() as db:
+        db.add(User(id=USER_ID, google_sub="identity-test", email="identity@example.com"))
+        db.commit()
+    request = SimpleNamespace(session={"google_id": "identity-test", "user_id": USER_ID})
+
+    with SessionLocal() as db:
+        assert identity.session_user_id(request, db) == USER_ID
+
+    # ほかのプロセスが消した（このプロセスの after_delete / after_commit は動かない）
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": USER_ID})
+
+    with SessionLocal() as db:
+        # TTL の間はキャッシュを信じる
+        assert identity.session_user_id(request, db) == USER_ID
+        # TTL が過ぎたら DB で確かめ直して弾く
+        clock.offset = USER_ID_CACHE_TTL_SECONDS + 1
+        assert identity.session_user_id(request, db) is None
+        assert identity.session_user_id(request, db) is None
+
+
+def test_google_sub_cache_expires(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(identity, "time", clock)
+    with SessionLocal() as db:
+        db.add(User(id=USER_ID + 1, google_sub="identity-sub", email="sub@example.com"))
+        db.commit()
+        assert identity.resolve_user_id(db, "identity-sub") == USER_ID + 1
+        assert "identity-sub" in identity._user_ids
+
+        clock.offset = USER_ID_CACHE_TTL_SECONDS + 1
+        assert "identity-sub" not in identity._user_ids
@@ -0,0 +1,60 @@
+# backend/tests/test_reparse.py
+"""reparse_emails（app/services/gmail_sync.py）が events の変わったユーザーだけ data_version を上げること"""
+from email.utils import parsedate_to_datetime
+
+from app.core.etag import get_data_version
+from app.database import SessionLocal
+from app.models import Email, Event, User
+from app.services.event_extractor import extract_event_fields
+from app.services.gmail_sync import reparse_emails
+from benchmarks.mailgen import generate_messages
+
+USER_ID = 801
+
+
+def _requeue(db) -> None:
+    db.query(Email).filter(Email.user_id == USER_ID).update({Email.processing_status: "queued"})
+    db.commit()
+
+
+def test_reparse_bumps_data_version_only_when_events_change():
+    messages = [
+        m for m in generate_messages(200, seed=7, recruiting_ratio=1.0)
+        if extract_event_fields(m["subject"], m["body"], m["from"])[1] is not None
+    ][:5]
+    assert messages
+
+    with SessionLocal() as db:
+        db.add(User(id=USER_ID, google_sub="reparse", email="reparse@example.com"))
+        for m in messages:
+            db.add(Email(
+                user_id=USER_ID,
+                gmail_message_id=m["id"],
+                from_address=m["from"],
+                subject=m["subject"],
+                body_plain=m["body"],
+                received_at=parsedate_to_datetime(m["date"]),
+                processing_status="queued",
+            ))
+        db.commit()
+        version = get_data_version(db, USER_ID)
+
+        # 1 回目: event ができる → 上がる
+        stats = reparse_emails(db, user_id=USER_ID, max_workers=1)
+        assert stats["events_created"] > 0
+        assert get_data_version(db, USER_ID) == version + 1
+        events = db.query(Event).filter(Event.user_id == USER_ID).count()
+
+        # 2 回目: 同じ結果なので event は変わらない → 上がらない
+        _requeue(db)
+        stats = reparse_emails(db, user_id=USER_ID, max_workers=1)
+        assert stats["events_created"] == 0
+        assert db.query(Event).filter(Event.user_id == USER_ID).count() == events
+        assert get_data_version(db, USER_ID) == version + 1
+
+        # 会社名が変わる（抽出のルールが変わった想定）→ 上がる
+        db.query(Event).filter(Event.user_id == USER_ID).update({Event.company_name: "旧社名"})
+        db.commit()
+        _requeue(db)
+        reparse_emails(db, user_id=USER_ID, max_workers=1)
+        assert get_data_version(db, USER_ID) == version + 2
@@ -0,0 +1,35 @@
+# backend/tests/test_sync_jobs.py
+"""app/services/sync_jobs.py のジョブの取り合い"""
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models import SyncJob, SyncLease, User
+from app.services import sync_jobs
+from app.services.sync_jobs import _claim_next_job, enqueue_sync_job
+
+
+def test_claim_moves_on_after_losing_a_race(monkeypatch):
+    """先頭の候補を別のワーカーに取られても、諦めずに次の候補を取る"""
+    with SessionLocal() as db:
+        db.add_all([User(id=uid, google_sub=f"claim-{uid}", email=f"claim{uid}@example.com") for uid in (701, 702)])
+        db.commit()
+        first = enqueue_sync_job(db, 701).id
+        second = enqueue_sync_job(db, 702).id
+
+        acquire_lease = sync_jobs.acquire_lease
+
+        def _lose_first(db, user_id, job_id, now=None):
+            if job_id == first:
+                # リースを見ない昔のワーカーが先に running にした
+                db.execute(update(SyncJob).where(SyncJob.id == first).values(status="running"))
+            return acquire_lease(db, user_id, job_id, now)
+
+        monkeypatch.setattr(sync_jobs, "acquire_lease", _lose_first)
+
+        job = _claim_next_job(db)
+
+        assert job is not None and job.id == second
+        assert job.status == "running"
+        # 負けた方のリースは返している
+        assert db.get(SyncLease, 701) is None
+        assert db.get(SyncLease, 702).job_id == second
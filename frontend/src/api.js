@@ -50,15 +50,70 @@ export const api = {
     return apiFetch("/api/gmail");
   },
 
+  // 同期で使う Gmail の検索条件（q / labelIds / 送信元）と取得数に対する一致率
+  getSyncSettings() {
+    return apiFetch("/api/gmail/sync-settings");
+  },
+
+  updateSyncSettings(payload) {
+    return apiFetch("/api/gmail/sync-settings", {
+      method: "PUT",
+      body: JSON.stringify(payload),
+    });
+  },
+
   // ★ ここから追加（or 修正）
-  fetchEvents() {
-    return apiFetch("/api/events");
+  // /api/events はページングされているので、next_cursor が無くなるまで読んで配列で返す
+  async fetchEvents({ from, to, limit = 500 } = {}) {
+    const events = [];
+    let cursor = null;
+    do {
+      const params = new URLSearchParams({ limit: String(limit) });
+      if (from) params.set("from", from);
+      if (to) params.set("to", to);
+      if (cursor) params.set("cursor", cursor);
+      const page = await apiFetch(`/api/events/?${params}`);
+      events.push(...page.items);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return events;
   },
 
-  syncEvents() {
-    return apiFetch("/api/events/sync", {
+  // 同期ジョブを積んで完了まで待つ
+  // current（今表示しているイベント一覧）を渡すと、同期で変わったイベントだけ取ってマージして返す
+  // 渡さなければ一覧を取り直して返す
+  async syncEvents({ intervalMs = 1000, current = null } = {}) {
+    let job = await apiFetch("/api/events/sync", {
       method: "POST",
     });
+    while (job.status === "queued" || job.status === "running") {
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      job = await this.getSyncJob(job.id);
+    }
+    if (job.status === "failed") {
+      throw { status: 500, data: { detail: job.error }, message: job.error };
+    }
+    if (!current) {
+      return this.fetchEvents();
+    }
+
+    const changed = [...job.changed_events];
+    let cursor = job.next_cursor;
+    while (cursor) {
+      const page = await this.getSyncJob(job.id, { cursor });
+      changed.push(...page.changed_events);
+      cursor = page.next_cursor;
+    }
+    const byId = new Map(current.map((ev) => [ev.id, ev]));
+    for (const ev of changed) byId.set(ev.id, ev);
+    return [...byId.values()].sort(
+      (a, b) => a.start_at.localeCompare(b.start_at) || a.id - b.id
+    );
+  },
+
+  getSyncJob(jobId, { cursor } = {}) {
+    const query = cursor ? `?${new URLSearchParams({ cursor })}` : "";
+    return apiFetch(`/api/events/sync/${jobId}${query}`);
   },
 
   // src/api.js の export const api = { ... } の中に追加
@@ -80,6 +135,12 @@ export const api = {
     });
   },
 
+  // 保存済みメールの全文検索（関連度順）。続きは返ってきた next_offset を offset に渡す
+  searchEmails(q, { limit = 20, offset = 0 } = {}) {
+    const params = new URLSearchParams({ q, limit: String(limit), offset: String(offset) });
+    return apiFetch(`/api/emails/search?${params}`);
+  },
+
 
 };
 
@@ -4,25 +4,33 @@ import dayGridPlugin from "@fullcalendar/daygrid";
 import timeGridPlugin from "@fullcalendar/timegrid";
 import interactionPlugin from "@fullcalendar/interaction";
 import listPlugin from "@fullcalendar/list";
+import { api } from "../api";
 
 export default function EventsCalendar() {
   const [events, setEvents] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [syncing, setSyncing] = useState(false);
 
   const load = async () => {
     setLoading(true);
     try {
-      const res = await fetch("http://127.0.0.1:8000/api/events/", {
-        credentials: "include",
-      });
-      if (!res.ok) throw new Error(await res.text());
-      const data = await res.json();
+      const data = await api.fetchEvents();
       setEvents(data);
     } finally {
       setLoading(false);
     }
   };
 
+  const sync = async () => {
+    setSyncing(true);
+    try {
+      // 同期で変わったイベントだけ取って今の一覧にマージする（一覧は取り直さない）
+      setEvents(await api.syncEvents({ current: events }));
+    } finally {
+      setSyncing(false);
+    }
+  };
+
   useEffect(() => {
     load();
   }, []);
@@ -42,20 +50,12 @@ export default function EventsCalendar() {
       <div style={{ display: "flex", gap: 8, alignItems: "center", marginBottom: 8 }}>
         <h2 style={{ margin: 0 }}>就活カレンダー</h2>
 
-        <button onClick={load} disabled={loading}>
+        <button onClick={load} disabled={loading || syncing}>
           {loading ? "更新中..." : "再読み込み"}
         </button>
 
-        <button
-          onClick={async () => {
-            await fetch("http://127.0.0.1:8000/api/events/sync", {
-              method: "POST",
-              credentials: "include",
-            });
-            await load();
-          }}
-        >
-          Gmailから同期
+        <button onClick={sync} disabled={loading || syncing}>
+          {syncing ? "同期中..." : "Gmailから同期"}
         </button>
       </div>
 
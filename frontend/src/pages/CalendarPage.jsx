@@ -35,7 +35,7 @@ export default function CalendarPage() {
     try {
       setSyncing(true);
       setError(null);
-      const data = await api.syncEvents();
+      const data = await api.syncEvents({ current: events });
       setEvents(data);
     } catch (e) {
       setError(e.message ?? "同期に失敗しました");